@@ -1,9 +1,18 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.forms import AuthenticationForm
+from django.contrib.auth.models import User
 from django import forms
 from django.contrib.auth import authenticate
-from django.contrib.auth.models import User
-from .models import Post, Comment
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+from . import deletion
+from .models import Post, Comment, OutboxEmail, UserDeletion
 
 class EmailAuthenticationForm(AuthenticationForm):
     """Custom login form that uses email instead of username"""
@@ -17,42 +26,168 @@ class EmailAuthenticationForm(AuthenticationForm):
         password = self.cleaned_data.get('password')
 
         if email is not None and password:
-            try:
-                user = User.objects.get(email=email)
-                self.user_cache = authenticate(
-                    self.request,
-                    username=user.username,
-                    password=password
-                )
-                if self.user_cache is None:
-                    raise forms.ValidationError(
-                        self.error_messages['invalid_login'],
-                        code='invalid_login',
-                        params={'username': self.username_field.verbose_name},
-                    )
-                else:
-                    self.confirm_login_allowed(self.user_cache)
-            except User.DoesNotExist:
-                raise forms.ValidationError(
-                    self.error_messages['invalid_login'],
-                    code='invalid_login',
-                    params={'username': self.username_field.verbose_name},
-                )
+            self.user_cache = authenticate(self.request, email=email, password=password)
+            if self.user_cache is None:
+                raise self.get_invalid_login_error()
+            self.confirm_login_allowed(self.user_cache)
 
         return self.cleaned_data
 
 admin.site.login_form = EmailAuthenticationForm
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts an unfiltered changelist from PostgreSQL's row estimate instead of
+    a full-table COUNT(*) once the table holds more than
+    ADMIN_ESTIMATED_COUNT_THRESHOLD rows. Filtered or searched changelists,
+    and other databases, are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and self.is_unfiltered(queryset):
+            estimate = self.estimated_count(queryset)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def is_unfiltered(queryset):
+        return queryset.query.where == queryset.model._default_manager.all().query.where
+
+    @staticmethod
+    def estimated_count(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples is -1 until the table is first vacuumed or analyzed.
+        return int(row[0]) if row and row[0] >= 0 else None
+
+
+class DeferringChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.defer(*self.model_admin.list_defer)
+
+
+class DeferredDeletionAdminMixin:
+    """
+    Routes the delete view and the "delete selected" action through
+    ``blog.deletion``: the objects are hidden at once and the purge_deleted
+    task removes them and their dependants in batches. Subclasses implement
+    ``delete_queryset``; the confirmation page lists only the selected
+    objects instead of collecting every dependent row.
+
+    Without the rows, the delete permission is checked on every model in
+    ``deferred_dependants``, whether or not the selection has any.
+    """
+    deferred_dependants = []
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        perms_needed = set()
+        for model in self.deferred_dependants:
+            model_admin = self.admin_site._registry.get(model)
+            if model_admin is not None and not model_admin.has_delete_permission(request):
+                perms_needed.add(model._meta.verbose_name)
+        return [str(obj) for obj in objs], {self.model._meta.verbose_name_plural: len(objs)}, perms_needed, []
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, [obj])
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for tables too large to count or load in full:
+    estimated page counts, no second COUNT(*) for the "N total" link, and
+    ``list_defer`` columns left out of the changelist query.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_defer = []
+
+    def get_changelist(self, request, **kwargs):
+        return DeferringChangeList
+
+
+class IndexedSearchMixin:
+    """
+    Admin search that matches each search field in its own query and unions
+    the matching primary keys. Django ORs every field in one WHERE clause,
+    joined tables included, which no index can serve; one field per branch
+    lets each use its trigram index (migration 0012), reaching related rows
+    through the foreign key index.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        search_fields = self.get_search_fields(request)
+        if not search_fields or not search_term:
+            return queryset, False
+        for bit in smart_split(search_term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            branches = [
+                self.model._base_manager.filter(**{f"{field}__icontains": bit}).order_by().values("pk")
+                for field in search_fields
+            ]
+            queryset = queryset.filter(pk__in=branches[0].union(*branches[1:]))
+        return queryset, False
+
+
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(DeferredDeletionAdminMixin, IndexedSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ["title", "author", "is_private", "created_at"]
     list_filter = ["is_private", "created_at"]
+    list_select_related = ["author"]
+    list_defer = ["content", "search_vector"]
     search_fields = ["title", "content", "author__username", "author__email"]
+    autocomplete_fields = ["author"]
+    deferred_dependants = [Comment]
+
+    def delete_queryset(self, request, queryset):
+        deletion.delete_posts(queryset)
+
+    def save_model(self, request, obj, form, change):
+        obj.refresh_excerpt()
+        super().save_model(request, obj, form, change)
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ["post", "commenter", "created_at"]
     list_filter = ["created_at"]
+    list_select_related = ["post", "commenter"]
+    list_defer = ["comment_text", "post__content", "post__excerpt", "post__search_vector"]
     search_fields = ["comment_text", "commenter__username", "commenter__email", "post__title"]
+    autocomplete_fields = ["post", "commenter"]
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at"]
+    list_filter = ["status"]
+    readonly_fields = ["created_at", "sent_at", "last_error"]
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class BlogUserAdmin(DeferredDeletionAdminMixin, LargeTableAdminMixin, UserAdmin):
+    search_fields = ["username", "email"]
+    deferred_dependants = [Post, Comment, UserDeletion]
+
+    def delete_queryset(self, request, queryset):
+        deletion.delete_users(queryset)
+
+
+@admin.register(UserDeletion)
+class UserDeletionAdmin(admin.ModelAdmin):
+    list_display = ["user", "requested_at"]
+    list_select_related = ["user"]
+    raw_id_fields = ["user"]
@@ -0,0 +1,126 @@
+"""
+Async versions of the post list/detail and comment list endpoints, served
+under ``/api/async/`` for deployments running the ASGI application.
+
+They return the same JSON as the DRF endpoints (built by the fast-path plans
+and rendered by ``FastJSONRenderer``) but await the ORM, so a worker keeps
+accepting requests while earlier ones wait on the database. Only token
+authentication and page-number pagination are supported, and responses are
+neither cached nor conditional.
+"""
+import math
+from functools import wraps
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .authentication import CachedTokenAuthentication
+from .fastpath import get_plan
+from .fieldsets import selected_fields
+from .models import Comment, Post
+from .renderers import FastJSONRenderer
+from .serializers import CommentSerializer, PostListSerializer, PostSerializer
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def async_api_view(view):
+    """
+    Authenticate the request's token and turn DRF exceptions into the same
+    error responses DRF would send.
+    """
+
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authenticator = CachedTokenAuthentication()
+        try:
+            result = await authenticator.aauthenticate(request)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+            request.user, request.auth = result
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            headers = None
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                exc.status_code = 401
+                headers = {"WWW-Authenticate": authenticator.authenticate_header(request)}
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+            return json_response(data, status=exc.status_code, headers=headers)
+
+    return wrapper
+
+
+def get_request_plan(request, serializer_class):
+    fields = selected_fields(request, serializer_class.Meta.fields)
+    return get_plan(serializer_class, frozenset(fields))
+
+
+async def paginate(request, queryset, serializer_class):
+    """
+    Respond with one page of ``queryset`` in DRF's PageNumberPagination format.
+    """
+    plan = get_request_plan(request, serializer_class)
+    page_size = api_settings.PAGE_SIZE
+    count = await queryset.acount()
+    pages = max(1, math.ceil(count / page_size))
+
+    page = request.GET.get("page", 1)
+    try:
+        number = pages if page == "last" else int(page)
+    except ValueError:
+        number = 0
+    if not 1 <= number <= pages:
+        raise exceptions.NotFound("Invalid page.")
+
+    offset = (number - 1) * page_size
+    rows = [row async for row in plan.apply(queryset)[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    previous = None
+    if number > 1:
+        previous = remove_query_param(url, "page") if number == 2 else replace_query_param(url, "page", number - 1)
+    return json_response({
+        "count": count,
+        "next": replace_query_param(url, "page", number + 1) if number < pages else None,
+        "previous": previous,
+        "results": [plan.represent(row) for row in rows],
+    })
+
+
+def visible_posts(request):
+    queryset = Post.objects.visible_to(request.user)
+    author_id = request.GET.get("author")
+    if author_id:
+        queryset = queryset.filter(author_id=author_id)
+    return queryset
+
+
+@async_api_view
+async def post_list(request):
+    return await paginate(request, visible_posts(request), PostListSerializer)
+
+
+@async_api_view
+async def post_detail(request, pk):
+    plan = get_request_plan(request, PostSerializer)
+    try:
+        row = await plan.apply(visible_posts(request)).aget(pk=pk)
+    except Post.DoesNotExist:
+        raise exceptions.NotFound("No Post matches the given query.")
+    return json_response(plan.represent(row))
+
+
+@async_api_view
+async def comment_list(request):
+    return await paginate(request, Comment.objects.visible(), CommentSerializer)
@@ -0,0 +1,251 @@
+"""
+Token authentication with a two-level cache in front of the authtoken table.
+
+Lookups go to a small in-process LRU first, then to the shared Django cache
+(Redis), and only then to the database. Deleting a token or saving its user
+drops the shared entry and bumps a shared revocation epoch; every local entry
+is stored with the epoch it was read under and is only honoured while that
+epoch is current, so revocation reaches every worker process on its next
+request. Only the token key and the user's non-secret fields are cached,
+never the password hash.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+KEY_PREFIX = "blog:auth:token"
+EPOCH_KEY = f"{KEY_PREFIX}:epoch"
+
+# What request handling reads from ``request.user``, in model field order as
+# ``Model.from_db`` expects; anything else (the password hash in particular)
+# is deferred and loaded on access.
+USER_FIELDS = ("id", "is_superuser", "username", "first_name", "last_name", "email", "is_staff", "is_active")
+
+
+class LocalTokenCache:
+    """
+    Thread-safe LRU mapping of token key to Token, with a per-entry TTL and
+    the revocation epoch the entry was read under.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, epoch):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, stored_epoch, expires_at = entry
+            if stored_epoch != epoch or expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token, epoch):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (token, epoch, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local_cache = None
+_local_cache_lock = threading.Lock()
+_stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+
+def get_local_cache():
+    global _local_cache
+    if _local_cache is None:
+        with _local_cache_lock:
+            if _local_cache is None:
+                _local_cache = LocalTokenCache(
+                    settings.TOKEN_CACHE_LOCAL_MAXSIZE, settings.TOKEN_CACHE_LOCAL_TTL
+                )
+    return _local_cache
+
+
+def shared_key(key):
+    return f"{KEY_PREFIX}:{key}"
+
+
+def _initial_epoch():
+    # Seeded from the clock so an evicted epoch never comes back with a value
+    # that older local entries were stored under.
+    return time.time_ns()
+
+
+def current_epoch():
+    epoch = cache.get(EPOCH_KEY)
+    if epoch is None:
+        cache.add(EPOCH_KEY, _initial_epoch(), None)
+        epoch = cache.get(EPOCH_KEY)
+    return epoch
+
+
+async def acurrent_epoch():
+    epoch = await cache.aget(EPOCH_KEY)
+    if epoch is None:
+        await cache.aadd(EPOCH_KEY, _initial_epoch(), None)
+        epoch = await cache.aget(EPOCH_KEY)
+    return epoch
+
+
+def revoke(*keys):
+    """
+    Forget cached tokens so the next request re-reads them from the database,
+    in this process and, through the epoch, in every other one.
+    """
+    _revoke(keys)
+    if transaction.get_connection().in_atomic_block:
+        # Until the change commits, a concurrent request can still read the
+        # old row and put it back in the shared cache; forget it once more
+        # afterwards.
+        transaction.on_commit(lambda: _revoke(keys))
+
+
+def _revoke(keys):
+    cache.delete_many([shared_key(key) for key in keys])
+    try:
+        cache.incr(EPOCH_KEY)
+    except ValueError:
+        cache.add(EPOCH_KEY, _initial_epoch(), None)
+    local_cache = get_local_cache()
+    for key in keys:
+        local_cache.delete(key)
+
+
+def dump(token):
+    """
+    Shared cache entry for ``token``: its key, creation time and the user's
+    ``USER_FIELDS``.
+    """
+    return (token.key, token.created, tuple(getattr(token.user, field) for field in USER_FIELDS))
+
+
+def load(model, entry):
+    """
+    Token and user rebuilt from a ``dump`` entry without touching the
+    database; fields that were not cached are deferred.
+    """
+    key, created, user_values = entry
+    # With a database alias set, saving the user only writes loaded fields.
+    user = User.from_db(router.db_for_read(User), USER_FIELDS, user_values)
+    token = model.from_db(router.db_for_read(model), ("key", "user_id", "created"), (key, user.pk, created))
+    token.user = user
+    return token
+
+
+def stats():
+    """
+    Hit counters for this worker process.
+    """
+    lookups = sum(_stats.values())
+    hits = _stats["local_hits"] + _stats["shared_hits"]
+    return {**_stats, "hit_rate": hits / lookups if lookups else 0.0}
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for ``TokenAuthentication`` that serves repeat
+    requests without querying ``authtoken_token`` and ``auth_user``.
+    """
+
+    def authenticate_credentials(self, key):
+        # Read the epoch first: a revocation after this point bumps it, so an
+        # entry stored below is never honoured past that revocation.
+        epoch = current_epoch()
+        local_cache = get_local_cache()
+        token = local_cache.get(key, epoch)
+        if token is not None:
+            _stats["local_hits"] += 1
+        else:
+            model = self.get_model()
+            entry = cache.get(shared_key(key))
+            if entry is not None:
+                _stats["shared_hits"] += 1
+                token = load(model, entry)
+            else:
+                _stats["misses"] += 1
+                try:
+                    token = model.objects.select_related("user").get(key=key)
+                except model.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_("Invalid token."))
+                cache.set(shared_key(key), dump(token), settings.TOKEN_CACHE_TIMEOUT)
+            local_cache.set(key, token, epoch)
+
+        return self.check_token(token)
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate`` for async views on a plain Django request.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. No credentials provided."))
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(_("Invalid token header. Token string should not contain spaces."))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain invalid characters.")
+            )
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """
+        ``authenticate_credentials`` that awaits the shared cache and the
+        database instead of blocking on them.
+        """
+        epoch = await acurrent_epoch()
+        local_cache = get_local_cache()
+        token = local_cache.get(key, epoch)
+        if token is not None:
+            _stats["local_hits"] += 1
+        else:
+            model = self.get_model()
+            entry = await cache.aget(shared_key(key))
+            if entry is not None:
+                _stats["shared_hits"] += 1
+                token = load(model, entry)
+            else:
+                _stats["misses"] += 1
+                try:
+                    token = await model.objects.select_related("user").aget(key=key)
+                except model.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_("Invalid token."))
+                await cache.aset(shared_key(key), dump(token), settings.TOKEN_CACHE_TIMEOUT)
+            local_cache.set(key, token, epoch)
+
+        return self.check_token(token)
+
+    def check_token(self, token):
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        return (token.user, token)
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticate with email and password using one indexed query.
+
+    The user's API token is joined in the same query so the login endpoint
+    can hand it out without another lookup. Like AllowAllUsersModelBackend,
+    inactive users are returned when the password matches so callers can
+    tell "not verified yet" apart from bad credentials; sessions for them
+    are still refused by get_user().
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related("auth_token").get(email=email)
+        except (UserModel.DoesNotExist, UserModel.MultipleObjectsReturned):
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password):
+            return user
+        return None
@@ -0,0 +1,175 @@
+"""
+Helpers shared by the benchmark management commands: deterministic corpus
+generators, the endpoint catalogue with its query budgets, and latency
+summaries.
+"""
+import math
+import random
+import time
+from collections import namedtuple
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db.models import Max
+
+from .models import Comment, Post, excerpt_fields
+
+SEED_PASSWORD = "benchmark"
+
+WORDS = (
+    "about account action api application archive article async author backend "
+    "batch benchmark blog browser cache celery client cluster code comment "
+    "community connection content cursor data database debug deploy design "
+    "django document email endpoint error event feature feed field filter "
+    "framework guide history index insight install integration journal latency "
+    "layout library limit list log login memory message metric migration mobile "
+    "model network news notification object offline open page performance "
+    "permission pipeline plugin post postgres private profile python query "
+    "queue reader redis release request response review router scale schema "
+    "search security server session settings signal snapshot sql storage story "
+    "stream style summary support system table task team test thread timeline "
+    "token travel tutorial update upload user version view worker workflow"
+).split()
+
+
+def random_text(rng, word_count):
+    return " ".join(rng.choice(WORDS) for _ in range(word_count))
+
+
+def random_post(rng, content_words=150, **kwargs):
+    """
+    An unsaved post with pseudo-random text; roughly one in ten is private.
+    """
+    title = random_text(rng, 8).capitalize()
+    content = random_text(rng, content_words)
+    return Post(title=title, content=content, is_private=rng.random() < 0.1, **excerpt_fields(content), **kwargs)
+
+
+def seed_posts(author, count, batch_size=1000, content_words=150, seed=0):
+    """
+    Bulk-insert ``count`` posts with reproducible pseudo-random text. Returns
+    the number of rows written.
+    """
+    rng = random.Random(seed)
+    written = 0
+    while written < count:
+        size = min(batch_size, count - written)
+        Post.objects.bulk_create(random_post(rng, content_words, author=author) for _ in range(size))
+        written += size
+    return written
+
+
+def _batches(count, batch_size):
+    written = 0
+    while written < count:
+        size = min(batch_size, count - written)
+        yield size
+        written += size
+
+
+def seed_blog(users, posts, comments, batch_size=5000, seed=0):
+    """
+    Bulk-insert ``users`` users, ``posts`` posts spread across them and
+    ``comments`` comments spread across the public posts, then recount
+    ``comments_count``. Every user's password is ``SEED_PASSWORD``. Returns
+    the number of rows written per model.
+    """
+    rng = random.Random(seed)
+    # Hashing is deliberately slow, so every seeded user shares one hash.
+    password = make_password(SEED_PASSWORD)
+    first = (User.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+    for size in _batches(users, batch_size):
+        User.objects.bulk_create(
+            User(username=f"seed{first + n}", email=f"seed{first + n}@example.com", password=password)
+            for n in range(size)
+        )
+        first += size
+
+    user_ids = list(User.objects.values_list("id", flat=True))
+    for size in _batches(posts, batch_size):
+        Post.objects.bulk_create(random_post(rng, author_id=rng.choice(user_ids)) for _ in range(size))
+
+    post_ids = list(Post.objects.filter(is_private=False).values_list("id", flat=True))
+    for size in _batches(comments if post_ids else 0, batch_size):
+        Comment.objects.bulk_create(
+            Comment(
+                post_id=rng.choice(post_ids),
+                commenter_id=rng.choice(user_ids),
+                comment_text=random_text(rng, 20),
+            )
+            for _ in range(size)
+        )
+
+    last_id = Post.objects.aggregate(last=Max("id"))["last"] or 0
+    for start in range(0, last_id + 1, batch_size):
+        Post.objects.filter(id__gte=start, id__lt=start + batch_size).recount_comments()
+    return {"users": users, "posts": posts, "comments": comments if post_ids else 0}
+
+
+# Read endpoints from blog/urls.py and the most SQL queries each may issue
+# with a warm token cache and the response cache disabled. The budgets do not
+# depend on how many rows a page holds; tests/test_query_budgets.py checks
+# both at one row and at a full page. The post list spends one query on
+# whether the user has private posts, which picks its cache key.
+Endpoint = namedtuple("Endpoint", ["path", "budget"])
+
+ENDPOINTS = {
+    "post-list": Endpoint("/api/posts/", 3),
+    "post-list-cursor": Endpoint("/api/posts/?pagination=cursor", 2),
+    "post-list-fields": Endpoint("/api/posts/?fields=id,title,author", 3),
+    "post-list-include-comments": Endpoint("/api/posts/?include_comments=3", 4),
+    "post-detail": Endpoint("/api/posts/{post}/", 1),
+    "post-comments": Endpoint("/api/posts/{post}/comments/", 3),
+    "post-search": Endpoint("/api/posts/search/?q=database", 2),
+    "post-export": Endpoint("/api/posts/export/", 1),
+    "comment-list": Endpoint("/api/comments/", 2),
+    "comment-detail": Endpoint("/api/comments/{comment}/", 1),
+    "comment-export": Endpoint("/api/comments/export/", 1),
+    "async-post-list": Endpoint("/api/async/posts/", 2),
+    "async-post-detail": Endpoint("/api/async/posts/{post}/", 1),
+    "async-comment-list": Endpoint("/api/async/comments/", 2),
+}
+
+
+def endpoint_targets():
+    """
+    Ids substituted into the endpoint paths: the public post with the most
+    comments and its latest comment, so detail endpoints do real work.
+    """
+    post = Post.objects.filter(is_private=False).order_by("-comments_count", "-id").first()
+    comment = Comment.objects.filter(post=post).order_by("-id").first() if post else None
+    return {"post": post.pk if post else 0, "comment": comment.pk if comment else 0}
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(samples):
+    """
+    Summarize latency samples given in milliseconds.
+    """
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50),
+        "p95_ms": percentile(ordered, 95),
+        "p99_ms": percentile(ordered, 99),
+        "max_ms": ordered[-1] if ordered else 0.0,
+    }
+
+
+def time_call(func, repeat):
+    """
+    Call ``func`` ``repeat`` times and return the summary of its latencies.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
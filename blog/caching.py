@@ -0,0 +1,205 @@
+"""
+Read-through cache for serialized post lists and post details.
+
+Entries are namespaced by visibility scope so that the
+``Post.objects.visible_to(user)`` rule can never leak through the cache:
+
+* ``public`` entries only ever contain public posts and are shared by every
+  user who has no private posts of their own.
+* ``user:<id>`` entries belong to a single author and are used as soon as that
+  author has at least one private post.
+
+Invalidation is done with generation counters rather than key deletion: each
+scope and each post has a counter that is part of every key built from it, so
+bumping the counter orphans exactly the entries that could contain the
+changed post and leaves the rest alone.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import routers
+from .models import Post
+
+KEY_PREFIX = "blog:posts"
+HITS_KEY = f"{KEY_PREFIX}:stats:hits"
+MISSES_KEY = f"{KEY_PREFIX}:stats:misses"
+INVALIDATED_AT_KEY = f"{KEY_PREFIX}:invalidated_at"
+
+
+def _public_generation_key():
+    return f"{KEY_PREFIX}:gen:public"
+
+
+def _user_generation_key(user_id):
+    return f"{KEY_PREFIX}:gen:user:{user_id}"
+
+
+def _post_generation_key(post_id):
+    return f"{KEY_PREFIX}:gen:post:{post_id}"
+
+
+def _has_private_key(user_id):
+    return f"{KEY_PREFIX}:has_private:{user_id}"
+
+
+def _request_digest(request):
+    url = request.build_absolute_uri(request.path)
+    params = sorted(request.query_params.lists())
+    return hashlib.md5(f"{url}?{params}".encode(), usedforsecurity=False).hexdigest()
+
+
+def _initial_generation():
+    # Seeding from the clock means a generation that was evicted never comes
+    # back with a value an older entry was stored under.
+    return time.time_ns()
+
+
+def _get_generations(keys):
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _initial_generation(), None)
+            generations[key] = cache.get(key)
+    return generations
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_generation(), None)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def get_cached(key):
+    data = cache.get(key)
+    _count(HITS_KEY if data is not None else MISSES_KEY)
+    return data
+
+
+def store(key, data):
+    if routers.replica_reads_allowed():
+        # Shortly after a write, a replica may still return the old rows;
+        # caching them under the new generation would serve them to everyone.
+        invalidated_at = cache.get(INVALIDATED_AT_KEY)
+        if invalidated_at and time.time() - invalidated_at < settings.REPLICA_STICKY_SECONDS:
+            return
+    cache.set(key, data, settings.POSTS_CACHE_TIMEOUT)
+
+
+def list_key(request):
+    """
+    Return the cache key for a post list request made by ``request.user``.
+    """
+    user_id = request.user.pk
+    public_key = _public_generation_key()
+    user_key = _user_generation_key(user_id)
+    flag_key = _has_private_key(user_id)
+
+    values = cache.get_many([public_key, user_key, flag_key])
+    has_private = values.get(flag_key)
+    if has_private is None:
+        has_private = Post.objects.filter(author_id=user_id, is_private=True).exists()
+        cache.set(flag_key, has_private, settings.POSTS_CACHE_TIMEOUT)
+
+    digest = _request_digest(request)
+    if not has_private:
+        generations = _get_generations([public_key])
+        return f"{KEY_PREFIX}:list:public:{generations[public_key]}:{digest}"
+
+    generations = _get_generations([public_key, user_key])
+    return (
+        f"{KEY_PREFIX}:list:user:{user_id}:"
+        f"{generations[public_key]}.{generations[user_key]}:{digest}"
+    )
+
+
+def detail_keys(request, pk):
+    """
+    Return the ``(public_key, private_key)`` pair a post detail may be cached
+    under. The private key is specific to the requesting user, so only the
+    author can ever hit it.
+    """
+    generation_key = _post_generation_key(pk)
+    generation = _get_generations([generation_key])[generation_key]
+    base = f"{KEY_PREFIX}:detail:{pk}:{generation}:{_request_digest(request)}"
+    return f"{base}:public", f"{base}:user:{request.user.pk}"
+
+
+def get_detail(request, pk):
+    """
+    Return ``(data, public_key, private_key)`` for a post detail request;
+    ``data`` is None on a miss.
+    """
+    public_key, private_key = detail_keys(request, pk)
+    values = cache.get_many([public_key, private_key])
+    data = values.get(public_key, values.get(private_key))
+    _count(HITS_KEY if data is not None else MISSES_KEY)
+    return data, public_key, private_key
+
+
+def invalidate_post(post, was_public=False):
+    """
+    Drop every cached list and detail that may contain ``post``.
+
+    Pass ``was_public=True`` when an update just made a public post private,
+    so the public entries that still show it are dropped too. Runs once the
+    surrounding transaction commits so readers cannot re-cache old rows.
+    """
+    invalidate_posts([post], was_public=was_public)
+
+
+def invalidate_posts(posts, was_public=False):
+    """
+    Like ``invalidate_post`` for many posts, bumping each shared scope once.
+    """
+    post_ids = {post.pk for post in posts}
+    author_ids = {post.author_id for post in posts}
+    touches_public = was_public or any(not post.is_private for post in posts)
+    _invalidate(post_ids, author_ids, touches_public)
+
+
+def invalidate_authors(author_ids, touches_public=True, post_ids=()):
+    """
+    Drop the cached lists of ``author_ids`` and, if ``touches_public``, the
+    public lists. For posts inserted in bulk, which have no cached details yet,
+    or changed by a queryset update, whose ``post_ids`` lose their details.
+    """
+    _invalidate(set(post_ids), set(author_ids), touches_public)
+
+
+def _invalidate(post_ids, author_ids, touches_public):
+    def bump():
+        for post_id in post_ids:
+            _bump(_post_generation_key(post_id))
+        for author_id in author_ids:
+            _bump(_user_generation_key(author_id))
+        cache.delete_many([_has_private_key(author_id) for author_id in author_ids])
+        if touches_public:
+            _bump(_public_generation_key())
+        cache.set(INVALIDATED_AT_KEY, time.time(), None)
+
+    transaction.on_commit(bump)
+
+
+def stats():
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
@@ -0,0 +1,84 @@
+"""
+Conditional GET support for the read endpoints.
+
+Validators are built from columns the list and detail queries already load
+(id, updated_at, comments_count), so a matching ``If-None-Match`` is answered
+with 304 Not Modified before the serializer runs.
+
+Responses carry no ``Last-Modified``: bodies include counters and related
+rows that change without touching the row's ``updated_at``, and one-second
+resolution would hide changes made within the second anyway.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+
+def make_etag(request, parts):
+    """
+    Return a strong ETag for ``parts`` as seen through ``request``'s URL, so
+    the same rows rendered with different query parameters never share one.
+    """
+    payload = repr((request.get_full_path(), parts)).encode()
+    return '"%s"' % hashlib.md5(payload, usedforsecurity=False).hexdigest()
+
+
+def not_modified(request, etag):
+    """
+    Return a 304 response carrying the ETag when the request's preconditions
+    match it, otherwise None.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        set_validators(response, etag)
+    return response
+
+
+def set_validators(response, etag):
+    response["ETag"] = etag
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ``list`` and ``retrieve`` for ModelViewSets that honour conditional GETs.
+
+    Views implement ``get_validator_parts(instance)`` returning a tuple that
+    changes whenever the instance's representation does.
+    """
+
+    def get_validator_parts(self, instance):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+
+        parts = [self.get_validator_parts(row) for row in rows]
+        if page is not None and hasattr(self.paginator, "get_page_signature"):
+            parts.append(self.paginator.get_page_signature())
+        etag = make_etag(request, parts)
+
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(rows, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+        return set_validators(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = make_etag(request, self.get_validator_parts(instance))
+
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), etag)
@@ -0,0 +1,110 @@
+"""
+Deferred deletion of posts and user accounts.
+
+Deleting a post with many comments, or a user with many posts and comments,
+in one request would hold a long transaction. Instead the root is hidden at
+once (``Post.deleted_at``, or a deactivated user with a ``UserDeletion`` row)
+and the ``purge_deleted`` task removes the children later, at most
+``DELETE_BATCH_SIZE`` rows per transaction.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, tasks
+from .models import Comment, Post, UserDeletion
+
+
+def delete_posts(posts):
+    """
+    Hide ``posts`` from every read path now and purge them, with their
+    comments, in the background.
+    """
+    posts = list(posts)
+    Post.objects.filter(pk__in=[post.pk for post in posts]).update(deleted_at=timezone.now())
+    caching.invalidate_posts(posts)
+    transaction.on_commit(tasks.schedule_purge_deleted)
+
+
+@transaction.atomic
+def delete_users(users):
+    """
+    Deactivate ``users`` (which revokes their tokens), hide their posts and
+    purge everything they own in the background.
+    """
+    for user in users:
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        UserDeletion.objects.get_or_create(user=user)
+        posts = Post.objects.filter(author=user)
+        post_ids = list(posts.values_list("pk", flat=True))
+        touches_public = posts.filter(is_private=False).exists()
+        posts.update(deleted_at=timezone.now())
+        caching.invalidate_authors([user.pk], touches_public, post_ids)
+    transaction.on_commit(tasks.schedule_purge_deleted)
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """
+    Delete the rows of ``queryset`` ``batch_size`` at a time, each batch in
+    its own transaction. Returns the number of rows deleted.
+    """
+    batch_size = batch_size or settings.DELETE_BATCH_SIZE
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            queryset.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+
+def purge_posts(posts=None, batch_size=None):
+    """
+    Remove deleted posts (or all of ``posts``) and their comments. Returns
+    the number of posts removed.
+    """
+    if posts is None:
+        posts = Post.all_objects.filter(deleted_at__isnull=False)
+    purged = 0
+    for post_id in list(posts.order_by("pk").values_list("pk", flat=True)):
+        delete_in_batches(Comment.objects.filter(post_id=post_id), batch_size)
+        with transaction.atomic():
+            Post.all_objects.filter(pk=post_id).delete()
+        purged += 1
+    return purged
+
+
+def purge_comments_of(user, batch_size=None):
+    """
+    Remove ``user``'s comments on other people's posts in batches, keeping
+    those posts' comment counts and cached copies right.
+    """
+    batch_size = batch_size or settings.DELETE_BATCH_SIZE
+    comments = Comment.objects.filter(commenter=user).order_by()
+    while True:
+        with transaction.atomic():
+            batch = list(comments.values_list("pk", "post_id")[:batch_size])
+            if not batch:
+                return
+            Comment.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+            posts = Post.objects.filter(pk__in={post_id for _, post_id in batch})
+            posts.recount_comments()
+            caching.invalidate_posts(posts.only("id", "author_id", "is_private"))
+
+
+def purge_users(batch_size=None):
+    """
+    Remove the accounts whose deletion was requested, after their comments
+    and posts. Returns the number of users removed.
+    """
+    purged = 0
+    for deletion in UserDeletion.objects.select_related("user").order_by("pk"):
+        user = deletion.user
+        purge_comments_of(user, batch_size)
+        purge_posts(Post.all_objects.filter(author=user), batch_size)
+        with transaction.atomic():
+            user.delete()
+        purged += 1
+    return purged
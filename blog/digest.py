@@ -0,0 +1,44 @@
+"""
+Pending comment notifications for the periodic digest task.
+
+Each notification is a PendingNotification row inserted in the same
+transaction as its comment, so queueing one is a single append that commits
+or rolls back with the comment and never contends with other writers.
+``pop_all`` claims the rows with SELECT ... FOR UPDATE SKIP LOCKED and
+deletes them, so concurrent flushes never send the same comment twice.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import Comment, PendingNotification
+
+
+def add(comments):
+    """
+    Queue notifications about ``comments``; call inside the transaction
+    that creates them.
+    """
+    PendingNotification.objects.bulk_create(PendingNotification(comment=comment) for comment in comments)
+
+
+def pop_all():
+    """
+    Remove every pending notification and return the comments as
+    ``{author_id: [comment, ...]}``, oldest first.
+    """
+    with transaction.atomic():
+        comment_ids = list(
+            PendingNotification.objects.select_for_update(skip_locked=True)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        PendingNotification.objects.filter(pk__in=comment_ids).delete()
+
+    comments = Comment.objects.select_related("post", "post__author", "commenter").in_bulk(comment_ids)
+    pending = defaultdict(list)
+    for comment_id in comment_ids:
+        if comment_id in comments:
+            comment = comments[comment_id]
+            pending[comment.post.author_id].append(comment)
+    return dict(pending)
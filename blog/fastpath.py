@@ -0,0 +1,253 @@
+"""
+Read-only fast path for the list and retrieve actions.
+
+A DRF serializer walks its field objects for every row it renders. Here a
+serializer's fields are walked once instead, into a ``Plan`` that records
+which ``values_list()`` column feeds each output key and whether the value
+needs the field's ``to_representation`` at all. Views then fetch plain tuples
+and build the same dicts the serializer would have produced, nested
+``author``/``commenter`` objects included.
+
+Serializers that a plan cannot express (method fields, nested lists, sources
+that are not model columns) keep going through DRF.
+"""
+from functools import cached_property, lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.query import ValuesListIterable
+from rest_framework import serializers
+
+from .fieldsets import SparseFieldsetMixin, selected_fields
+
+# Fields whose to_representation() returns the database value unchanged.
+PASSTHROUGH_FIELDS = (serializers.BooleanField, serializers.CharField, serializers.IntegerField)
+
+
+class Unsupported(Exception):
+    pass
+
+
+class Row(tuple):
+    """
+    A ``values_list()`` tuple whose columns can also be read as attributes,
+    so pagination and ETag code written for model instances works on it.
+    ``row.post.updated_at`` reads the ``post__updated_at`` column.
+    """
+
+    __slots__ = ()
+    columns = {}
+    relations = frozenset()
+
+    def __getattr__(self, name):
+        return _lookup(self, name)
+
+
+class _Related:
+    __slots__ = ("_row", "_prefix")
+
+    def __init__(self, row, prefix):
+        self._row = row
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        return _lookup(self._row, self._prefix + name)
+
+
+def _lookup(row, name):
+    # Like on a model instance, ``row.post`` is the related object whenever
+    # any of its columns were fetched; the bare id stays under ``post_id``.
+    if name in row.relations:
+        return _Related(row, f"{name}__")
+    try:
+        return row[row.columns[name]]
+    except KeyError:
+        raise AttributeError(name) from None
+
+
+class RowIterable(ValuesListIterable):
+    row_class = Row
+
+    def __iter__(self):
+        return map(self.row_class, super().__iter__())
+
+
+class Plan:
+    """
+    Compiled form of a serializer: the columns to fetch and the steps that
+    turn one row of them into the serializer's output.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = {}
+        self.lookups = []
+        self.steps = []
+
+    def add_column(self, lookup):
+        """
+        Fetch ``lookup`` (``"pk"`` allowed) and return its index in a row.
+        """
+        if lookup not in self.columns:
+            target = self.model._meta.pk.name if lookup == "pk" else lookup
+            if target not in self.columns:
+                _check_lookup(self.model, target)
+                self.columns[target] = len(self.lookups)
+                self.lookups.append(target)
+            self.columns[lookup] = self.columns[target]
+        return self.columns[lookup]
+
+    @cached_property
+    def iterable_class(self):
+        relations = set()
+        for lookup in self.columns:
+            parts = lookup.split("__")
+            relations.update("__".join(parts[:i]) for i in range(1, len(parts)))
+        row_class = type(
+            f"{self.model.__name__}Row",
+            (Row,),
+            {"__slots__": (), "columns": self.columns, "relations": frozenset(relations)},
+        )
+        return type(f"{self.model.__name__}RowIterable", (RowIterable,), {"row_class": row_class})
+
+    def apply(self, queryset):
+        """
+        Turn ``queryset`` into one yielding ``Row`` objects for this plan.
+        """
+        queryset = queryset.values_list(*self.lookups)
+        queryset._iterable_class = self.iterable_class
+        return queryset
+
+    def represent(self, row):
+        return _represent(self.steps, row)
+
+
+class PlanSerializer:
+    """
+    Stands in for the view's serializer when rendering fast-path rows.
+    """
+
+    def __init__(self, plan, instance, many=False):
+        self.plan = plan
+        self.instance = instance
+        self.many = many
+
+    @cached_property
+    def data(self):
+        if self.many:
+            return [self.plan.represent(row) for row in self.instance]
+        return self.plan.represent(self.instance)
+
+
+def _represent(steps, row):
+    data = {}
+    for name, index, convert, children in steps:
+        value = row[index]
+        if children is not None:
+            data[name] = None if value is None else _represent(children, row)
+        elif value is None or convert is None:
+            data[name] = value
+        else:
+            data[name] = convert(value)
+    return data
+
+
+def _check_lookup(model, lookup):
+    for part in lookup.split("__"):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            raise Unsupported(lookup)
+        if field.many_to_many or field.one_to_many:
+            raise Unsupported(lookup)
+        if field.is_relation:
+            model = field.related_model
+        elif not field.concrete:
+            raise Unsupported(lookup)
+
+
+def _readable(fields):
+    return [field for field in fields if not field.write_only]
+
+
+def _compile(plan, fields, prefix=""):
+    steps = []
+    for field in fields:
+        if field.source == "*":
+            raise Unsupported(field.field_name)
+        if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            raise Unsupported(field.field_name)
+        lookup = prefix + "__".join(field.source_attrs)
+        if isinstance(field, serializers.BaseSerializer):
+            children = _compile(plan, _readable(field.fields.values()), prefix=f"{lookup}__")
+            steps.append((field.field_name, plan.add_column(lookup), None, children))
+            continue
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # The column already holds the related primary key.
+            convert = None if field.pk_field is None else field.pk_field.to_representation
+        elif isinstance(field, serializers.RelatedField):
+            raise Unsupported(field.field_name)
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            convert = None
+        else:
+            convert = field.to_representation
+        steps.append((field.field_name, plan.add_column(lookup), convert, None))
+    return steps
+
+
+@lru_cache(maxsize=128)
+def get_plan(serializer_class, selected, extra_columns=()):
+    """
+    Return the ``Plan`` for ``serializer_class`` limited to the ``selected``
+    field names, also fetching ``extra_columns``; None if it cannot be built.
+    """
+    serializer = serializer_class()
+    plan = Plan(serializer_class.Meta.model)
+    fields = [field for name, field in serializer.fields.items() if name in selected]
+    try:
+        plan.steps = _compile(plan, _readable(fields))
+        for lookup in extra_columns:
+            plan.add_column(lookup)
+    except Unsupported:
+        return None
+    return plan
+
+
+class FastReadMixin:
+    """
+    Serve ``list`` and ``retrieve`` from ``values_list()`` rows whenever the
+    view's serializer compiles into a ``Plan``.
+
+    ``fast_read_columns`` names the extra lookups the view reads from rows
+    itself (permission checks, ETag parts, pagination positions).
+    """
+
+    fast_read_actions = ("list", "retrieve")
+    fast_read_columns = ()
+
+    def get_fast_plan(self):
+        if not hasattr(self, "_fast_plan"):
+            self._fast_plan = None
+            if (
+                settings.FAST_READ_PATH
+                and self.action in self.fast_read_actions
+                and self.request.method in ("GET", "HEAD")
+            ):
+                serializer_class = self.get_serializer_class()
+                selected = serializer_class.Meta.fields
+                if issubclass(serializer_class, SparseFieldsetMixin):
+                    selected = selected_fields(self.request, selected)
+                self._fast_plan = get_plan(serializer_class, frozenset(selected), tuple(self.fast_read_columns))
+        return self._fast_plan
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        plan = self.get_fast_plan()
+        return queryset if plan is None else plan.apply(queryset)
+
+    def get_serializer(self, *args, **kwargs):
+        plan = self.get_fast_plan()
+        if plan is None:
+            return super().get_serializer(*args, **kwargs)
+        return PlanSerializer(plan, *args, many=kwargs.get("many", False))
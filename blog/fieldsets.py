@@ -0,0 +1,55 @@
+"""
+Sparse fieldsets for read endpoints.
+
+``?fields=a,b`` keeps only the listed fields of a GET response and
+``?omit=a,b`` drops fields from it. Serializers opt in through
+``SparseFieldsetMixin``; views read the same selection with
+``selected_fields`` to defer columns and skip joins nobody will render.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _split(value):
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def selected_fields(request, available):
+    """
+    Return the names from ``available`` that ``request`` asks for. Writes
+    always get every field; unknown names are rejected with a 400.
+    """
+    available = set(available)
+    if request is None or request.method not in SAFE_METHODS:
+        return available
+
+    # Plain Django requests (the async views) have no query_params.
+    params = request.GET
+    requested = _split(params.get("fields", ""))
+    omitted = _split(params.get("omit", ""))
+    unknown = (requested | omitted) - available
+    if unknown:
+        raise ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}."})
+
+    selected = requested or available
+    return selected - omitted
+
+
+class SparseFieldsetMixin:
+    """
+    Drop the fields not selected by the request's ``fields``/``omit``
+    parameters. Only the top-level serializer of a response is pruned;
+    nested serializers always render in full.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+
+        selected = selected_fields(self.context.get("request"), fields)
+        return {name: field for name, field in fields.items() if name in selected}
@@ -0,0 +1,413 @@
+"""
+Bulk loading of users, posts and comments from JSONL or CSV.
+
+Input is read as a stream and handled a chunk of records at a time: the
+users and posts a chunk refers to are resolved with one query each, then the
+chunk is written with ``COPY ... FROM STDIN`` on PostgreSQL or
+``bulk_create`` elsewhere. Work that would otherwise happen per row
+(``comments_count``, cache invalidation) is done once, after the last chunk.
+Offline imports also build the search vectors and their GIN index once at
+the end instead of per row, at the price of locking ``blog_post``.
+
+Records use the export format, so ``export_blog`` output can be loaded back:
+authors and commenters are given as ``{"email": ...}`` objects (or flat
+``author_email``/``commenter_email`` columns in CSV), comments name their
+post by id.
+"""
+import csv
+import io
+import json
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from . import caching
+from .exporting import parse_timestamp
+from .models import SEARCH_CONFIG, Comment, Post
+
+FORMATS = ("jsonl", "csv")
+
+SEARCH_TRIGGER = "blog_post_search_vector_trigger"
+SEARCH_INDEX = "blog_post_search_vector_gin"
+SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'B')"
+)
+
+TRUE_VALUES = {"1", "t", "true", "y", "yes"}
+FALSE_VALUES = {"", "0", "f", "false", "n", "no"}
+
+
+def read_records(stream, fmt):
+    """
+    Yield ``(line_number, record)`` for each record in a text stream. Lines
+    that are not valid JSON yield a None record.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def _bool(value, default=False):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"Invalid boolean: {value!r}")
+
+
+def _timestamp(value):
+    return parse_timestamp(value) if value else None
+
+
+def _email(record, key):
+    value = record.get(key)
+    if isinstance(value, dict):
+        value = value.get("email")
+    return value or record.get(f"{key}_email") or None
+
+
+def _text(record, key, field, required=True):
+    value = str(record.get(key) or "")
+    if required and not value:
+        raise ValueError(f"{key} is required")
+    if field.max_length and len(value) > field.max_length:
+        raise ValueError(f"{key} is longer than {field.max_length} characters")
+    return value
+
+
+def _copy_value(value):
+    # COPY text format: \N is NULL, and backslashes, tabs and newlines are escaped.
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class Importer:
+    """
+    Loads chunks of records into ``model``. Subclasses turn records into
+    unsaved instances in ``build`` and may defer work to ``begin``/``finish``.
+    """
+
+    model = None
+    fields = ()
+
+    def __init__(self, keep_ids=False, offline=False, using=DEFAULT_DB_ALIAS):
+        self.keep_ids = keep_ids
+        self.offline = offline
+        self.using = using
+        self.connection = connections[using]
+        self.use_copy = self.connection.vendor == "postgresql"
+        self.imported = 0
+        self.errors = []
+        self.user_ids = {}
+
+    def build(self, instances):
+        """
+        Resolve references for a chunk of ``(line_number, instance)`` pairs
+        with batched queries. Return the instances that can be written and
+        add ``(line_number, message)`` to ``errors`` for the rest.
+        """
+        raise NotImplementedError
+
+    def build_instance(self, record):
+        """
+        Return an unsaved instance for one record; raise ValueError if the
+        record is invalid on its own.
+        """
+        instance = self.model()
+        if self.keep_ids:
+            if not record.get("id"):
+                raise ValueError("id is required with --keep-ids")
+            instance.pk = int(record["id"])
+        return instance
+
+    def begin(self):
+        pass
+
+    def finish(self):
+        if self.keep_ids:
+            # Explicit ids leave the sequence behind the table on PostgreSQL.
+            statements = self.connection.ops.sequence_reset_sql(no_style(), [self.model])
+            with self.connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+    def load(self, records):
+        instances = []
+        for line_number, record in records:
+            if record is None:
+                self.errors.append((line_number, "not a JSON object"))
+                continue
+            try:
+                instances.append((line_number, self.build_instance(record)))
+            except (TypeError, ValueError) as exc:
+                self.errors.append((line_number, str(exc)))
+        instances = self.build(instances)
+        if instances:
+            if self.use_copy:
+                self.copy(instances)
+            else:
+                self.bulk_create(instances)
+        self.imported += len(instances)
+
+    def copy_fields(self):
+        names = ["id", *self.fields] if self.keep_ids else self.fields
+        return [self.model._meta.get_field(name) for name in names]
+
+    def copy(self, instances):
+        fields = self.copy_fields()
+        now = timezone.now()
+        lines = []
+        for instance in instances:
+            values = []
+            for field in fields:
+                value = getattr(instance, field.attname)
+                if value is None and (getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)):
+                    value = now
+                values.append(_copy_value(field.get_db_prep_save(value, self.connection)))
+            lines.append("\t".join(values))
+        data = "\n".join(lines) + "\n"
+
+        quote = self.connection.ops.quote_name
+        columns = ", ".join(quote(field.column) for field in fields)
+        sql = f"COPY {quote(self.model._meta.db_table)} ({columns}) FROM STDIN"
+        with self.connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):
+                # psycopg2
+                raw.copy_expert(sql, io.StringIO(data))
+            else:
+                # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(data)
+
+    def bulk_create(self, instances):
+        # bulk_create() stamps auto_now/auto_now_add fields with the current
+        # time, so timestamps given in the input are written back afterwards.
+        stamped = [
+            field for field in self.model._meta.concrete_fields
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+        ]
+        given = [[getattr(instance, field.attname) for field in stamped] for instance in instances]
+        self.model._default_manager.using(self.using).bulk_create(instances)
+
+        restored = []
+        for instance, values in zip(instances, given):
+            if any(value is not None for value in values):
+                for field, value in zip(stamped, values):
+                    if value is not None:
+                        setattr(instance, field.attname, value)
+                restored.append(instance)
+        if restored and all(instance.pk is not None for instance in restored):
+            self.model._default_manager.using(self.using).bulk_update(restored, [field.name for field in stamped])
+
+    def resolve_emails(self, emails):
+        """
+        Map each of ``emails`` to a user id with one query, caching results
+        across chunks. Emails shared by several users map to None.
+        """
+        missing = set(emails) - self.user_ids.keys()
+        if missing:
+            found = {}
+            for email, pk in User.objects.using(self.using).filter(email__in=missing).values_list("email", "pk"):
+                found[email] = None if email in found else pk
+            for email in missing:
+                self.user_ids[email] = found.get(email, 0)
+        return {email: self.user_ids[email] for email in emails}
+
+    def user_id(self, users, email, key):
+        if not email:
+            raise ValueError(f"{key} email is required")
+        user_id = users[email]
+        if user_id is None:
+            raise ValueError(f"{key} email {email!r} matches several users")
+        if not user_id:
+            raise ValueError(f"no user with email {email!r}")
+        return user_id
+
+
+class UserImporter(Importer):
+    """
+    Passwords must already be hashed by a Django password hasher (as in a
+    dump of ``auth_user``); users without one get an unusable password.
+    """
+
+    model = User
+    fields = (
+        "username", "email", "first_name", "last_name", "password",
+        "is_staff", "is_superuser", "is_active", "date_joined",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.usernames = set()
+
+    def build_instance(self, record):
+        user = super().build_instance(record)
+        opts = User._meta
+        user.username = _text(record, "username", opts.get_field("username"))
+        user.email = _text(record, "email", opts.get_field("email"), required=False)
+        user.first_name = _text(record, "first_name", opts.get_field("first_name"), required=False)
+        user.last_name = _text(record, "last_name", opts.get_field("last_name"), required=False)
+        user.is_active = _bool(record.get("is_active"), default=True)
+        user.date_joined = _timestamp(record.get("date_joined")) or user.date_joined
+
+        password = record.get("password")
+        if password:
+            identify_hasher(password)
+            user.password = password
+        else:
+            user.password = make_password(None)
+        return user
+
+    def build(self, instances):
+        names = [user.username for _, user in instances]
+        existing = set(
+            User.objects.using(self.using).filter(username__in=names).values_list("username", flat=True)
+        )
+        users = []
+        for line_number, user in instances:
+            if user.username in existing or user.username in self.usernames:
+                self.errors.append((line_number, f"username {user.username!r} already exists"))
+                continue
+            self.usernames.add(user.username)
+            users.append(user)
+        return users
+
+
+class PostImporter(Importer):
+    model = Post
+    fields = (
+        "title", "content", "excerpt", "word_count", "author", "is_private", "comments_count",
+        "created_at", "updated_at",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.author_ids = set()
+        self.touches_public = False
+
+    def build_instance(self, record):
+        post = super().build_instance(record)
+        opts = Post._meta
+        post.title = _text(record, "title", opts.get_field("title"))
+        post.content = _text(record, "content", opts.get_field("content"), required=False)
+        post.refresh_excerpt()
+        post.is_private = _bool(record.get("is_private"))
+        post.created_at = _timestamp(record.get("created_at"))
+        post.updated_at = _timestamp(record.get("updated_at"))
+        post.author_email = _email(record, "author")
+        return post
+
+    def build(self, instances):
+        users = self.resolve_emails({post.author_email for _, post in instances if post.author_email})
+        posts = []
+        for line_number, post in instances:
+            try:
+                post.author_id = self.user_id(users, post.author_email, "author")
+            except ValueError as exc:
+                self.errors.append((line_number, str(exc)))
+                continue
+            self.author_ids.add(post.author_id)
+            self.touches_public = self.touches_public or not post.is_private
+            posts.append(post)
+        return posts
+
+    def begin(self):
+        if self.use_copy and self.offline:
+            # Building the tsvectors and the GIN index once at the end is far
+            # cheaper than maintaining them row by row, but DROP INDEX holds an
+            # ACCESS EXCLUSIVE lock on blog_post, blocking every read of it,
+            # until the import commits. Both statements are transactional, so
+            # a failed import leaves them in place.
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE blog_post DISABLE TRIGGER {SEARCH_TRIGGER}")
+                cursor.execute(f"DROP INDEX IF EXISTS {SEARCH_INDEX}")
+
+    def finish(self):
+        super().finish()
+        if self.use_copy and self.offline:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"UPDATE blog_post SET search_vector = {SEARCH_VECTOR_SQL} WHERE search_vector IS NULL")
+                cursor.execute(f"CREATE INDEX {SEARCH_INDEX} ON blog_post USING gin (search_vector)")
+                cursor.execute(f"ALTER TABLE blog_post ENABLE TRIGGER {SEARCH_TRIGGER}")
+        caching.invalidate_authors(self.author_ids, self.touches_public)
+
+
+class CommentImporter(Importer):
+    model = Comment
+    fields = ("post", "comment_text", "commenter", "created_at", "updated_at")
+    recount_batch_size = 5000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.post_ids = set()
+
+    def build_instance(self, record):
+        comment = super().build_instance(record)
+        comment.comment_text = _text(record, "comment_text", Comment._meta.get_field("comment_text"))
+        comment.post_id = int(record.get("post") or record.get("post_id") or 0)
+        if not comment.post_id:
+            raise ValueError("post is required")
+        comment.created_at = _timestamp(record.get("created_at"))
+        comment.updated_at = _timestamp(record.get("updated_at"))
+        comment.commenter_email = _email(record, "commenter")
+        return comment
+
+    def build(self, instances):
+        users = self.resolve_emails({c.commenter_email for _, c in instances if c.commenter_email})
+        post_ids = set(
+            Post.objects.using(self.using)
+            .filter(pk__in={comment.post_id for _, comment in instances})
+            .values_list("pk", flat=True)
+        )
+        comments = []
+        for line_number, comment in instances:
+            try:
+                if comment.post_id not in post_ids:
+                    raise ValueError(f"no post with id {comment.post_id}")
+                comment.commenter_id = self.user_id(users, comment.commenter_email, "commenter")
+            except ValueError as exc:
+                self.errors.append((line_number, str(exc)))
+                continue
+            self.post_ids.add(comment.post_id)
+            comments.append(comment)
+        return comments
+
+    def finish(self):
+        super().finish()
+        post_ids = sorted(self.post_ids)
+        for start in range(0, len(post_ids), self.recount_batch_size):
+            batch = post_ids[start:start + self.recount_batch_size]
+            posts = Post.objects.using(self.using).filter(pk__in=batch)
+            posts.recount_comments()
+            caching.invalidate_posts(posts.only("id", "author_id", "is_private"))
+
+
+IMPORTERS = {
+    "users": UserImporter,
+    "posts": PostImporter,
+    "comments": CommentImporter,
+}
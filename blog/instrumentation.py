@@ -0,0 +1,172 @@
+"""
+Per-request SQL instrumentation.
+
+``QueryRecorder`` is installed with ``connection.execute_wrapper`` on every
+database alias for the duration of a sampled request. It records each
+statement's duration and *shape* (the SQL with literals and IN lists
+collapsed), so the same query run once per row of a page shows up as one
+shape repeated many times: the signature of an N+1.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("blog.sql")
+
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """
+    Normalize ``sql`` so statements differing only in parameters compare
+    equal.
+    """
+    shape = _IN_LIST.sub("(...)", sql)
+    shape = _LITERAL.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class ExecuteWrapper:
+    """
+    Base for ``connection.execute_wrapper`` callables installed on every
+    database alias of the calling thread.
+    """
+
+    _stack = None
+
+    def install(self):
+        """
+        Wrap every connection of the calling thread; undone by ``uninstall``.
+        """
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+
+    def uninstall(self):
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
+
+
+class QueryTimer(ExecuteWrapper):
+    """
+    Only adds up the time spent in SQL, cheap enough for every request.
+    A ``QueryRecorder`` attached to it sees each statement as well, without
+    a second wrapper around every query.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.recorder = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.seconds += duration
+            if self.recorder is not None:
+                self.recorder.record(context["connection"].alias, sql, duration * 1000)
+
+
+class QueryRecorder(ExecuteWrapper):
+    def __init__(self):
+        self.queries = []
+        self._timer = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(context["connection"].alias, sql, (time.perf_counter() - start) * 1000)
+
+    def record(self, alias, sql, duration):
+        self.queries.append((alias, sql, duration))
+
+    def attach(self, timer):
+        """
+        Record through ``timer``, the request's already installed
+        ``QueryTimer``, instead of installing a wrapper of its own; undone by
+        ``uninstall``.
+        """
+        timer.recorder = self
+        self._timer = timer
+
+    def uninstall(self):
+        super().uninstall()
+        if self._timer is not None:
+            self._timer.recorder = None
+            self._timer = None
+
+    @property
+    def total_ms(self):
+        return sum(duration for _, _, duration in self.queries)
+
+    def slowest(self, count=None):
+        count = settings.SQL_INSTRUMENTATION_SLOWEST if count is None else count
+        ordered = sorted(self.queries, key=lambda query: query[2], reverse=True)
+        return [
+            {"alias": alias, "sql": sql, "ms": round(duration, 2)}
+            for alias, sql, duration in ordered[:count]
+        ]
+
+    def repeated_shapes(self, threshold=None):
+        """
+        Shapes run at least ``threshold`` times, most repeated first.
+        """
+        threshold = settings.SQL_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        shapes = Counter(query_shape(sql) for _, sql, _ in self.queries)
+        return [
+            {"sql": shape, "count": count}
+            for shape, count in shapes.most_common()
+            if count >= threshold
+        ]
+
+
+def server_timing(recorder):
+    """
+    ``Server-Timing`` header value with the query count, total database time
+    and the slowest statements' durations. SQL text stays in the logs.
+    """
+    entries = [f'db;dur={recorder.total_ms:.2f};desc="{len(recorder.queries)} queries"']
+    entries += [f"db-slow-{n};dur={query['ms']:.2f}" for n, query in enumerate(recorder.slowest(), 1)]
+    return ", ".join(entries)
+
+
+def report(request, response, recorder):
+    """
+    Log the request's SQL summary, and a warning for each likely N+1.
+    """
+    match = getattr(request, "resolver_match", None)
+    view = match.view_name if match else None
+    summary = {
+        "method": request.method,
+        "path": request.path,
+        "view": view,
+        "status": response.status_code,
+        "queries": len(recorder.queries),
+        "db_ms": round(recorder.total_ms, 2),
+        "slowest": recorder.slowest(),
+        "n_plus_one": recorder.repeated_shapes(),
+    }
+    logger.info(
+        "%s %s view=%s status=%s queries=%d db_ms=%.2f",
+        request.method, request.path, view, response.status_code,
+        summary["queries"], summary["db_ms"],
+        extra={"sql": summary},
+    )
+    for repeated in summary["n_plus_one"]:
+        logger.warning(
+            "Likely N+1 in view=%s: %d queries of shape %s",
+            view, repeated["count"], repeated["sql"],
+            extra={"sql": {"view": view, "path": request.path, **repeated}},
+        )
@@ -0,0 +1,137 @@
+"""
+SMTP email backend that keeps connections open between sends.
+
+Django's SMTP backend logs in (EHLO, STARTTLS, AUTH) for every message sent
+without an explicit connection, which is every ``send_mail`` call. This
+backend hands closed connections back to a per-process pool instead, so a
+Celery worker process sending notification after notification logs in once.
+Connections idle for more than ``EMAIL_POOL_CHECK_AFTER`` seconds are checked
+with NOOP before reuse, and any connection that failed a send is dropped.
+
+Enable it with ``EMAIL_BACKEND=blog.mail.PooledEmailBackend``.
+"""
+import os
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail.backends import smtp
+
+
+class ConnectionPool:
+    """
+    Thread-safe stacks of idle SMTP connections, keyed by server and account.
+    """
+
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def checkout(self, key):
+        """
+        Most recently used healthy connection for ``key``, or None.
+        """
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                connection, released_at = idle.pop()
+            if time.monotonic() - released_at < settings.EMAIL_POOL_CHECK_AFTER or is_alive(connection):
+                return connection
+            close_quietly(connection)
+
+    def checkin(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < settings.EMAIL_POOL_SIZE:
+                idle.append((connection, time.monotonic()))
+                return
+        close_quietly(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _ in connections:
+                close_quietly(connection)
+
+    def forget(self):
+        """
+        Drop every connection without closing it: after a fork the sockets
+        belong to the parent process.
+        """
+        with self._lock:
+            self._idle = {}
+
+
+def is_alive(connection):
+    try:
+        return connection.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+def close_quietly(connection):
+    try:
+        connection.quit()
+    except (smtplib.SMTPException, OSError):
+        connection.close()
+
+
+def is_permanent(exc):
+    """
+    True for 5xx replies, which retrying the same message cannot fix.
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+pool = ConnectionPool()
+os.register_at_fork(after_in_child=pool.forget)
+
+
+class PooledEmailBackend(smtp.EmailBackend):
+    """
+    ``django.core.mail.backends.smtp.EmailBackend`` whose ``open`` reuses a
+    pooled connection and whose ``close`` returns it to the pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._failed = False
+
+    @property
+    def pool_key(self):
+        return (self.host, self.port, self.username, self.use_tls, self.use_ssl)
+
+    def open(self):
+        if self.connection:
+            return False
+        self._failed = False
+        self.connection = pool.checkout(self.pool_key)
+        if self.connection is not None:
+            return True
+        return super().open()
+
+    def close(self):
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        if self._failed:
+            close_quietly(connection)
+        else:
+            pool.checkin(self.pool_key, connection)
+
+    def _send(self, email_message):
+        # A failed send can leave the session mid-transaction; never pool it.
+        try:
+            sent = super()._send(email_message)
+        except Exception:
+            self._failed = True
+            raise
+        if not sent and email_message.recipients():
+            self._failed = True
+        return sent
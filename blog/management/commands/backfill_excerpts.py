@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from blog import caching
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill Post.excerpt and Post.word_count from the content of posts saved "
+        "before those columns existed (run once after migrating). --all "
+        "recomputes every post, e.g. after changing EXCERPT_LENGTH."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of posts (by id range) read and updated per transaction.",
+        )
+        parser.add_argument("--all", action="store_true", help="Recompute posts that already have an excerpt.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = Post.objects.aggregate(last=Max("id"))["last"] or 0
+
+        updated = 0
+        for start in range(0, last_id + 1, batch_size):
+            posts = Post.objects.filter(id__gte=start, id__lt=start + batch_size).exclude(content="")
+            if not options["all"]:
+                posts = posts.filter(word_count=0)
+            with transaction.atomic():
+                batch = list(posts.only("id", "author_id", "is_private", "content"))
+                for post in batch:
+                    post.refresh_excerpt()
+                # bulk_update leaves updated_at alone: the post did not change.
+                Post.objects.bulk_update(batch, ["excerpt", "word_count"])
+                caching.invalidate_posts(batch)
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled excerpts of {updated} post(s)."))
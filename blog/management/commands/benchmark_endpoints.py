@@ -0,0 +1,142 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from blog.benchmarking import ENDPOINTS, endpoint_targets, time_call
+from blog.models import Comment, Post
+
+
+def current_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every read endpoint against the current database (see seed_blog) "
+        "and check its SQL query count against the budget in "
+        "blog.benchmarking.ENDPOINTS. Results can be saved as JSON and compared "
+        "with an earlier run. Fails if an endpoint errors or exceeds its budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Username to authenticate as (default: the first user).")
+        parser.add_argument("--repeat", type=int, default=50, help="Timed requests per endpoint.")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--compare", help="JSON file from an earlier run to compare with.")
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Keep the response cache enabled instead of measuring the database path.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by("id")
+        user = users.filter(username=options["user"]).first() if options["user"] else users.first()
+        if user is None:
+            raise CommandError("No such user; run seed_blog first.")
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        def fetch(path):
+            response = client.get(path)
+            if response.streaming:
+                body = b"".join(response.streaming_content)
+            else:
+                body = response.content
+            return response, body
+
+        overrides = {"ALLOWED_HOSTS": ["testserver"]}
+        if not options["with_cache"]:
+            overrides["CACHES"] = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        results = {}
+        with override_settings(**overrides):
+            targets = endpoint_targets()
+            for name, endpoint in ENDPOINTS.items():
+                path = endpoint.path.format(**targets)
+                # The first request warms the token cache.
+                fetch(path)
+                with CaptureQueriesContext(connection) as captured:
+                    response, body = fetch(path)
+                results[name] = {
+                    "path": path,
+                    "status": response.status_code,
+                    "queries": len(captured),
+                    "budget": endpoint.budget,
+                    "bytes": len(body),
+                    **time_call(lambda: fetch(path), options["repeat"]),
+                }
+
+        report = {
+            "commit": current_commit(),
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "rows": {
+                "users": User.objects.count(),
+                "posts": Post.objects.count(),
+                "comments": Comment.objects.count(),
+            },
+            "repeat": options["repeat"],
+            "with_cache": options["with_cache"],
+            "endpoints": results,
+        }
+        self.write_table(results)
+        if options["compare"]:
+            with open(options["compare"]) as baseline:
+                self.write_comparison(json.load(baseline), report)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2)
+
+        failures = [
+            name for name, result in results.items()
+            if result["status"] != 200 or result["queries"] > result["budget"]
+        ]
+        if failures:
+            raise CommandError(f"Failed status or query budget: {', '.join(failures)}.")
+
+    def write_table(self, results):
+        self.stdout.write(
+            f"{'endpoint':<28} {'status':>6} {'queries':>9} {'bytes':>9} {'p50 ms':>9} {'p95 ms':>9}"
+        )
+        for name, result in results.items():
+            queries = f"{result['queries']}/{result['budget']}"
+            self.stdout.write(
+                f"{name:<28} {result['status']:>6} {queries:>9} {result['bytes']:>9} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}"
+            )
+
+    def write_comparison(self, baseline, report):
+        self.stdout.write(f"\nvs baseline {baseline.get('commit') or 'unknown'} ({baseline.get('created_at')}):")
+        self.stdout.write(f"{'endpoint':<28} {'queries':>9} {'p50 ms':>20} {'p95 ms':>20}")
+        for name, result in report["endpoints"].items():
+            before = baseline["endpoints"].get(name)
+            if before is None:
+                self.stdout.write(f"{name:<28} {'new':>9}")
+                continue
+            queries = f"{before['queries']}->{result['queries']}"
+            self.stdout.write(
+                f"{name:<28} {queries:>9} {self.change(before['p50_ms'], result['p50_ms']):>20} "
+                f"{self.change(before['p95_ms'], result['p95_ms']):>20}"
+            )
+
+    @staticmethod
+    def change(before, after):
+        if not before:
+            return f"{after:.2f}"
+        return f"{after:.2f} ({(after - before) / before:+.0%})"
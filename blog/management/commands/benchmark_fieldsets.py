@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog.benchmarking import seed_posts, time_call
+from blog.views import PostViewSet
+
+VARIANTS = {
+    "full": {},
+    "fields=id,title": {"fields": "id,title"},
+    "omit=excerpt,author": {"omit": "excerpt,author"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare payload size, queries and latency of the post list with and "
+        "without sparse fieldsets. Everything runs in a transaction that is "
+        "rolled back, with the response cache disabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=2000, help="Number of posts to seed.")
+        parser.add_argument("--repeat", type=int, default=50, help="Requests per variant.")
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        view = PostViewSet.as_view({"get": "list"})
+        dummy_cache = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        with override_settings(CACHES=dummy_cache), transaction.atomic():
+            author = User.objects.create_user(username="fieldsets-benchmark", email="")
+            self.stdout.write(f"Seeding {options['posts']} posts...")
+            seed_posts(author, options["posts"])
+
+            def fetch(params):
+                request = factory.get("/api/posts/", params)
+                force_authenticate(request, user=author)
+                return view(request).render()
+
+            self.stdout.write(
+                f"{'variant':<22} {'bytes':>10} {'queries':>8} {'sql cols':>9} "
+                f"{'p50 ms':>10} {'p95 ms':>10}"
+            )
+            for name, params in VARIANTS.items():
+                with CaptureQueriesContext(connection) as captured:
+                    response = fetch(params)
+                # Columns in the page query's SELECT list, a proxy for what was read.
+                page_sql = captured.captured_queries[-1]["sql"]
+                columns = page_sql.split(" FROM ", 1)[0].count(",") + 1
+                result = time_call(lambda: fetch(params), options["repeat"])
+                self.stdout.write(
+                    f"{name:<22} {len(response.content):>10} {len(captured):>8} {columns:>9} "
+                    f"{result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f}"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from blog.benchmarking import seed_posts, time_call
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ranked full-text search against icontains scans on a seeded "
+        "corpus. Everything runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=20000, help="Number of posts to seed.")
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per query and strategy.")
+        parser.add_argument(
+            "--query",
+            action="append",
+            dest="queries",
+            help="Search term to benchmark (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        queries = options["queries"] or ["postgres", "latency", "celery worker"]
+        if connection.vendor != "postgresql":
+            self.stdout.write(
+                self.style.WARNING(
+                    "Not running on PostgreSQL: search() falls back to icontains, "
+                    "so both columns measure the same query."
+                )
+            )
+
+        with transaction.atomic():
+            author = User.objects.create_user(username="search-benchmark", email="")
+            self.stdout.write(f"Seeding {options['posts']} posts...")
+            seed_posts(author, options["posts"])
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE blog_post")
+
+            self.stdout.write(f"{'query':<20} {'strategy':<12} {'p50 ms':>10} {'p95 ms':>10}")
+            for text in queries:
+                strategies = {
+                    "fulltext": lambda: list(Post.objects.search(text)[:20]),
+                    "icontains": lambda: list(
+                        Post.objects.filter(Q(title__icontains=text) | Q(content__icontains=text))
+                        .order_by("-created_at", "-id")[:20]
+                    ),
+                }
+                for name, run in strategies.items():
+                    result = time_call(run, options["repeat"])
+                    self.stdout.write(
+                        f"{text:<20} {name:<12} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f}"
+                    )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,79 @@
+import itertools
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.importing import FORMATS, IMPORTERS, read_records
+
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load users, posts or comments from a JSONL or CSV file (the "
+        "export_blog format). Uses COPY on PostgreSQL and bulk_create elsewhere, "
+        "all in one transaction. Invalid records are skipped and reported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(IMPORTERS), help="What to import.")
+        parser.add_argument("path", help="File to read, or - for stdin.")
+        parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension).")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Records written per batch.")
+        parser.add_argument(
+            "--keep-ids",
+            action="store_true",
+            help="Insert the records' id values instead of generating new ones.",
+        )
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help=(
+                "Posts on PostgreSQL: drop the search index and trigger during the import and "
+                "rebuild them at the end. Faster, but blocks every read of blog_post until the "
+                "import commits, so only use it during downtime."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        importer = IMPORTERS[options["model"]](keep_ids=options["keep_ids"], offline=options["offline"])
+
+        if path == "-":
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, newline="", encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        start = time.perf_counter()
+        records = read_records(stream, fmt)
+        try:
+            with transaction.atomic():
+                importer.begin()
+                while chunk := list(itertools.islice(records, options["chunk_size"])):
+                    importer.load(chunk)
+                    if options["verbosity"] > 1:
+                        self.stderr.write(f"{importer.imported} {options['model']} written...")
+                importer.finish()
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - start
+
+        for line_number, message in importer.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f"line {line_number}: {message}")
+        if len(importer.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f"... and {len(importer.errors) - MAX_REPORTED_ERRORS} more.")
+
+        rate = importer.imported / elapsed if elapsed else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {importer.imported} {options['model']} in {elapsed:.1f}s "
+                f"({rate:.0f} rows/s); skipped {len(importer.errors)}."
+            )
+        )
@@ -0,0 +1,54 @@
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from blog.benchmarking import summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent GET requests at a running server and report throughput "
+        "and latency percentiles. Run it against the WSGI and ASGI deployments "
+        "with the same worker count to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Endpoint to request, e.g. http://localhost:8000/api/async/posts/.")
+        parser.add_argument("--token", help="API token sent in the Authorization header.")
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once.")
+        parser.add_argument("--requests", type=int, default=1000, help="Total number of requests.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds.")
+
+    def handle(self, *args, **options):
+        headers = {"Authorization": f"Token {options['token']}"} if options["token"] else {}
+
+        def fetch(_):
+            request = urllib.request.Request(options["url"], headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=options["timeout"]) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, TimeoutError):
+                ok = False
+            return ok, (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(executor.map(fetch, range(options["requests"])))
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for ok, latency in results if ok]
+        errors = len(results) - len(latencies)
+        summary = summarize(latencies)
+        self.stdout.write(
+            f"{len(results)} requests, concurrency {options['concurrency']}: "
+            f"{len(results) / elapsed:.1f} req/s, {errors} errors"
+        )
+        self.stdout.write(
+            f"p50 {summary['p50_ms']:.1f} ms  p95 {summary['p95_ms']:.1f} ms  "
+            f"p99 {summary['p99_ms']:.1f} ms  max {summary['max_ms']:.1f} ms"
+        )
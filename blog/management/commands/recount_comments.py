@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Backfill or repair Post.comments_count from the comments table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of posts (by id range) recounted per UPDATE statement.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = Post.objects.aggregate(last=Max("id"))["last"] or 0
+
+        repaired = 0
+        for start in range(0, last_id + 1, batch_size):
+            repaired += Post.objects.filter(
+                id__gte=start, id__lt=start + batch_size
+            ).recount_comments()
+
+        self.stdout.write(self.style.SUCCESS(f"Repaired comments_count on {repaired} post(s)."))
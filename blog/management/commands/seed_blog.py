@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.benchmarking import SEED_PASSWORD, seed_blog
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with reproducible users, posts and comments for "
+        "benchmark_endpoints and load_test. Adds to whatever is already there."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Number of users to create.")
+        parser.add_argument("--posts", type=int, default=100_000, help="Number of posts to create.")
+        parser.add_argument("--comments", type=int, default=1_000_000, help="Number of comments to create.")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT statement.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed yields the same text.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            written = seed_blog(
+                options["users"],
+                options["posts"],
+                options["comments"],
+                batch_size=options["batch_size"],
+                seed=options["seed"],
+            )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {written['users']} users, {written['posts']} posts and "
+                f"{written['comments']} comments in {elapsed:.1f}s. "
+                f"Every seeded user's password is {SEED_PASSWORD!r}."
+            )
+        )
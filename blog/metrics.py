@@ -0,0 +1,98 @@
+"""
+Prometheus metrics for requests and Celery tasks, exposed at ``/metrics``.
+
+Under gunicorn (or Celery's prefork pool) every worker process keeps its own
+counters. Set ``PROMETHEUS_MULTIPROC_DIR`` to an empty directory shared by
+all workers of a host, the same for the web and Celery processes, and each
+process writes its samples there; ``/metrics`` then reports the sum over all
+of them, whichever worker serves the scrape. ``config/gunicorn.py`` cleans up
+after workers that exit.
+"""
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "blog_http_request_duration_seconds",
+    "Time to produce a response, by view and method.",
+    ["view", "method"],
+)
+REQUESTS = Counter(
+    "blog_http_requests",
+    "Responses sent, by view, method and status code.",
+    ["view", "method", "status"],
+)
+REQUEST_DB_TIME = Histogram(
+    "blog_http_request_db_duration_seconds",
+    "Time spent in SQL queries per request, by view.",
+    ["view"],
+)
+TASK_DURATION = Histogram(
+    "blog_celery_task_duration_seconds",
+    "Celery task run time, by task.",
+    ["task"],
+)
+TASKS = Counter(
+    "blog_celery_tasks",
+    "Celery task runs, by task and final state.",
+    ["task", "outcome"],
+)
+
+
+def view_label(request):
+    """
+    ``ViewClass.action`` for DRF views (``PostViewSet.list``, ``LoginView``),
+    the URL name for other views. Unrouted requests share one label so 404
+    scans cannot inflate the number of series.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    cls = getattr(match.func, "cls", None)
+    if cls is None:
+        return match.view_name or match._func_path
+    action = (getattr(match.func, "actions", None) or {}).get(request.method.lower())
+    return f"{cls.__name__}.{action}" if action else cls.__name__
+
+
+def observe_request(request, response, seconds, db_seconds):
+    view = view_label(request)
+    REQUEST_LATENCY.labels(view, request.method).observe(seconds)
+    REQUESTS.labels(view, request.method, response.status_code).inc()
+    REQUEST_DB_TIME.labels(view).observe(db_seconds)
+
+
+def observe_task(name, seconds, outcome):
+    TASK_DURATION.labels(name).observe(seconds)
+    TASKS.labels(name, outcome).inc()
+
+
+def collect():
+    """
+    Exposition-format text of every metric, summed over all worker
+    processes in multiprocess mode.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+@require_GET
+def metrics_view(request):
+    if request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(collect(), content_type=CONTENT_TYPE_LATEST)
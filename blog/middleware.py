@@ -0,0 +1,172 @@
+"""
+Request middleware: Prometheus request metrics, read-your-writes routing
+between the primary and the read replicas, and sampled SQL instrumentation.
+
+Safe requests read from a replica unless the same client wrote within the
+last ``REPLICA_STICKY_SECONDS``. Clients are identified by a hash of their
+Authorization header, or of their session cookie for the browsable API and
+the admin; the marker lives in the shared cache so every worker honours it.
+"""
+import hashlib
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from . import instrumentation, metrics, routers
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+KEY_PREFIX = "blog:replica:sticky"
+
+
+class MetricsMiddleware:
+    """
+    Observe every request's latency, status and SQL time. Placed first so
+    the latency covers all other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        request.query_timer = timer = instrumentation.QueryTimer()
+        timer.install()
+        try:
+            response = self.get_response(request)
+        finally:
+            timer.uninstall()
+        metrics.observe_request(request, response, time.perf_counter() - start, timer.seconds)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        request.query_timer = timer = instrumentation.QueryTimer()
+        await sync_to_async(timer.install)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(timer.uninstall)()
+        metrics.observe_request(request, response, time.perf_counter() - start, timer.seconds)
+        return response
+
+
+def sticky_key(request):
+    credentials = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credentials:
+        return None
+    return f"{KEY_PREFIX}:{hashlib.sha256(credentials.encode()).hexdigest()}"
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+
+        key = sticky_key(request)
+        safe = request.method in SAFE_METHODS
+        token = routers.allow_replica_reads(safe and not (key and cache.get(key)))
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.reset(token)
+        if not safe and key:
+            cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return await self.get_response(request)
+
+        key = sticky_key(request)
+        safe = request.method in SAFE_METHODS
+        token = routers.allow_replica_reads(safe and not (key and await cache.aget(key)))
+        try:
+            response = await self.get_response(request)
+        finally:
+            routers.reset(token)
+        if not safe and key:
+            await cache.aset(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record the SQL run by a sampled fraction of requests
+    (``SQL_INSTRUMENTATION_SAMPLE_RATE``), add a ``Server-Timing`` header and
+    log a summary plus any likely N+1 query shapes. Behind
+    ``MetricsMiddleware`` the recorder rides on its ``QueryTimer``. Queries
+    run while a streaming response is consumed are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        recorder = instrumentation.QueryRecorder()
+        timer = getattr(request, "query_timer", None)
+        if timer is not None:
+            recorder.attach(timer)
+        else:
+            recorder.install()
+        try:
+            response = self.get_response(request)
+        finally:
+            recorder.uninstall()
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        # The ORM runs in the request's thread-sensitive executor thread,
+        # whose connections are not the event loop thread's.
+        recorder = instrumentation.QueryRecorder()
+        timer = getattr(request, "query_timer", None)
+        if timer is not None:
+            recorder.attach(timer)
+        else:
+            await sync_to_async(recorder.install)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.uninstall)()
+        return self.finish(request, response, recorder)
+
+    def finish(self, request, response, recorder):
+        response["Server-Timing"] = instrumentation.server_timing(recorder)
+        instrumentation.report(request, response, recorder)
+        return response
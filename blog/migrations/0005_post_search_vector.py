@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:19
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+CREATE_SEARCH_VECTOR_SQL = [
+    """
+CREATE OR REPLACE FUNCTION blog_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE TRIGGER blog_post_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content ON blog_post
+    FOR EACH ROW EXECUTE FUNCTION blog_post_search_vector_update()
+""",
+    """
+UPDATE blog_post SET search_vector =
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(content, '')), 'B')
+""",
+    "CREATE INDEX blog_post_search_vector_gin ON blog_post USING gin (search_vector)",
+]
+
+DROP_SEARCH_VECTOR_SQL = [
+    "DROP INDEX IF EXISTS blog_post_search_vector_gin",
+    "DROP TRIGGER IF EXISTS blog_post_search_vector_trigger ON blog_post",
+    "DROP FUNCTION IF EXISTS blog_post_search_vector_update()",
+]
+
+
+def create_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in CREATE_SEARCH_VECTOR_SQL:
+            schema_editor.execute(statement, params=None)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in DROP_SEARCH_VECTOR_SQL:
+            schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_comment_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:24
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0005_post_search_vector'),
+    ]
+
+    operations = [
+        # auth_user.email is not indexed by django.contrib.auth; EmailBackend
+        # looks users up by it on every login.
+        migrations.RunSQL(
+            sql='CREATE INDEX blog_auth_user_email_idx ON auth_user (email)',
+            reverse_sql='DROP INDEX IF EXISTS blog_auth_user_email_idx',
+        ),
+    ]
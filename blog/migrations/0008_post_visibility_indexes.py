@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_outboxemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_private', False)), fields=['-created_at', '-id'], name='blog_post_public_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_private', True)), fields=['author', '-created_at', '-id'], name='blog_post_private_author_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+# (table, column, referenced table) of the foreign keys whose rows the
+# database itself should remove when the referenced row goes. Django 5.2 only
+# cascades in Python, which is still what the ORM does; the database-level
+# rule keeps raw deletes and rows racing the purge_deleted task consistent.
+# Note that altering one of these fields in a later migration recreates its
+# constraint without the rule.
+CASCADES = [
+    ("blog_comment", "post_id", "blog_post"),
+    ("blog_comment", "commenter_id", "auth_user"),
+    ("blog_post", "author_id", "auth_user"),
+    ("blog_userdeletion", "user_id", "auth_user"),
+]
+
+
+def set_on_delete(rule):
+    def apply(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != "postgresql":
+            return
+        quote = schema_editor.quote_name
+        with connection.cursor() as cursor:
+            for table, column, target in CASCADES:
+                constraints = connection.introspection.get_constraints(cursor, table)
+                for name, info in constraints.items():
+                    if not info["foreign_key"] or info["columns"] != [column]:
+                        continue
+                    # NOT VALID skips the full-table check under the exclusive
+                    # lock; VALIDATE then runs under a weaker one.
+                    schema_editor.execute(
+                        f"ALTER TABLE {quote(table)} DROP CONSTRAINT {quote(name)}, "
+                        f"ADD CONSTRAINT {quote(name)} FOREIGN KEY ({quote(column)}) "
+                        f"REFERENCES {quote(target)} (\"id\") {rule} DEFERRABLE INITIALLY DEFERRED NOT VALID"
+                    )
+                    schema_editor.execute(f"ALTER TABLE {quote(table)} VALIDATE CONSTRAINT {quote(name)}")
+
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_deleted_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_on_delete("ON DELETE CASCADE"), set_on_delete("ON DELETE NO ACTION")),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Trigram GIN indexes for the admin's search boxes. Django's icontains lookup
+# compiles to UPPER(column::text) LIKE UPPER(%s), so each index is built on
+# that same expression; plain column indexes would never be used for it.
+TRIGRAM_INDEXES = [
+    ("blog_post_title_trgm_idx", "blog_post", "title"),
+    ("blog_post_content_trgm_idx", "blog_post", "content"),
+    ("blog_comment_text_trgm_idx", "blog_comment", "comment_text"),
+    ("blog_auth_user_username_trgm_idx", "auth_user", "username"),
+    ("blog_auth_user_email_trgm_idx", "auth_user", "email"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0011_on_delete_cascade'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,31 +1,295 @@
-from django.db import models
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connections, models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 
+SEARCH_CONFIG = "english"
+EXCERPT_LENGTH = 280
+
+
+def make_excerpt(content):
+    """
+    The start of ``content`` with whitespace collapsed, cut at a word
+    boundary and ellipsized to at most ``EXCERPT_LENGTH`` characters.
+    """
+    text = " ".join(content.split())
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    cut = text[:EXCERPT_LENGTH]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut[:EXCERPT_LENGTH - 1].rstrip() + "…"
+
+
+def excerpt_fields(content):
+    """
+    Values of the columns derived from a post's ``content``.
+    """
+    return {"excerpt": make_excerpt(content), "word_count": len(content.split())}
+
+
+class PostQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._visible_user = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._visible_user = self._visible_user
+        return clone
+
+    def __getitem__(self, k):
+        if (
+            isinstance(k, slice)
+            and k.stop is not None
+            and self._visible_user is not None
+            and self._result_cache is None
+        ):
+            return self._visible_window(k.stop)[k]
+        return super().__getitem__(k)
+
+    def visible_to(self, user=None):
+        """
+        Posts ``user`` may read: every public post plus their own private
+        ones. Without an authenticated user only public posts are returned.
+
+        Public posts are read from blog_post_public_created_idx. The OR
+        needed for an authenticated user matches neither partial index, so
+        slices of the result (every page) are taken through
+        ``_visible_window`` instead.
+        """
+        public = Q(is_private=False)
+        if user is None or not user.is_authenticated:
+            return self.filter(public)
+        queryset = self.filter(public | Q(is_private=True, author=user))
+        queryset._visible_user = user
+        return queryset
+
+    def _visible_window(self, stop):
+        """
+        This queryset narrowed to the union of its first ``stop`` public posts
+        and first ``stop`` private posts, which holds its first ``stop`` rows.
+
+        Each branch of the UNION ALL is ordered and limited on its own, so
+        PostgreSQL reads it from its partial index (blog_post_public_created_idx
+        or blog_post_private_author_idx) and the page is sorted from at most
+        2 * ``stop`` rows. Databases that cannot limit compound branches get
+        the plain queryset.
+        """
+        queryset = self._chain()
+        queryset._visible_user = None
+        ordering = queryset.query.order_by or (
+            queryset.model._meta.ordering if queryset.query.default_ordering else ()
+        )
+        if not ordering or not connections[queryset.db].features.supports_slicing_ordering_in_compound:
+            return queryset
+        public, private = (
+            queryset.filter(condition).order_by(*ordering).values_list("pk")[:stop]
+            for condition in (Q(is_private=False), Q(is_private=True, author=self._visible_user))
+        )
+        return queryset.filter(pk__in=public.union(private, all=True))
+
+    def recount_comments(self):
+        """
+        Recompute the denormalized comments_count column from the comments
+        table. Only rows that have drifted are written; returns their number.
+        """
+        counts = (
+            Comment.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        actual = Coalesce(Subquery(counts), 0)
+        return self.exclude(comments_count=actual).update(comments_count=actual)
+
+    def search(self, text):
+        """
+        Ranked full-text search over title and content.
+
+        On PostgreSQL this matches against the trigger-maintained, GIN-indexed
+        search_vector column. Other databases get an unranked icontains scan so
+        the endpoint keeps working on test databases.
+        """
+        if connections[self.db].vendor != "postgresql":
+            return self.filter(Q(title__icontains=text) | Q(content__icontains=text)).order_by(
+                "-created_at", "-id"
+            )
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            self.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_at", "-id")
+        )
+
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
+    include_deleted = False
+
+    def get_queryset(self):
+        # The tsvector is only ever read by the database while searching.
+        queryset = super().get_queryset().defer("search_vector")
+        if not self.include_deleted:
+            queryset = queryset.filter(deleted_at__isnull=True)
+        return queryset
+
+
+class AllPostsManager(PostManager):
+    """
+    Posts including those deleted but not purged yet; for the purge itself.
+    """
+
+    include_deleted = True
+
+
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # Derived from content (see excerpt_fields); lists render these instead.
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, default="", editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="posts")
     is_private = models.BooleanField(default=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by the blog_post_search_vector_update trigger on PostgreSQL.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Set when the post is deleted; the purge_deleted task removes the row and
+    # its comments later. Post.objects never returns deleted posts.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = PostManager()
+    all_objects = AllPostsManager()
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="blog_post_created_id_idx"),
+            # The two halves of PostQuerySet.visible_to().
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=Q(is_private=False, deleted_at__isnull=True),
+                name="blog_post_public_created_idx",
+            ),
+            models.Index(
+                fields=["author", "-created_at", "-id"],
+                condition=Q(is_private=True, deleted_at__isnull=True),
+                name="blog_post_private_author_idx",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=Q(deleted_at__isnull=False),
+                name="blog_post_deleted_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def refresh_excerpt(self):
+        for name, value in excerpt_fields(self.content).items():
+            setattr(self, name, value)
+
+
+class CommentQuerySet(models.QuerySet):
+    def visible(self):
+        """
+        Comments anyone may read: those on public posts. Comments on private
+        posts are not listed, not even to the post's author.
+        """
+        return self.filter(post__is_private=False, post__deleted_at__isnull=True)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     comment_text = models.TextField()
     commenter = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="blog_comment_created_id_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.commenter.username} on {self.post.title}"
+
+
+class OutboxEmail(models.Model):
+    """
+    An email written in the same transaction as the change that caused it and
+    delivered later by the dispatch_email_outbox task.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["next_attempt_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=models.Q(status="pending"),
+                name="blog_outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
+
+
+class UserDeletion(models.Model):
+    """
+    A user account whose deletion was requested. The user is deactivated and
+    their posts hidden at once; purge_deleted removes the rest in batches.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="deletion")
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Deletion of {self.user.username}"
+
+
+class PendingNotification(models.Model):
+    """
+    A comment whose notification waits for the post author's next digest.
+    Written in the same transaction as the comment; flush_comment_digests
+    drains the table.
+    """
+
+    # No constraint or cascade, so comments keep being deleted in plain
+    # batches; rows of deleted comments are dropped by the next flush.
+    comment = models.OneToOneField(
+        Comment, on_delete=models.DO_NOTHING, db_constraint=False, primary_key=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Notification of comment {self.comment_id}"
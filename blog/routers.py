@@ -0,0 +1,51 @@
+"""
+Database router that sends reads to the replicas while a request allows it.
+
+``ReplicaRoutingMiddleware`` turns replica reads on for safe requests from
+clients that have not written recently. Everything else (writes, requests
+from recent writers, management commands, Celery tasks) uses the primary.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Authentication state is read from the primary so that a token created a
+# moment ago works on the very next request.
+PRIMARY_ONLY_APPS = {"authtoken", "sessions"}
+
+_replica_reads = ContextVar("blog_replica_reads", default=False)
+
+
+def allow_replica_reads(allowed=True):
+    """
+    Allow or forbid replica reads in the current context. Returns a token for
+    ``reset``.
+    """
+    return _replica_reads.set(allowed)
+
+
+def reset(token):
+    _replica_reads.reset(token)
+
+
+def replica_reads_allowed():
+    return _replica_reads.get() and bool(settings.REPLICA_DATABASES)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS or not replica_reads_allowed():
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.REPLICA_DATABASES)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -4,9 +4,11 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import Post, Comment
+from django.db import transaction
+from .fieldsets import SparseFieldsetMixin
+from .models import Post, Comment, OutboxEmail, excerpt_fields
+from .tasks import schedule_outbox_dispatch
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -31,25 +33,26 @@ class SignupSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop("password_confirm")
-        user = User.objects.create_user(
-            username=validated_data["username"],
-            email=validated_data["email"],
-            password=validated_data["password"],
-            first_name=validated_data.get("first_name", ""),
-            last_name=validated_data.get("last_name", ""),
-            is_active=False,  
-        )
-        token = default_token_generator.make_token(user)
-        uid = urlsafe_base64_encode(force_bytes(user.pk))
-        
-        verification_url = f"http://localhost:8000/api/auth/verify-email/{uid}/{token}/"
-        send_mail(
-            subject="Verify your email address",
-            message=f"Please click the following link to verify your email: {verification_url}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=validated_data["username"],
+                email=validated_data["email"],
+                password=validated_data["password"],
+                first_name=validated_data.get("first_name", ""),
+                last_name=validated_data.get("last_name", ""),
+                is_active=False,  
+            )
+            token = default_token_generator.make_token(user)
+            uid = urlsafe_base64_encode(force_bytes(user.pk))
+            
+            verification_url = f"http://localhost:8000/api/auth/verify-email/{uid}/{token}/"
+            OutboxEmail.objects.create(
+                subject="Verify your email address",
+                body=f"Please click the following link to verify your email: {verification_url}",
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipients=[user.email],
+            )
+            transaction.on_commit(schedule_outbox_dispatch)
         return user
 
 
@@ -62,36 +65,67 @@ class LoginSerializer(serializers.Serializer):
         password = attrs.get("password")
 
         if email and password:
-            try:
-                user = User.objects.get(email=email)
-            except User.DoesNotExist:
+            user = authenticate(self.context.get("request"), email=email, password=password)
+            if not user:
                 raise serializers.ValidationError("Invalid email or password.")
 
             if not user.is_active:
                 raise serializers.ValidationError("Please verify your email address before logging in.")
 
-            user = authenticate(username=user.username, password=password)
-            if not user:
-                raise serializers.ValidationError("Invalid email or password.")
-
             attrs["user"] = user
             return attrs
         else:
             raise serializers.ValidationError("Must include 'email' and 'password'.")
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    comments_count = serializers.IntegerField(source="comments.count", read_only=True)
 
     class Meta:
         model = Post
-        fields = ["id", "title", "content", "author", "is_private", "created_at", "updated_at", "comments_count"]
-        read_only_fields = ["id", "author", "created_at", "updated_at"]
+        fields = [
+            "id", "title", "content", "excerpt", "word_count", "author", "is_private",
+            "created_at", "updated_at", "comments_count",
+        ]
+        read_only_fields = ["id", "excerpt", "word_count", "author", "created_at", "updated_at", "comments_count"]
+
+    def validate(self, attrs):
+        # Saved along with the content, so lists never need to read it.
+        if "content" in attrs:
+            attrs.update(excerpt_fields(attrs["content"]))
+        return attrs
+
+
+class PostListSerializer(PostSerializer):
+    """
+    Posts as listed: the stored excerpt instead of the full content.
+    """
 
+    class Meta(PostSerializer.Meta):
+        fields = [name for name in PostSerializer.Meta.fields if name != "content"]
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class PrefetchedPostField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves post ids from a ``posts`` mapping in the serializer context when
+    one is provided, so bulk requests load every referenced post in one query.
+    """
+
+    def to_internal_value(self, data):
+        posts = self.context.get("posts")
+        if posts is None:
+            return super().to_internal_value(data)
+        try:
+            return posts[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     commenter = UserSerializer(read_only=True)
+    post = PrefetchedPostField(queryset=Post.objects.all())
     post_title = serializers.CharField(source="post.title", read_only=True)
 
     class Meta:
@@ -99,3 +133,17 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ["id", "post", "comment_text", "commenter", "created_at", "post_title"]
         read_only_fields = ["id", "commenter", "created_at"]
 
+
+
+class BulkCommentSerializer(CommentSerializer):
+    def validate_post(self, post):
+        if post.is_private:
+            raise serializers.ValidationError("Cannot comment on private posts.")
+        return post
+
+
+class PostWithCommentsSerializer(PostListSerializer):
+    latest_comments = CommentSerializer(many=True, read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ["latest_comments"]
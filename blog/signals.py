@@ -0,0 +1,60 @@
+import time
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication, metrics
+
+REVOKING_USER_FIELDS = frozenset(authentication.USER_FIELDS) | {"password"}
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    authentication.revoke(instance.key)
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_of_saved_user(sender, instance, created, update_fields, **kwargs):
+    # Cached tokens carry a copy of the user, so a change to a cached field
+    # (deactivation in particular) or to the password must be re-read from
+    # the database on the next request. Saves of other fields, such as the
+    # last_login update on every login, leave the caches alone.
+    if created:
+        return
+    if update_fields is not None and not update_fields & REVOKING_USER_FIELDS:
+        return
+    keys = list(Token.objects.filter(user=instance).values_list("key", flat=True))
+    if keys:
+        authentication.revoke(*keys)
+
+
+def _delay_query(execute, sql, params, many, context):
+    time.sleep(settings.DB_SIMULATED_LATENCY_MS / 1000)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def simulate_database_latency(sender, connection, **kwargs):
+    # Load-testing aid: make every query pay a fixed round-trip time.
+    if settings.DB_SIMULATED_LATENCY_MS > 0 and _delay_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_delay_query)
+
+
+_task_started = {}
+
+
+@task_prerun.connect
+def start_task_timer(task_id, task, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def observe_task(task_id, task, state, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        metrics.observe_task(task.name, time.perf_counter() - started, state or "UNKNOWN")
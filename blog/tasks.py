@@ -1,22 +1,43 @@
+import logging
+import smtplib
+from datetime import timedelta
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail
 from django.conf import settings
-from .models import Comment
+from django.db import transaction
+from django.utils import timezone
+from . import deletion, digest, mail
+from .models import Comment, OutboxEmail
 
+logger = logging.getLogger(__name__)
 
-@shared_task
+
+@shared_task(
+    autoretry_for=(OSError,),
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+    retry_backoff_max=settings.EMAIL_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+    rate_limit=settings.EMAIL_TASK_RATE_LIMIT,
+)
 def send_comment_notification(comment_id):
     """
     Send an email notification to the post author when a comment is added.
+
+    Connection failures and 4xx replies (smtplib errors are OSErrors) are
+    retried with exponential backoff; 5xx replies are logged and dropped.
     """
     try:
         comment = Comment.objects.select_related("post", "post__author", "commenter").get(id=comment_id)
-        post = comment.post
-        post_author = post.author
-        commenter = comment.commenter
+    except Comment.DoesNotExist:
+        return f"Comment with id {comment_id} does not exist"
+    post = comment.post
+    post_author = post.author
+    commenter = comment.commenter
 
-        subject = f"New comment on your post: {post.title}"
-        message = f"""
+    subject = f"New comment on your post: {post.title}"
+    message = f"""
 Hello {post_author.get_full_name() or post_author.username},
 
 {commenter.get_full_name() or commenter.username} has commented on your post "{post.title}":
@@ -27,18 +48,213 @@ You can view the post and all comments at: http://localhost:8000/api/posts/{post
 
 Best regards,
 Blog App Team
-        """.strip()
+    """.strip()
 
+    try:
         send_mail(
             subject=subject,
             message=message,
-            from_email=settings.EMAIL_HOST_USER,  
+            from_email=settings.EMAIL_HOST_USER,
             recipient_list=[post_author.email],
             fail_silently=False,
         )
-        return f"Email notification sent to {post_author.email}"
-    except Comment.DoesNotExist:
-        return f"Comment with id {comment_id} does not exist"
-    except Exception as e:
+    except OSError as e:
+        if not mail.is_permanent(e):
+            raise
+        logger.warning("Comment notification to %s rejected: %s", post_author.email, e)
         return f"Error sending email: {str(e)}"
+    return f"Email notification sent to {post_author.email}"
+
+
+@shared_task
+def flush_comment_digests():
+    """
+    Send each post author one digest of the comments queued since the last
+    flush, over a single SMTP connection. Digests that fail are queued again;
+    those already sent are not.
+    """
+    pending = digest.pop_all()
+    if not pending:
+        return "No comment digests to send"
 
+    sent, unsent, error = 0, [], None
+    connection = get_connection(fail_silently=False)
+    try:
+        for comments in pending.values():
+            subject, body, from_email, recipients = build_comment_digest(comments)
+            try:
+                # A no-op once open; otherwise keeps the connection open
+                # across sends instead of one login per message.
+                connection.open()
+                EmailMessage(subject, body, from_email, recipients, connection=connection).send()
+            except Exception as e:
+                unsent.extend(comments)
+                error = e
+            else:
+                sent += 1
+    finally:
+        connection.close()
+
+    if unsent:
+        digest.add(unsent)
+        return f"Sent {sent} comment digest(s), {len(pending) - sent} failed: {error}"
+    return f"Sent {sent} comment digest(s)"
+
+
+def build_comment_digest(comments):
+    """
+    Return the (subject, message, from_email, recipient_list) tuple for one
+    author's digest. At most COMMENT_DIGEST_MAX_COMMENTS comments are quoted;
+    the rest are summarized by count.
+    """
+    post_author = comments[0].post.author
+    limit = settings.COMMENT_DIGEST_MAX_COMMENTS
+    shown, hidden = comments[:limit], len(comments) - limit
+
+    subject = f"{len(comments)} new comment(s) on your posts"
+    lines = [
+        f"Hello {post_author.get_full_name() or post_author.username},",
+        "",
+        f"You have {len(comments)} new comment(s) on your posts:",
+        "",
+    ]
+    for comment in shown:
+        commenter = comment.commenter
+        lines.append(
+            f'- {commenter.get_full_name() or commenter.username} on "{comment.post.title}": '
+            f'"{comment.comment_text}"'
+        )
+        lines.append(f"  http://localhost:8000/api/posts/{comment.post.id}/")
+    if hidden > 0:
+        lines.append(f"...and {hidden} more comment(s).")
+    lines.extend(["", "Best regards,", "Blog App Team"])
+
+    return (subject, "\n".join(lines), settings.EMAIL_HOST_USER, [post_author.email])
+
+
+@shared_task
+def dispatch_email_outbox():
+    """
+    Deliver pending outbox emails in batches over one SMTP connection.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED so concurrent
+    dispatchers never send the same email twice; the claim is committed
+    before anything is sent, so no row lock is held during the SMTP exchange.
+    The connection is only opened once there is something to send. Failures
+    are retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS is
+    reached.
+    """
+    sent = failed = 0
+    connection = None
+    try:
+        while True:
+            batch = claim_outbox_batch()
+            if not batch:
+                break
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+            for email in batch:
+                if deliver_outbox_email(email, connection):
+                    sent += 1
+                else:
+                    failed += 1
+    finally:
+        if connection is not None:
+            connection.close()
+    return f"Dispatched {sent} outbox email(s), {failed} failed"
+
+
+def claim_outbox_batch():
+    """
+    Claim up to EMAIL_OUTBOX_BATCH_SIZE due outbox rows by moving their next
+    attempt EMAIL_OUTBOX_CLAIM_TIMEOUT seconds ahead, so a dispatcher that
+    dies mid-batch leaves them to be picked up again later.
+    """
+    with transaction.atomic():
+        batch = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at", "id")[: settings.EMAIL_OUTBOX_BATCH_SIZE]
+        )
+        if batch:
+            claimed_until = timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in batch]).update(next_attempt_at=claimed_until)
+    return batch
+
+
+def send_reconnecting(message, connection):
+    """
+    Send ``message`` over ``connection``, opening it if needed and opening
+    it again once if the server dropped it since the previous message.
+    """
+    connection.open()
+    try:
+        message.send(fail_silently=False)
+    except smtplib.SMTPServerDisconnected:
+        connection.close()
+        connection.open()
+        message.send(fail_silently=False)
+
+
+def deliver_outbox_email(email, connection):
+    """
+    Send one outbox row and record the outcome on it. Returns True on success.
+    """
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=email.recipients,
+        connection=connection,
+    )
+    email.attempts += 1
+    try:
+        send_reconnecting(message, connection)
+    except Exception as e:
+        email.last_error = str(e)
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = OutboxEmail.STATUS_FAILED
+        else:
+            delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+            email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+        return False
+
+    email.status = OutboxEmail.STATUS_SENT
+    email.sent_at = timezone.now()
+    email.last_error = ""
+    email.save(update_fields=["attempts", "last_error", "status", "sent_at"])
+    return True
+
+
+def schedule_outbox_dispatch():
+    """
+    Ask a worker to drain the outbox right away. If the broker is unreachable
+    the periodic dispatch picks the emails up instead, so this never fails.
+    """
+    try:
+        dispatch_email_outbox.delay()
+    except Exception:
+        logger.warning("Could not enqueue dispatch_email_outbox", exc_info=True)
+
+
+@shared_task
+def purge_deleted():
+    """
+    Remove deleted posts and user accounts with everything they own, in
+    batches of DELETE_BATCH_SIZE rows per transaction.
+    """
+    posts = deletion.purge_posts()
+    users = deletion.purge_users()
+    return f"Purged {posts} post(s) and {users} user(s)"
+
+
+def schedule_purge_deleted():
+    """
+    Ask a worker to purge right away. If the broker is unreachable the
+    periodic purge catches up instead, so this never fails.
+    """
+    try:
+        purge_deleted.delay()
+    except Exception:
+        logger.warning("Could not enqueue purge_deleted", exc_info=True)
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     SignupView,
     LoginView,
@@ -16,6 +17,9 @@ urlpatterns = [
     path("auth/signup/", SignupView.as_view(), name="signup"),
     path("auth/login/", LoginView.as_view(), name="login"),
     path("auth/verify-email/<str:uidb64>/<str:token>/", VerifyEmailView.as_view(), name="verify-email"),
+    path("async/posts/", async_views.post_list, name="async-post-list"),
+    path("async/posts/<int:pk>/", async_views.post_detail, name="async-post-detail"),
+    path("async/comments/", async_views.comment_list, name="async-comment-list"),
     path("", include(router.urls)),
 ]
 
@@ -1,20 +1,36 @@
+from collections import Counter
+
+from celery import group
 from rest_framework import viewsets, status, permissions
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
-from django.db.models import Q
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import Case, F, Prefetch, Value, When
+from django.db.models.functions import Greatest
+from . import authentication, caching, conditional, deletion, digest, exporting, fieldsets
+from .conditional import ConditionalGetMixin
+from .fastpath import FastReadMixin
 from .models import Post, Comment
 from .serializers import (
     UserSerializer,
     SignupSerializer,
     LoginSerializer,
     PostSerializer,
+    PostListSerializer,
+    PostWithCommentsSerializer,
     CommentSerializer,
+    BulkCommentSerializer,
 )
+from .pagination import OptInCursorPagination
 from .tasks import send_comment_notification
 
 
@@ -62,10 +78,14 @@ class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={"request": request})
         if serializer.is_valid():
             user = serializer.validated_data["user"]
-            token, created = Token.objects.get_or_create(user=user)
+            try:
+                # Joined in by EmailBackend, so this costs no query.
+                token = user.auth_token
+            except Token.DoesNotExist:
+                token, created = Token.objects.get_or_create(user=user)
             return Response(
                 {
                     "token": token.key,
@@ -76,31 +96,207 @@ class LoginView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PostViewSet(viewsets.ModelViewSet):
+def bulk_payload_error(data):
+    """
+    Return an error Response when ``data`` is not a list that a bulk action
+    can accept, otherwise None.
+    """
+    if not isinstance(data, list) or not data:
+        return Response(
+            {"error": "Expected a non-empty list of objects."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if len(data) > settings.BULK_CREATE_MAX_ITEMS:
+        return Response(
+            {"error": f"At most {settings.BULK_CREATE_MAX_ITEMS} objects can be created per request."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return None
+
+
+def export_response(request, queryset, serializer_class):
+    """
+    Stream ``queryset`` as NDJSON, honouring ``?since=`` and the sparse
+    fieldset parameters.
+    """
+    since = request.query_params.get("since")
+    try:
+        since = exporting.parse_timestamp(since) if since else None
+    except ValueError:
+        return Response(
+            {"error": "The 'since' parameter must be an ISO 8601 date or datetime."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    fields = fieldsets.selected_fields(request, serializer_class.Meta.fields)
+    return StreamingHttpResponse(
+        exporting.iter_ndjson(queryset, serializer_class, fields=fields, since=since),
+        content_type=exporting.CONTENT_TYPE,
+    )
+
+
+class PostViewSet(FastReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInCursorPagination
+    fast_read_columns = ("pk", "author_id", "is_private", "created_at", "updated_at", "comments_count")
+
+    max_included_comments = 20
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = Post.objects.select_related("author").prefetch_related("comments")
+        fields = self.get_selected_fields()
+        queryset = Post.objects.visible_to(self.request.user)
+        if "author" in fields:
+            queryset = queryset.select_related("author")
+        if "content" not in fields:
+            queryset = queryset.defer("content")
         author_id = self.request.query_params.get("author", None)
         if author_id:
             queryset = queryset.filter(author_id=author_id)
-        queryset = queryset.filter(Q(is_private=False) | Q(author=user))
+        included = self.get_included_comments()
+        if included and "latest_comments" in fields:
+            # A sliced Prefetch is run as a single ROW_NUMBER() window query,
+            # fetching at most `included` comments per post.
+            latest = Comment.objects.select_related("commenter").order_by("-created_at", "-id")
+            queryset = queryset.prefetch_related(
+                Prefetch("comments", queryset=latest[:included], to_attr="latest_comments")
+            )
         return queryset
 
+    def get_serializer_class(self):
+        if self.get_included_comments():
+            return PostWithCommentsSerializer
+        if self.action in ("list", "search"):
+            return PostListSerializer
+        return super().get_serializer_class()
+
+    def get_selected_fields(self):
+        """
+        Post fields the response will render, from ``?fields=`` / ``?omit=``.
+        Other actions (such as the nested comments) use those parameters for
+        their own serializer, so they load every post column.
+        """
+        fields = self.get_serializer_class().Meta.fields
+        if self.action not in ("list", "retrieve", "search"):
+            return set(fields)
+        return fieldsets.selected_fields(self.request, fields)
+
+    def get_included_comments(self):
+        """
+        Number of latest comments to embed per post, from ``?include_comments=N``
+        on the list action; 0 when not requested.
+        """
+        if self.action != "list":
+            return 0
+        try:
+            included = int(self.request.query_params.get("include_comments", 0))
+        except ValueError:
+            return 0
+        return max(0, min(included, self.max_included_comments))
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        caching.invalidate_post(post)
+
+    def perform_update(self, serializer):
+        was_public = not serializer.instance.is_private
+        post = serializer.save()
+        caching.invalidate_post(post, was_public=was_public)
+
+    def perform_destroy(self, instance):
+        # Comments are purged in the background; see blog.deletion.
+        deletion.delete_posts([instance])
+
+    def get_validator_parts(self, post):
+        parts = (post.pk, post.updated_at.isoformat(), post.comments_count)
+        if hasattr(post, "latest_comments"):
+            parts += tuple((c.pk, c.updated_at.isoformat()) for c in post.latest_comments)
+        return parts
+
+    def list(self, request, *args, **kwargs):
+        key = caching.list_key(request)
+        cached = caching.get_cached(key)
+        if cached is not None:
+            data, etag = cached
+            response = conditional.not_modified(request, etag) or Response(data)
+            response["X-Cache"] = "HIT"
+            return conditional.set_validators(response, etag)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            caching.store(key, (response.data, response["ETag"]))
+        response["X-Cache"] = "MISS"
+        return response
 
     def retrieve(self, request, *args, **kwargs):
+        cached, public_key, private_key = caching.get_detail(request, kwargs["pk"])
+        if cached is not None:
+            data, etag = cached
+            response = conditional.not_modified(request, etag) or Response(data)
+            response["X-Cache"] = "HIT"
+            return conditional.set_validators(response, etag)
+
         instance = self.get_object()
-        if instance.is_private and instance.author != request.user:
+        if instance.is_private and instance.author_id != request.user.pk:
             return Response(
                 {"error": "You do not have permission to view this post."},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        etag = conditional.make_etag(request, self.get_validator_parts(instance))
+        response = conditional.not_modified(request, etag)
+        if response is None:
+            serializer = self.get_serializer(instance)
+            caching.store(private_key if instance.is_private else public_key, (serializer.data, etag))
+            response = conditional.set_validators(Response(serializer.data), etag)
+        response["X-Cache"] = "MISS"
+        return response
+
+    @action(detail=True, methods=["get"])
+    def comments(self, request, pk=None):
+        post = self.get_object()
+        queryset = post.comments.select_related("commenter").order_by("-created_at", "-id")
+        page = self.paginate_queryset(queryset)
+        serializer = CommentSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        error = bulk_payload_error(request.data)
+        if error is not None:
+            return error
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            posts = Post.objects.bulk_create(
+                Post(author=request.user, **attrs) for attrs in serializer.validated_data
+            )
+            caching.invalidate_posts(posts)
+
+        return Response(self.get_serializer(posts, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        return export_response(request, self.get_queryset(), PostSerializer)
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response(
+                {"error": "The 'q' query parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Results are ordered by rank, which keyset pagination cannot follow.
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(self.get_queryset().search(query), request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="cache-stats", permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        return Response({"posts": caching.stats(), "auth_tokens": authentication.stats()})
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -121,14 +317,27 @@ class PostViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(FastReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptInCursorPagination
+    fast_read_columns = ("pk", "created_at", "updated_at", "post__updated_at")
 
     def get_queryset(self):
-        return Comment.objects.select_related("post", "commenter").filter(
-            post__is_private=False
+        fields = fieldsets.selected_fields(self.request, self.get_serializer_class().Meta.fields)
+        # The post is always joined for the visibility rule and the ETag, but
+        # its body is never rendered here.
+        queryset = Comment.objects.visible().select_related("post").defer(
+            "post__content", "post__search_vector"
         )
+        if "commenter" in fields:
+            queryset = queryset.select_related("commenter")
+        if "comment_text" not in fields:
+            queryset = queryset.defer("comment_text")
+        return queryset
+
+    def get_validator_parts(self, comment):
+        return (comment.pk, comment.updated_at.isoformat(), comment.post.updated_at.isoformat())
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -149,9 +358,15 @@ class CommentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
         
-        comment = serializer.save(commenter=request.user)
+        with transaction.atomic():
+            comment = serializer.save(commenter=request.user)
+            Post.objects.filter(pk=post.pk).update(comments_count=F("comments_count") + 1)
+            caching.invalidate_post(post)
+            if settings.COMMENT_NOTIFICATION_MODE == "digest":
+                digest.add([comment])
         
-        send_comment_notification.delay(comment.id)
+        if settings.COMMENT_NOTIFICATION_MODE != "digest":
+            send_comment_notification.delay(comment.id)
         
         headers = self.get_success_headers(serializer.data)
         return Response(
@@ -160,6 +375,47 @@ class CommentViewSet(viewsets.ModelViewSet):
             headers=headers,
         )
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        error = bulk_payload_error(request.data)
+        if error is not None:
+            return error
+
+        post_ids = set()
+        for item in request.data:
+            try:
+                post_ids.add(int(item["post"]))
+            except (TypeError, ValueError, KeyError):
+                continue
+        context = self.get_serializer_context()
+        context["posts"] = Post.objects.in_bulk(post_ids)
+
+        serializer = BulkCommentSerializer(data=request.data, many=True, context=context)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            comments = Comment.objects.bulk_create(
+                Comment(commenter=request.user, **attrs) for attrs in serializer.validated_data
+            )
+            added = Counter(comment.post_id for comment in comments)
+            Post.objects.filter(pk__in=added).update(
+                comments_count=F("comments_count")
+                + Case(*(When(pk=post_id, then=Value(count)) for post_id, count in added.items()))
+            )
+            caching.invalidate_posts([comment.post for comment in comments])
+            if settings.COMMENT_NOTIFICATION_MODE == "digest":
+                digest.add(comments)
+
+        if settings.COMMENT_NOTIFICATION_MODE != "digest":
+            group(send_comment_notification.s(comment.id) for comment in comments).apply_async()
+
+        return Response(CommentSerializer(comments, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        return export_response(request, self.get_queryset(), CommentSerializer)
+
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.commenter != request.user:
@@ -169,6 +425,19 @@ class CommentViewSet(viewsets.ModelViewSet):
             )
         return super().update(request, *args, **kwargs)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_post = serializer.instance.post
+        comment = serializer.save()
+        if comment.post_id != previous_post.pk:
+            Post.objects.filter(pk=previous_post.pk).update(
+                comments_count=Greatest(F("comments_count") - 1, 0)
+            )
+            Post.objects.filter(pk=comment.post_id).update(comments_count=F("comments_count") + 1)
+            caching.invalidate_post(previous_post)
+        # Post lists can embed the latest comments, so edits invalidate too.
+        caching.invalidate_post(comment.post)
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.commenter != request.user:
@@ -179,3 +448,10 @@ class CommentViewSet(viewsets.ModelViewSet):
         
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post = instance.post
+        instance.delete()
+        Post.objects.filter(pk=post.pk).update(comments_count=Greatest(F("comments_count") - 1, 0))
+        caching.invalidate_post(post)
@@ -0,0 +1,18 @@
+"""
+gunicorn settings: ``gunicorn -c config/gunicorn.py config.wsgi``.
+
+Export PROMETHEUS_MULTIPROC_DIR, pointing at an empty directory, before
+starting gunicorn so /metrics aggregates over all workers.
+"""
+import os
+
+from prometheus_client import multiprocess
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 4))
+
+
+def child_exit(server, worker):
+    # Keep a dead worker's counters but drop its live-only samples.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "corsheaders",
@@ -41,10 +42,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "blog.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "blog.middleware.QueryInstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "blog.middleware.ReplicaRoutingMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -81,9 +85,65 @@ DATABASES = {
     }
 }
 
+# Connection pooling through psycopg_pool (psycopg 3): each worker process
+# keeps between DB_POOL_MIN_SIZE and DB_POOL_MAX_SIZE connections open and
+# requests wait up to DB_POOL_TIMEOUT seconds for a free one.
+if env.bool("DB_POOL", default=True):
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=10),
+            "timeout": env.int("DB_POOL_TIMEOUT", default=10),
+        },
+    }
+
+# Read replicas: one alias per host in DATABASE_REPLICAS (replica1,
+# replica2, ...) with the primary's credentials. Safe requests read from them
+# unless the client wrote within REPLICA_STICKY_SECONDS, which should exceed
+# the worst replication lag you expect.
+DATABASE_REPLICAS = env.list("DATABASE_REPLICAS", default=[])
+REPLICA_DATABASES = []
+for number, host in enumerate(DATABASE_REPLICAS, 1):
+    alias = f"replica{number}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host, "TEST": {"MIRROR": "default"}}
+    REPLICA_DATABASES.append(alias)
+DATABASE_ROUTERS = ["blog.routers.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=10)
+
+# Sleep this many milliseconds before every query, to load-test under a slow
+# database. Never set it in production.
+DB_SIMULATED_LATENCY_MS = env.int("DB_SIMULATED_LATENCY_MS", default=0)
+
+# SQL instrumentation: this fraction of requests records its queries, gets a
+# Server-Timing header and logs a summary to the "blog.sql" logger, with a
+# warning when one query shape repeats SQL_N_PLUS_ONE_THRESHOLD times.
+SQL_INSTRUMENTATION_SAMPLE_RATE = env.float("SQL_INSTRUMENTATION_SAMPLE_RATE", default=0.01)
+SQL_INSTRUMENTATION_SLOWEST = env.int("SQL_INSTRUMENTATION_SLOWEST", default=3)
+SQL_N_PLUS_ONE_THRESHOLD = env.int("SQL_N_PLUS_ONE_THRESHOLD", default=5)
+
+# Prometheus metrics at /metrics. Set PROMETHEUS_MULTIPROC_DIR (in the
+# environment, not here) to aggregate across gunicorn and Celery workers.
+# Only METRICS_ALLOWED_IPS may scrape; everyone else gets a 403. Add your
+# scrapers' addresses to the default of local requests only.
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", default=["127.0.0.1", "::1"])
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "blog.sql": {"handlers": ["console"], "level": env("SQL_LOG_LEVEL", default="INFO")},
+    },
+}
+
 
 
 
+AUTHENTICATION_BACKENDS = [
+    "blog.backends.EmailBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -117,16 +177,30 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "blog.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "blog.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
 }
 
+# Serve post and comment list/retrieve from values_list() rows instead of
+# DRF serializers (see blog/fastpath.py). The output is identical either way.
+FAST_READ_PATH = env.bool("FAST_READ_PATH", default=True)
+
+# Rows fetched per server-side cursor round trip by the NDJSON exports.
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+
+# Upper bound on the number of objects accepted by the bulk create endpoints.
+BULK_CREATE_MAX_ITEMS = env.int("BULK_CREATE_MAX_ITEMS", default=500)
+
 EMAIL_BACKEND = env("EMAIL_BACKEND", default="django.core.mail.backends.console.EmailBackend")
 EMAIL_HOST = env("EMAIL_HOST", default="smtp.gmail.com")
 EMAIL_PORT = env.int("EMAIL_PORT", default=587)
@@ -135,6 +209,67 @@ EMAIL_HOST_USER = env("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default=EMAIL_HOST_USER)
 
+# blog.mail.PooledEmailBackend keeps up to EMAIL_POOL_SIZE idle SMTP
+# connections per process and checks those idle for more than
+# EMAIL_POOL_CHECK_AFTER seconds with NOOP before reusing them.
+EMAIL_POOL_SIZE = env.int("EMAIL_POOL_SIZE", default=4)
+EMAIL_POOL_CHECK_AFTER = env.float("EMAIL_POOL_CHECK_AFTER", default=10)
+
+# send_comment_notification retries transient SMTP failures up to
+# EMAIL_MAX_RETRIES times, waiting a random time up to EMAIL_RETRY_BACKOFF * 2^n
+# seconds (at most EMAIL_RETRY_BACKOFF_MAX), and runs at most
+# EMAIL_TASK_RATE_LIMIT times per worker (Celery syntax, e.g. "10/s"; empty
+# for no limit).
+EMAIL_MAX_RETRIES = env.int("EMAIL_MAX_RETRIES", default=8)
+EMAIL_RETRY_BACKOFF = env.int("EMAIL_RETRY_BACKOFF", default=5)
+EMAIL_RETRY_BACKOFF_MAX = env.int("EMAIL_RETRY_BACKOFF_MAX", default=600)
+EMAIL_TASK_RATE_LIMIT = env("EMAIL_TASK_RATE_LIMIT", default="10/s") or None
+
+# Comment notifications: "immediate" sends one email per comment, "digest"
+# buffers them per post author and sends one email every COMMENT_DIGEST_WINDOW
+# seconds, quoting at most COMMENT_DIGEST_MAX_COMMENTS comments.
+COMMENT_NOTIFICATION_MODE = env("COMMENT_NOTIFICATION_MODE", default="immediate")
+COMMENT_DIGEST_WINDOW = env.int("COMMENT_DIGEST_WINDOW", default=300)
+COMMENT_DIGEST_MAX_COMMENTS = env.int("COMMENT_DIGEST_MAX_COMMENTS", default=50)
+
+# Transactional outbox for emails written during requests (e.g. signup
+# verification). Failed sends are retried after EMAIL_OUTBOX_RETRY_DELAY * 2^n
+# seconds, up to EMAIL_OUTBOX_MAX_ATTEMPTS times. A dispatcher claims a batch
+# for EMAIL_OUTBOX_CLAIM_TIMEOUT seconds; rows it did not finish by then are
+# picked up again.
+EMAIL_OUTBOX_BATCH_SIZE = env.int("EMAIL_OUTBOX_BATCH_SIZE", default=100)
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("EMAIL_OUTBOX_MAX_ATTEMPTS", default=8)
+EMAIL_OUTBOX_RETRY_DELAY = env.int("EMAIL_OUTBOX_RETRY_DELAY", default=30)
+EMAIL_OUTBOX_CLAIM_TIMEOUT = env.int("EMAIL_OUTBOX_CLAIM_TIMEOUT", default=300)
+
+# Deleted posts and user accounts are hidden at once and purged by the
+# purge_deleted task, DELETE_BATCH_SIZE rows per transaction. Celery beat also
+# runs it every DELETE_PURGE_INTERVAL seconds in case a purge was lost.
+DELETE_BATCH_SIZE = env.int("DELETE_BATCH_SIZE", default=1000)
+DELETE_PURGE_INTERVAL = env.int("DELETE_PURGE_INTERVAL", default=600)
+
+# Admin changelists of posts, comments and users show PostgreSQL's row
+# estimate instead of an exact COUNT(*) when unfiltered and the table holds at
+# least this many rows.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env.int("ADMIN_ESTIMATED_COUNT_THRESHOLD", default=100000)
+
+
+# Cache Configuration
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env("REDIS_CACHE_URL", default="redis://localhost:6379/1"),
+    }
+}
+POSTS_CACHE_TIMEOUT = env.int("POSTS_CACHE_TIMEOUT", default=300)
+
+# Token authentication cache: shared entries in Redis plus a short-lived
+# per-process LRU. Local hits are checked against a shared revocation epoch,
+# so revoking a token takes effect in every process on its next request.
+TOKEN_CACHE_TIMEOUT = env.int("TOKEN_CACHE_TIMEOUT", default=600)
+TOKEN_CACHE_LOCAL_TTL = env.int("TOKEN_CACHE_LOCAL_TTL", default=5)
+TOKEN_CACHE_LOCAL_MAXSIZE = env.int("TOKEN_CACHE_LOCAL_MAXSIZE", default=10000)
+
 
 # Celery Configuration
 CELERY_BROKER_URL = "redis://localhost:6379/0"
@@ -143,3 +278,17 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    "flush-comment-digests": {
+        "task": "blog.tasks.flush_comment_digests",
+        "schedule": COMMENT_DIGEST_WINDOW,
+    },
+    "dispatch-email-outbox": {
+        "task": "blog.tasks.dispatch_email_outbox",
+        "schedule": 60,
+    },
+    "purge-deleted": {
+        "task": "blog.tasks.purge_deleted",
+        "schedule": DELETE_PURGE_INTERVAL,
+    },
+}
@@ -1,11 +1,22 @@
 
 import pytest
+from django.core.cache import cache
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
+from blog import authentication
 from blog.models import Post, Comment
 
 
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
+    cache.clear()
+    authentication.get_local_cache().clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -38,6 +49,16 @@ def authenticated_client(api_client, create_user):
     return api_client
 
 
+@pytest.fixture
+def client_for():
+    def make_client(user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+    return make_client
+
+
 @pytest.fixture
 def create_post(db, create_user):
     def make_post(**kwargs):
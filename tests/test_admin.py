@@ -0,0 +1,166 @@
+"""
+Test cases for the admin at scale
+- Changelists run a fixed number of queries whatever the page size
+- Unfiltered changelists of large tables use the estimated row count
+- Foreign keys use autocomplete widgets instead of full selects
+- Search covers related usernames, emails and titles, one indexed column per branch
+"""
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from blog.admin import EstimatedCountPaginator
+from blog.models import Comment, Post
+
+
+@pytest.fixture
+def admin_client(client, create_user):
+    admin = create_user(username='admin', email='admin@example.com', is_staff=True, is_superuser=True)
+    client.force_login(admin)
+    client.admin = admin
+    return client
+
+
+def add_comments(count):
+    start = User.objects.count()
+    users = User.objects.bulk_create(
+        User(username=f'reader{n}', email=f'reader{n}@example.com') for n in range(start, start + count)
+    )
+    posts = Post.objects.bulk_create(
+        Post(title=f'Post {n}', content='Long content ' * 100, author=user) for n, user in enumerate(users)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, commenter=user, comment_text='Nice') for post, user in zip(posts, users)
+    )
+
+
+def changelist_queries(client, path):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(path)
+    assert response.status_code == 200
+    return captured
+
+
+@pytest.mark.django_db
+class TestChangelistQueries:
+
+    @pytest.mark.parametrize('path', ['/admin/blog/post/', '/admin/blog/comment/', '/admin/auth/user/'])
+    def test_query_count_does_not_grow_with_rows(self, admin_client, path):
+        add_comments(1)
+        few = len(changelist_queries(admin_client, path))
+        add_comments(20)
+        assert len(changelist_queries(admin_client, path)) == few
+
+    def test_comment_changelist_skips_post_content(self, admin_client):
+        add_comments(3)
+        captured = changelist_queries(admin_client, '/admin/blog/comment/')
+        page = next(query['sql'] for query in captured if 'INNER JOIN "blog_post"' in query['sql'])
+        assert '"blog_post"."title"' in page
+        assert '"blog_post"."content"' not in page
+        assert '"blog_comment"."comment_text"' not in page
+
+    def test_no_second_count_for_full_result(self, admin_client):
+        add_comments(3)
+        captured = changelist_queries(admin_client, '/admin/blog/post/?q=Post')
+        assert sum('COUNT(*)' in query['sql'] for query in captured) == 1
+
+
+@pytest.mark.django_db
+class TestEstimatedCount:
+
+    @pytest.fixture
+    def estimate(self, monkeypatch, settings):
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1000
+        monkeypatch.setattr(EstimatedCountPaginator, 'estimated_count', staticmethod(lambda queryset: 250000))
+
+    def test_unfiltered_changelist_uses_estimate(self, admin_client, estimate):
+        add_comments(2)
+        response = admin_client.get('/admin/blog/post/')
+        assert response.context['cl'].result_count == 250000
+
+    def test_filtered_changelist_counts_exactly(self, admin_client, estimate, create_post):
+        add_comments(2)
+        create_post(author=admin_client.admin, title='Hidden', is_private=True)
+        response = admin_client.get('/admin/blog/post/?is_private__exact=1')
+        assert response.context['cl'].result_count == 1
+        response = admin_client.get('/admin/blog/post/?q=Hidden')
+        assert response.context['cl'].result_count == 1
+
+    def test_small_estimate_counts_exactly(self, admin_client, monkeypatch):
+        add_comments(2)
+        monkeypatch.setattr(EstimatedCountPaginator, 'estimated_count', staticmethod(lambda queryset: 10))
+        response = admin_client.get('/admin/blog/post/')
+        assert response.context['cl'].result_count == 2
+
+    def test_no_estimate_outside_postgres(self):
+        if connection.vendor == 'postgresql':
+            pytest.skip('PostgreSQL provides an estimate')
+        assert EstimatedCountPaginator.estimated_count(Post.objects.all()) is None
+
+
+@pytest.mark.django_db
+class TestChangeForms:
+
+    @pytest.mark.parametrize('path', ['/admin/blog/post/add/', '/admin/blog/comment/add/'])
+    def test_foreign_keys_use_autocomplete(self, admin_client, path):
+        add_comments(5)
+        content = admin_client.get(path).content.decode()
+        assert 'admin-autocomplete' in content
+        assert 'reader4' not in content
+
+    def test_autocomplete_searches_users(self, admin_client):
+        add_comments(3)
+        response = admin_client.get(
+            '/admin/autocomplete/',
+            {'app_label': 'blog', 'model_name': 'comment', 'field_name': 'commenter', 'term': 'reader2'},
+        )
+        assert [result['text'] for result in response.json()['results']] == ['reader2']
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_post_search_matches_content(self, admin_client, create_post):
+        create_post(author=admin_client.admin, title='Plain', content='Mentions zeppelins once')
+        response = admin_client.get('/admin/blog/post/?q=zeppelin')
+        assert [post.title for post in response.context['cl'].result_list] == ['Plain']
+
+    def test_post_search_matches_author(self, admin_client, create_post):
+        create_post(author=admin_client.admin, title='Plain')
+        for term in ['admin', 'admin@example']:
+            response = admin_client.get(f'/admin/blog/post/?q={term}')
+            assert [post.title for post in response.context['cl'].result_list] == ['Plain']
+
+    def test_comment_search_matches_commenter_and_post(self, admin_client):
+        add_comments(3)
+        title = Post.objects.get(author__username='reader1').title
+        for term in ['reader1', 'reader1@example', f'"{title}"']:
+            response = admin_client.get('/admin/blog/comment/', {'q': term})
+            assert [str(comment.commenter) for comment in response.context['cl'].result_list] == ['reader1']
+
+    def test_search_terms_must_all_match(self, admin_client, create_post):
+        create_post(author=admin_client.admin, title='Zeppelins')
+        create_post(author=admin_client.admin, title='Balloons')
+        response = admin_client.get('/admin/blog/post/?q=admin zeppelin')
+        assert [post.title for post in response.context['cl'].result_list] == ['Zeppelins']
+
+    @pytest.mark.parametrize('path', ['/admin/blog/post/?q=Post', '/admin/blog/comment/?q=Post'])
+    def test_search_matches_one_column_per_branch(self, admin_client, path):
+        add_comments(1)
+        captured = changelist_queries(admin_client, path)
+        count = next(query['sql'] for query in captured if 'COUNT(*)' in query['sql'])
+        assert 'UNION' in count
+        assert ' OR ' not in count
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql', reason='Trigram indexes are PostgreSQL-only')
+    def test_trigram_indexes_exist(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname LIKE '%%trgm_idx'")
+            names = {row[0] for row in cursor.fetchall()}
+        assert {
+            'blog_post_title_trgm_idx',
+            'blog_post_content_trgm_idx',
+            'blog_comment_text_trgm_idx',
+            'blog_auth_user_username_trgm_idx',
+            'blog_auth_user_email_trgm_idx',
+        } <= names
@@ -0,0 +1,111 @@
+"""
+Test cases for the async read endpoints
+- Same payloads as the DRF endpoints
+- Token authentication and visibility
+- Pagination links and errors
+- Load-test command and simulated latency
+"""
+import time
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from blog.models import Comment
+from blog.signals import _delay_query, simulate_database_latency
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+
+    @pytest.fixture
+    def posts(self, authenticated_client, create_post, create_user):
+        other = create_user(username='other', email='other@example.com')
+        posts = [create_post(author=other, title=f'Post {i}') for i in range(25)]
+        posts.append(create_post(author=authenticated_client.user, title='Mine', is_private=True))
+        posts.append(create_post(author=other, title='Hidden', is_private=True))
+        Comment.objects.create(post=posts[0], commenter=other, comment_text='Hi')
+        return posts
+
+    @pytest.mark.parametrize('query', ['', '?page=2', '?page=last', '?fields=id,title', '?author=1'])
+    def test_post_list_matches_sync_endpoint(self, authenticated_client, posts, query):
+        sync = authenticated_client.get(f'/api/posts/{query}')
+        async_ = authenticated_client.get(f'/api/async/posts/{query}')
+
+        assert async_.status_code == status.HTTP_200_OK
+        assert async_.content == sync.content.replace(b'/api/posts/', b'/api/async/posts/')
+
+    def test_post_detail_matches_sync_endpoint(self, authenticated_client, posts):
+        for post in posts[-2:-1] + posts[:1]:
+            sync = authenticated_client.get(f'/api/posts/{post.id}/')
+            async_ = authenticated_client.get(f'/api/async/posts/{post.id}/')
+
+            assert async_.content == sync.content
+
+    def test_comment_list_matches_sync_endpoint(self, authenticated_client, posts):
+        sync = authenticated_client.get('/api/comments/')
+        async_ = authenticated_client.get('/api/async/comments/')
+
+        assert async_.content == sync.content
+
+    def test_private_posts_of_others_are_not_found(self, authenticated_client, posts):
+        response = authenticated_client.get(f'/api/async/posts/{posts[-1].id}/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json() == {'detail': 'No Post matches the given query.'}
+
+    def test_requires_token(self, api_client):
+        response = api_client.get('/api/async/posts/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response['WWW-Authenticate'] == 'Token'
+
+    def test_invalid_token_is_rejected(self, api_client):
+        api_client.credentials(HTTP_AUTHORIZATION='Token nope')
+
+        response = api_client.get('/api/async/posts/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json() == {'detail': 'Invalid token.'}
+
+    def test_invalid_page(self, authenticated_client, posts):
+        response = authenticated_client.get('/api/async/posts/?page=9')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_only_get_is_allowed(self, authenticated_client):
+        response = authenticated_client.post('/api/async/posts/', {'title': 'x'})
+
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+@pytest.mark.django_db(transaction=True)
+class TestLoadTest:
+
+    def test_reports_latency_percentiles(self, live_server, create_user):
+        token = Token.objects.create(user=create_user())
+        out = StringIO()
+
+        call_command('load_test', f'{live_server.url}/api/async/posts/', token=token.key,
+                     requests=6, concurrency=2, stdout=out)
+
+        assert '6 requests, concurrency 2' in out.getvalue()
+        assert '0 errors' in out.getvalue()
+        assert 'p99' in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestSimulatedLatency:
+
+    def test_queries_are_delayed(self, settings):
+        settings.DB_SIMULATED_LATENCY_MS = 50
+
+        simulate_database_latency(sender=None, connection=connection)
+        try:
+            start = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            assert time.perf_counter() - start >= 0.05
+        finally:
+            connection.execute_wrappers.remove(_delay_query)
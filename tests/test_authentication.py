@@ -1,19 +1,30 @@
 """
 Test cases for Authentication API endpoints
-- Signup
+- Signup and the email outbox
 - Login
+- Admin email login
+- Cached token authentication and its revocation
 """
+import smtplib
 import pytest
-from django.contrib.auth.models import User
+from datetime import timedelta
+from django.contrib.auth.models import User, update_last_login
+from django.core import mail
+from django.core.cache import cache
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+from blog import authentication
+from blog.admin import EmailAuthenticationForm
+from blog.models import OutboxEmail
+from blog.tasks import dispatch_email_outbox
 
 
 @pytest.mark.django_db
 class TestSignupView:
 
-    def test_successful_signup(self, api_client):
+    def test_successful_signup(self, api_client, django_capture_on_commit_callbacks):
         url = '/api/auth/signup/'
         data = {
             'username': 'newuser',
@@ -24,7 +35,9 @@ class TestSignupView:
             'last_name': 'User',
         }
         
-        with patch('blog.serializers.send_mail') as mock_send_mail:
+        with patch('blog.tasks.dispatch_email_outbox.delay') as mock_dispatch, \
+                patch('blog.tasks.send_mail') as mock_send_mail, \
+                django_capture_on_commit_callbacks(execute=True):
             response = api_client.post(url, data, format='json')
         
         assert response.status_code == status.HTTP_201_CREATED
@@ -37,7 +50,101 @@ class TestSignupView:
         assert user.email == 'newuser@example.com'
         assert user.is_active is False 
         
-        mock_send_mail.assert_called_once()
+        email = OutboxEmail.objects.get()
+        assert email.recipients == ['newuser@example.com']
+        assert email.status == OutboxEmail.STATUS_PENDING
+        mock_send_mail.assert_not_called()
+        mock_dispatch.assert_called_once()
+
+    def test_signup_survives_unreachable_broker(self, api_client, django_capture_on_commit_callbacks):
+        data = {
+            'username': 'newuser',
+            'email': 'newuser@example.com',
+            'password': 'newpass123',
+            'password_confirm': 'newpass123',
+        }
+
+        with patch('blog.tasks.dispatch_email_outbox.delay', side_effect=ConnectionError), \
+                django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post('/api/auth/signup/', data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING).count() == 1
+
+
+@pytest.mark.django_db
+class TestEmailOutboxDispatch:
+
+    def make_email(self, **kwargs):
+        defaults = {'subject': 'Hello', 'body': 'Body', 'recipients': ['to@example.com']}
+        defaults.update(kwargs)
+        return OutboxEmail.objects.create(**defaults)
+
+    def test_dispatch_sends_pending_emails(self, settings):
+        settings.EMAIL_OUTBOX_BATCH_SIZE = 2
+        emails = [self.make_email(subject=f'Mail {i}') for i in range(3)]
+
+        result = dispatch_email_outbox()
+
+        assert result == 'Dispatched 3 outbox email(s), 0 failed'
+        assert [m.subject for m in mail.outbox] == ['Mail 0', 'Mail 1', 'Mail 2']
+        for email in emails:
+            email.refresh_from_db()
+            assert email.status == OutboxEmail.STATUS_SENT
+            assert email.sent_at is not None
+
+    def test_dispatch_backs_off_and_gives_up(self, settings):
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 30
+        email = self.make_email()
+
+        with patch('blog.tasks.EmailMessage.send', side_effect=OSError('SMTP down')):
+            dispatch_email_outbox()
+            email.refresh_from_db()
+            assert email.status == OutboxEmail.STATUS_PENDING
+            assert email.attempts == 1
+            assert email.next_attempt_at > timezone.now() + timedelta(seconds=25)
+
+            OutboxEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            dispatch_email_outbox()
+
+        email.refresh_from_db()
+        assert email.status == OutboxEmail.STATUS_FAILED
+        assert email.last_error == 'SMTP down'
+
+
+    def test_empty_outbox_does_not_connect(self):
+        with patch('blog.tasks.get_connection') as get_connection:
+            result = dispatch_email_outbox()
+
+        assert result == 'Dispatched 0 outbox email(s), 0 failed'
+        get_connection.assert_not_called()
+
+    def test_rows_are_claimed_before_sending(self, settings):
+        settings.EMAIL_OUTBOX_CLAIM_TIMEOUT = 300
+        email = self.make_email()
+
+        def send(*args, **kwargs):
+            claimed = OutboxEmail.objects.get(pk=email.pk)
+            assert claimed.next_attempt_at > timezone.now() + timedelta(seconds=250)
+
+        with patch('blog.tasks.EmailMessage.send', side_effect=send):
+            assert dispatch_email_outbox() == 'Dispatched 1 outbox email(s), 0 failed'
+
+    def test_dropped_connection_is_reopened(self):
+        emails = [self.make_email(subject=f'Mail {i}') for i in range(3)]
+        connection = MagicMock()
+        sends = [smtplib.SMTPServerDisconnected('Connection unexpectedly closed'), None, None, None]
+
+        with patch('blog.tasks.get_connection', return_value=connection), \
+                patch('blog.tasks.EmailMessage.send', side_effect=sends):
+            result = dispatch_email_outbox()
+
+        assert result == 'Dispatched 3 outbox email(s), 0 failed'
+        assert connection.close.call_count == 2  # after the drop, and at the end
+        for email in emails:
+            email.refresh_from_db()
+            assert (email.status, email.attempts) == (OutboxEmail.STATUS_SENT, 1)
 
 
 @pytest.mark.django_db
@@ -67,3 +174,177 @@ class TestLoginView:
         token = Token.objects.get(user=user)
         assert response.data['token'] == token.key
 
+
+    def test_login_with_existing_token_takes_one_query(self, api_client, create_user, django_assert_num_queries):
+        user = create_user(email='login@example.com', password='loginpass123')
+        token = Token.objects.create(user=user)
+
+        with django_assert_num_queries(1):
+            response = api_client.post(
+                '/api/auth/login/', {'email': 'login@example.com', 'password': 'loginpass123'}, format='json'
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['token'] == token.key
+
+    def test_login_rejects_wrong_password(self, api_client, create_user):
+        create_user(email='login@example.com', password='loginpass123')
+
+        response = api_client.post(
+            '/api/auth/login/', {'email': 'login@example.com', 'password': 'wrong-password'}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Invalid email or password.' in str(response.data)
+
+    def test_login_reports_unverified_account(self, api_client, create_user):
+        create_user(email='login@example.com', password='loginpass123', is_active=False)
+
+        response = api_client.post(
+            '/api/auth/login/', {'email': 'login@example.com', 'password': 'loginpass123'}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Please verify your email address before logging in.' in str(response.data)
+
+
+@pytest.mark.django_db
+class TestAdminEmailLogin:
+
+    def test_admin_form_authenticates_with_one_query(self, rf, create_user, django_assert_num_queries):
+        user = create_user(email='admin@example.com', password='adminpass123', is_staff=True)
+
+        form = EmailAuthenticationForm(
+            rf.post('/admin/login/'), data={'username': 'admin@example.com', 'password': 'adminpass123'}
+        )
+        with django_assert_num_queries(1):
+            assert form.is_valid()
+
+        assert form.get_user() == user
+
+    def test_admin_form_rejects_bad_password(self, rf, create_user):
+        create_user(email='admin@example.com', password='adminpass123', is_staff=True)
+
+        form = EmailAuthenticationForm(
+            rf.post('/admin/login/'), data={'username': 'admin@example.com', 'password': 'nope'}
+        )
+
+        assert not form.is_valid()
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+
+    def test_repeat_requests_skip_token_query(self, authenticated_client, django_assert_num_queries):
+        authenticated_client.get('/api/comments/')
+
+        with django_assert_num_queries(1) as captured:  # COUNT(*) of the empty comment list
+            response = authenticated_client.get('/api/comments/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not any('authtoken_token' in q['sql'] for q in captured.captured_queries)
+
+    def test_shared_cache_serves_other_processes(self, authenticated_client, django_assert_num_queries):
+        authenticated_client.get('/api/comments/')
+        authentication.get_local_cache().clear()
+
+        with django_assert_num_queries(1):
+            authenticated_client.get('/api/comments/')
+
+        assert authentication.stats()['shared_hits'] >= 1
+
+    def test_deleted_token_is_rejected_immediately(self, authenticated_client):
+        authenticated_client.get('/api/comments/')
+
+        Token.objects.filter(user=authenticated_client.user).delete()
+        response = authenticated_client.get('/api/comments/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_is_rejected_immediately(self, authenticated_client):
+        authenticated_client.get('/api/comments/')
+
+        user = authenticated_client.user
+        user.is_active = False
+        user.save()
+        response = authenticated_client.get('/api/comments/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_revocation_reaches_other_processes(self, authenticated_client):
+        authenticated_client.get('/api/comments/')
+        key = Token.objects.get(user=authenticated_client.user).key
+        local_cache = authentication.get_local_cache()
+        epoch = authentication.current_epoch()
+        token = local_cache.get(key, epoch)
+
+        Token.objects.filter(key=key).delete()
+        local_cache.set(key, token, epoch)  # another process still holds its copy
+        response = authenticated_client.get('/api/comments/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_revocation_is_repeated_after_commit(self, authenticated_client, django_capture_on_commit_callbacks):
+        authenticated_client.get('/api/comments/')
+        user = authenticated_client.user
+        token = Token.objects.select_related('user').get(user=user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+            # A concurrent request read the row before the deactivation committed.
+            cache.set(authentication.shared_key(token.key), authentication.dump(token))
+        response = authenticated_client.get('/api/comments/')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_last_login_update_keeps_cached_tokens(self, authenticated_client, django_assert_num_queries):
+        authenticated_client.get('/api/comments/')
+        epoch = authentication.current_epoch()
+
+        update_last_login(None, authenticated_client.user)
+
+        assert authentication.current_epoch() == epoch
+        with django_assert_num_queries(1):  # COUNT(*) of the empty comment list
+            authenticated_client.get('/api/comments/')
+
+    def test_shared_cache_holds_no_password_hash(self, authenticated_client):
+        authenticated_client.get('/api/comments/')
+        user = authenticated_client.user
+        entry = cache.get(authentication.shared_key(Token.objects.get(user=user).key))
+
+        assert user.password not in repr(entry)
+        token = authentication.load(Token, entry)
+        assert token.user == user
+        assert 'password' in token.user.get_deferred_fields()
+
+    def test_saving_a_cached_user_keeps_its_password(self, authenticated_client):
+        authenticated_client.get('/api/comments/')
+        user = authenticated_client.user
+        entry = cache.get(authentication.shared_key(Token.objects.get(user=user).key))
+
+        cached_user = authentication.load(Token, entry).user
+        cached_user.first_name = 'Renamed'
+        cached_user.save()
+
+        user.refresh_from_db()
+        assert user.first_name == 'Renamed'
+        assert user.check_password('testpass123')
+
+    def test_local_cache_evicts_least_recently_used(self):
+        local_cache = authentication.LocalTokenCache(maxsize=2, ttl=60)
+        local_cache.set('a', 1, 0)
+        local_cache.set('b', 2, 0)
+        local_cache.get('a', 0)
+        local_cache.set('c', 3, 0)
+
+        assert local_cache.get('a', 0) == 1
+        assert local_cache.get('b', 0) is None
+        assert local_cache.get('c', 0) == 3
+
+    def test_local_cache_drops_entries_from_older_epochs(self):
+        local_cache = authentication.LocalTokenCache(maxsize=2, ttl=60)
+        local_cache.set('a', 1, 0)
+
+        assert local_cache.get('a', 1) is None
+        assert local_cache.get('a', 0) is None
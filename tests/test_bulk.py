@@ -0,0 +1,91 @@
+"""
+Test cases for the bulk create endpoints
+- Posts
+- Comments, including the private-post rule and grouped notifications
+"""
+import pytest
+from unittest.mock import patch
+from rest_framework import status
+from blog.models import Comment, Post
+
+
+@pytest.mark.django_db
+class TestBulkPostCreation:
+
+    def test_bulk_creates_posts_in_one_insert(self, authenticated_client, django_assert_max_num_queries):
+        data = [{'title': f'Post {i}', 'content': 'Body'} for i in range(10)]
+
+        with django_assert_max_num_queries(4) as captured:
+            response = authenticated_client.post('/api/posts/bulk/', data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [p['title'] for p in response.data] == [f'Post {i}' for i in range(10)]
+        assert all(p['author']['username'] == authenticated_client.user.username for p in response.data)
+        assert Post.objects.filter(author=authenticated_client.user).count() == 10
+        assert sum('INSERT' in q['sql'] for q in captured.captured_queries) == 1
+
+    def test_bulk_reports_per_item_errors_and_creates_nothing(self, authenticated_client):
+        data = [{'title': 'Good', 'content': 'Body'}, {'content': 'Missing title'}]
+
+        response = authenticated_client.post('/api/posts/bulk/', data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert 'title' in response.data[1]
+        assert not Post.objects.exists()
+
+    def test_bulk_rejects_non_list_and_oversized_payloads(self, authenticated_client, settings):
+        settings.BULK_CREATE_MAX_ITEMS = 2
+
+        not_a_list = authenticated_client.post('/api/posts/bulk/', {'title': 'x'}, format='json')
+        too_many = authenticated_client.post(
+            '/api/posts/bulk/', [{'title': 'x', 'content': 'y'}] * 3, format='json'
+        )
+
+        assert not_a_list.status_code == status.HTTP_400_BAD_REQUEST
+        assert too_many.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestBulkCommentCreation:
+
+    def test_bulk_creates_comments_with_one_post_lookup(self, authenticated_client, create_post, django_assert_max_num_queries):
+        first = create_post(author=authenticated_client.user, title='First')
+        second = create_post(author=authenticated_client.user, title='Second')
+        data = [
+            {'post': first.id, 'comment_text': 'a'},
+            {'post': first.id, 'comment_text': 'b'},
+            {'post': second.id, 'comment_text': 'c'},
+        ]
+
+        with patch('blog.views.group') as mock_group, django_assert_max_num_queries(6) as captured:
+            response = authenticated_client.post('/api/comments/bulk/', data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [c['post_title'] for c in response.data] == ['First', 'First', 'Second']
+        assert sum('FROM "blog_post"' in q['sql'] for q in captured.captured_queries) == 1
+        mock_group.return_value.apply_async.assert_called_once()
+        assert len(list(mock_group.call_args.args[0])) == 3
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert (first.comments_count, second.comments_count) == (2, 1)
+
+    def test_bulk_rejects_private_and_missing_posts_per_item(self, authenticated_client, create_post):
+        public = create_post(author=authenticated_client.user)
+        private = create_post(author=authenticated_client.user, is_private=True)
+        data = [
+            {'post': public.id, 'comment_text': 'ok'},
+            {'post': private.id, 'comment_text': 'nope'},
+            {'post': 999999, 'comment_text': 'missing'},
+        ]
+
+        with patch('blog.views.group') as mock_group:
+            response = authenticated_client.post('/api/comments/bulk/', data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data[0] == {}
+        assert response.data[1]['post'] == ['Cannot comment on private posts.']
+        assert 'post' in response.data[2]
+        assert not Comment.objects.exists()
+        mock_group.assert_not_called()
@@ -0,0 +1,96 @@
+"""
+Test cases for the post read-through cache
+- Public and author-only scopes
+- Invalidation on post and comment writes
+- Hit/miss counters
+"""
+import pytest
+from unittest.mock import patch
+from rest_framework import status
+from blog import caching
+
+
+@pytest.mark.django_db
+class TestPostCache:
+
+    def test_list_is_served_from_cache_on_second_request(self, authenticated_client, create_post, django_assert_num_queries):
+        create_post(author=authenticated_client.user)
+
+        first = authenticated_client.get('/api/posts/')
+        with django_assert_num_queries(0):
+            second = authenticated_client.get('/api/posts/')
+
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT'
+        assert second.data == first.data
+
+    def test_private_posts_never_reach_other_users(self, client_for, create_user, create_post):
+        author = create_user(username='author', email='author@example.com')
+        reader = create_user(username='reader', email='reader@example.com')
+        create_post(author=author, title='Public')
+        create_post(author=author, title='Secret', is_private=True)
+
+        author_titles = [p['title'] for p in client_for(author).get('/api/posts/').data['results']]
+        reader_response = client_for(reader).get('/api/posts/')
+
+        assert sorted(author_titles) == ['Public', 'Secret']
+        assert reader_response['X-Cache'] == 'MISS'
+        assert [p['title'] for p in reader_response.data['results']] == ['Public']
+
+    def test_private_detail_is_not_served_to_other_users(self, client_for, create_user, create_post):
+        author = create_user(username='author', email='author@example.com')
+        reader = create_user(username='reader', email='reader@example.com')
+        post = create_post(author=author, is_private=True)
+
+        assert client_for(author).get(f'/api/posts/{post.id}/').status_code == status.HTTP_200_OK
+        assert client_for(reader).get(f'/api/posts/{post.id}/').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_post_update_invalidates_list_and_detail(self, authenticated_client, create_post, django_capture_on_commit_callbacks):
+        post = create_post(author=authenticated_client.user, title='Before')
+        authenticated_client.get('/api/posts/')
+        authenticated_client.get(f'/api/posts/{post.id}/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.patch(f'/api/posts/{post.id}/', {'title': 'After'}, format='json')
+
+        listing = authenticated_client.get('/api/posts/')
+        detail = authenticated_client.get(f'/api/posts/{post.id}/')
+        assert listing['X-Cache'] == 'MISS'
+        assert listing.data['results'][0]['title'] == 'After'
+        assert detail['X-Cache'] == 'MISS'
+        assert detail.data['title'] == 'After'
+
+    def test_private_post_write_leaves_public_entries_alone(self, client_for, create_user, create_post, django_capture_on_commit_callbacks):
+        author = create_user(username='author', email='author@example.com')
+        reader = create_user(username='reader', email='reader@example.com')
+        create_post(author=author, title='Public')
+        reader_client = client_for(reader)
+        reader_client.get('/api/posts/')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client_for(author).post('/api/posts/', {'title': 'Draft', 'content': 'x', 'is_private': True}, format='json')
+
+        assert reader_client.get('/api/posts/')['X-Cache'] == 'HIT'
+
+    def test_comment_invalidates_post_detail(self, authenticated_client, create_post, django_capture_on_commit_callbacks):
+        post = create_post(author=authenticated_client.user)
+        authenticated_client.get(f'/api/posts/{post.id}/')
+
+        with django_capture_on_commit_callbacks(execute=True), patch('blog.views.send_comment_notification.delay'):
+            authenticated_client.post('/api/comments/', {'post': post.id, 'comment_text': 'Hi'}, format='json')
+
+        detail = authenticated_client.get(f'/api/posts/{post.id}/')
+        assert detail['X-Cache'] == 'MISS'
+        assert detail.data['comments_count'] == 1
+
+    def test_cache_stats_counts_hits_and_misses(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+        authenticated_client.get('/api/posts/')
+        authenticated_client.get('/api/posts/')
+
+        assert caching.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+    def test_cache_stats_endpoint_is_admin_only(self, authenticated_client):
+        response = authenticated_client.get('/api/posts/cache-stats/')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -2,8 +2,12 @@
 Test cases for Comments API endpoints
 - Create comment
 - Delete comment
+- Denormalized comments_count
+- Nested post comments
 """
 import pytest
+from io import StringIO
+from django.core.management import call_command
 from rest_framework import status
 from unittest.mock import patch
 from blog.models import Comment
@@ -35,3 +39,110 @@ class TestCommentAddition:
         
         mock_task.assert_called_once()
 
+
+
+@pytest.mark.django_db
+class TestCommentsCount:
+
+    def test_comment_addition_increments_counter(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+
+        with patch('blog.views.send_comment_notification.delay'):
+            authenticated_client.post('/api/comments/', {'post': post.id, 'comment_text': 'First'}, format='json')
+            authenticated_client.post('/api/comments/', {'post': post.id, 'comment_text': 'Second'}, format='json')
+
+        post.refresh_from_db()
+        assert post.comments_count == 2
+
+        response = authenticated_client.get(f'/api/posts/{post.id}/')
+        assert response.data['comments_count'] == 2
+
+    def test_comment_deletion_decrements_counter(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        with patch('blog.views.send_comment_notification.delay'):
+            response = authenticated_client.post(
+                '/api/comments/', {'post': post.id, 'comment_text': 'Bye'}, format='json'
+            )
+
+        response = authenticated_client.delete(f"/api/comments/{response.data['id']}/")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        post.refresh_from_db()
+        assert post.comments_count == 0
+
+    def test_post_list_does_not_query_comments(self, authenticated_client, create_post, django_assert_max_num_queries):
+        for i in range(5):
+            post = create_post(author=authenticated_client.user, title=f'Post {i}')
+            Comment.objects.create(post=post, commenter=authenticated_client.user, comment_text='Hi')
+
+        with django_assert_max_num_queries(4) as captured:
+            response = authenticated_client.get('/api/posts/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not any('blog_comment' in query['sql'] for query in captured.captured_queries)
+
+    def test_recount_comments_command_repairs_drift(self, create_post, create_user):
+        post = create_post()
+        Comment.objects.create(post=post, commenter=post.author, comment_text='One')
+        Comment.objects.create(post=post, commenter=post.author, comment_text='Two')
+        other = create_post(author=post.author)
+        type(post).objects.filter(pk=other.pk).update(comments_count=7)
+
+        out = StringIO()
+        call_command('recount_comments', stdout=out)
+
+        post.refresh_from_db()
+        other.refresh_from_db()
+        assert post.comments_count == 2
+        assert other.comments_count == 0
+        assert 'Repaired comments_count on 2 post(s).' in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestPostComments:
+
+    def make_comments(self, post, count):
+        return [
+            Comment.objects.create(post=post, commenter=post.author, comment_text=f'Comment {i}')
+            for i in range(count)
+        ]
+
+    def test_nested_comments_are_scoped_to_the_post(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        other = create_post(author=authenticated_client.user, title='Other')
+        comments = self.make_comments(post, 3)
+        self.make_comments(other, 2)
+
+        response = authenticated_client.get(f'/api/posts/{post.id}/comments/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 3
+        assert [c['id'] for c in response.data['results']] == [c.id for c in reversed(comments)]
+        assert all(c['post_title'] == post.title for c in response.data['results'])
+
+    def test_nested_comments_hide_private_posts_from_others(self, authenticated_client, create_post, create_user):
+        other = create_user(username='other', email='other@example.com')
+        post = create_post(author=other, is_private=True)
+
+        response = authenticated_client.get(f'/api/posts/{post.id}/comments/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_include_comments_embeds_latest_n_per_post(self, authenticated_client, create_post, django_assert_max_num_queries):
+        posts = [create_post(author=authenticated_client.user, title=f'Post {i}') for i in range(4)]
+        latest = {post.id: [c.id for c in reversed(self.make_comments(post, 5))][:2] for post in posts}
+
+        with django_assert_max_num_queries(5) as captured:
+            response = authenticated_client.get('/api/posts/?include_comments=2')
+
+        assert response.status_code == status.HTTP_200_OK
+        for item in response.data['results']:
+            assert [c['id'] for c in item['latest_comments']] == latest[item['id']]
+        assert sum('blog_comment' in q['sql'] for q in captured.captured_queries) == 1
+
+    def test_list_omits_comments_unless_requested(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+
+        response = authenticated_client.get('/api/posts/')
+
+        assert 'latest_comments' not in response.data['results'][0]
@@ -0,0 +1,119 @@
+"""
+Test cases for conditional GETs
+- ETag / If-None-Match on post and comment lists and details
+- No Last-Modified, so If-Modified-Since alone never hides a new comment
+"""
+import pytest
+from unittest.mock import patch
+from rest_framework import status
+from blog.models import Comment
+
+
+@pytest.mark.django_db
+class TestPostConditionalGet:
+
+    def test_list_returns_304_for_matching_etag(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+        etag = authenticated_client.get('/api/posts/')['ETag']
+
+        response = authenticated_client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+
+    def test_list_304_skips_serializer_on_cache_miss(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+        etag = authenticated_client.get('/api/posts/')['ETag']
+
+        with patch('blog.caching.get_cached', return_value=None), \
+                patch('blog.views.PostSerializer.to_representation') as to_representation:
+            response = authenticated_client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        to_representation.assert_not_called()
+
+    def test_list_etag_changes_with_comment_counter(self, authenticated_client, create_post, django_capture_on_commit_callbacks):
+        post = create_post(author=authenticated_client.user)
+        etag = authenticated_client.get('/api/posts/')['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True), patch('blog.views.send_comment_notification.delay'):
+            authenticated_client.post('/api/comments/', {'post': post.id, 'comment_text': 'Hi'}, format='json')
+        response = authenticated_client.get('/api/posts/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_list_etag_depends_on_query_parameters(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+
+        plain = authenticated_client.get('/api/posts/')['ETag']
+        cursor = authenticated_client.get('/api/posts/?pagination=cursor')['ETag']
+
+        assert plain != cursor
+
+    def test_detail_if_modified_since_does_not_hide_new_comment(
+        self, authenticated_client, create_post, django_capture_on_commit_callbacks
+    ):
+        post = create_post(author=authenticated_client.user)
+        first = authenticated_client.get(f'/api/posts/{post.id}/')
+        assert 'Last-Modified' not in first
+
+        with django_capture_on_commit_callbacks(execute=True), patch('blog.views.send_comment_notification.delay'):
+            authenticated_client.post('/api/comments/', {'post': post.id, 'comment_text': 'Hi'}, format='json')
+        response = authenticated_client.get(
+            f'/api/posts/{post.id}/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['comments_count'] == 1
+
+    def test_detail_returns_304_for_matching_etag(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        etag = authenticated_client.get(f'/api/posts/{post.id}/')['ETag']
+
+        with patch('blog.caching.get_detail', return_value=(None, 'public', 'private')):
+            response = authenticated_client.get(f'/api/posts/{post.id}/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+class TestCommentConditionalGet:
+
+    def test_comment_list_and_detail_support_etags(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        comment = Comment.objects.create(post=post, commenter=authenticated_client.user, comment_text='Hi')
+
+        list_etag = authenticated_client.get('/api/comments/')['ETag']
+        detail_etag = authenticated_client.get(f'/api/comments/{comment.id}/')['ETag']
+
+        assert authenticated_client.get(
+            '/api/comments/', HTTP_IF_NONE_MATCH=list_etag
+        ).status_code == status.HTTP_304_NOT_MODIFIED
+        assert authenticated_client.get(
+            f'/api/comments/{comment.id}/', HTTP_IF_NONE_MATCH=detail_etag
+        ).status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_comment_detail_if_modified_since_does_not_hide_post_rename(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        comment = Comment.objects.create(post=post, commenter=authenticated_client.user, comment_text='Hi')
+        assert 'Last-Modified' not in authenticated_client.get(f'/api/comments/{comment.id}/')
+
+        authenticated_client.patch(f'/api/posts/{post.id}/', {'title': 'Renamed'}, format='json')
+        response = authenticated_client.get(
+            f'/api/comments/{comment.id}/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['post_title'] == 'Renamed'
+
+    def test_comment_edit_changes_etag(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        comment = Comment.objects.create(post=post, commenter=authenticated_client.user, comment_text='Hi')
+        etag = authenticated_client.get(f'/api/comments/{comment.id}/')['ETag']
+
+        authenticated_client.patch(f'/api/comments/{comment.id}/', {'comment_text': 'Edited'}, format='json')
+        response = authenticated_client.get(f'/api/comments/{comment.id}/', HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['comment_text'] == 'Edited'
@@ -0,0 +1,208 @@
+"""
+Test cases for deferred deletion
+- Deleted posts disappear at once and are purged with their comments later
+- User deletion deactivates, hides and purges in batches
+- Admin actions, and the delete permissions they require on dependants
+"""
+import pytest
+from unittest.mock import patch
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from blog import deletion
+from blog.models import Comment, Post, UserDeletion
+from blog.tasks import purge_deleted
+
+
+@pytest.fixture
+def commented_post(authenticated_client, create_user, create_post):
+    post = create_post(author=authenticated_client.user)
+    reader = create_user(username='reader', email='reader@example.com')
+    Comment.objects.bulk_create(
+        Comment(post=post, commenter=reader, comment_text=f'Comment {n}') for n in range(7)
+    )
+    Post.objects.recount_comments()
+    return post
+
+
+@pytest.mark.django_db
+class TestPostDeletion:
+
+    def test_delete_hides_post_and_schedules_purge(self, authenticated_client, commented_post, django_capture_on_commit_callbacks):
+        with patch('blog.tasks.purge_deleted.delay') as mock_purge:
+            with django_capture_on_commit_callbacks(execute=True):
+                response = authenticated_client.delete(f'/api/posts/{commented_post.id}/')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        mock_purge.assert_called_once()
+        assert authenticated_client.get(f'/api/posts/{commented_post.id}/').status_code == 404
+        assert authenticated_client.get('/api/comments/').data['count'] == 0
+        assert not Post.objects.filter(pk=commented_post.pk).exists()
+        assert Post.all_objects.get(pk=commented_post.pk).deleted_at is not None
+        assert Comment.objects.filter(post_id=commented_post.pk).count() == 7
+
+    def test_purge_removes_post_and_comments_in_batches(self, commented_post):
+        deletion.delete_posts([commented_post])
+
+        with override_settings(DELETE_BATCH_SIZE=3), CaptureQueriesContext(connection) as captured:
+            result = purge_deleted()
+
+        assert result == 'Purged 1 post(s) and 0 user(s)'
+        assert not Post.all_objects.filter(pk=commented_post.pk).exists()
+        assert not Comment.objects.exists()
+        batches = [q['sql'] for q in captured.captured_queries if '"blog_comment"."id" IN' in q['sql']]
+        assert len(batches) == 3
+
+    def test_commenting_on_deleted_post_is_rejected(self, authenticated_client, commented_post):
+        deletion.delete_posts([commented_post])
+
+        response = authenticated_client.post(
+            '/api/comments/', {'post': commented_post.id, 'comment_text': 'Too late'}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestUserDeletion:
+
+    def test_delete_users_deactivates_and_hides_posts(self, authenticated_client, commented_post):
+        user = authenticated_client.user
+
+        with patch('blog.tasks.purge_deleted.delay'):
+            deletion.delete_users([user])
+
+        user.refresh_from_db()
+        assert not user.is_active
+        assert UserDeletion.objects.filter(user=user).exists()
+        assert not Post.objects.filter(author=user).exists()
+        assert authenticated_client.get('/api/posts/').status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_delete_users_drops_cached_post_details(
+        self, authenticated_client, client_for, commented_post, django_capture_on_commit_callbacks
+    ):
+        reader = client_for(User.objects.get(username='reader'))
+        path = f'/api/posts/{commented_post.id}/'
+        reader.get(path)
+        assert reader.get(path)['X-Cache'] == 'HIT'
+
+        with patch('blog.tasks.purge_deleted.delay'):
+            with django_capture_on_commit_callbacks(execute=True):
+                deletion.delete_users([authenticated_client.user])
+
+        assert reader.get(path).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_purge_removes_user_and_fixes_other_counters(self, authenticated_client, create_post, create_user, commented_post):
+        reader = User.objects.get(username='reader')
+        other = create_post(author=create_user(username='other', email='other@example.com'))
+        Comment.objects.create(post=other, commenter=reader, comment_text='Mine')
+        Comment.objects.create(post=other, commenter=other.author, comment_text='Kept')
+        Post.objects.recount_comments()
+        deletion.delete_users([reader])
+
+        with override_settings(DELETE_BATCH_SIZE=2):
+            result = purge_deleted()
+
+        assert result == 'Purged 0 post(s) and 1 user(s)'
+        assert not User.objects.filter(pk=reader.pk).exists()
+        assert not Comment.objects.filter(commenter_id=reader.pk).exists()
+        other.refresh_from_db()
+        assert other.comments_count == 1
+        commented_post.refresh_from_db()
+        assert commented_post.comments_count == 0
+
+    def test_purge_removes_users_posts(self, authenticated_client, commented_post):
+        user = authenticated_client.user
+        deletion.delete_users([user])
+
+        purge_deleted()
+
+        assert not User.objects.filter(pk=user.pk).exists()
+        assert not Post.all_objects.exists()
+        assert not Comment.objects.exists()
+        assert not Token.objects.exists()
+
+
+@pytest.mark.django_db
+class TestAdminDeletion:
+
+    @pytest.fixture
+    def admin_client(self, client, create_user):
+        admin = create_user(username='admin', email='admin@example.com', is_staff=True, is_superuser=True)
+        client.force_login(admin)
+        return client
+
+    def test_post_action_defers_deletion(self, admin_client, commented_post):
+        response = admin_client.post(
+            '/admin/blog/post/',
+            {'action': 'delete_selected', '_selected_action': [commented_post.pk], 'post': 'yes'},
+        )
+
+        assert response.status_code == 302
+        assert Post.all_objects.get(pk=commented_post.pk).deleted_at is not None
+        assert Comment.objects.filter(post_id=commented_post.pk).count() == 7
+
+    def test_post_delete_view_defers_deletion(self, admin_client, commented_post):
+        response = admin_client.post(f'/admin/blog/post/{commented_post.pk}/delete/', {'post': 'yes'})
+
+        assert response.status_code == 302
+        assert Post.all_objects.get(pk=commented_post.pk).deleted_at is not None
+        assert Comment.objects.filter(post_id=commented_post.pk).count() == 7
+
+    def test_confirmation_does_not_collect_comments(self, admin_client, commented_post):
+        with CaptureQueriesContext(connection) as captured:
+            response = admin_client.get(f'/admin/blog/post/{commented_post.pk}/delete/')
+
+        assert response.status_code == 200
+        assert not any('"blog_comment"' in q['sql'] for q in captured.captured_queries)
+
+    def test_user_action_defers_deletion(self, admin_client, commented_post):
+        author = commented_post.author
+
+        response = admin_client.post(
+            '/admin/auth/user/', {'action': 'delete_selected', '_selected_action': [author.pk], 'post': 'yes'}
+        )
+
+        assert response.status_code == 302
+        assert UserDeletion.objects.filter(user=author).exists()
+        assert not User.objects.get(pk=author.pk).is_active
+
+    def test_user_delete_view_defers_deletion(self, admin_client, commented_post):
+        author = commented_post.author
+
+        response = admin_client.post(f'/admin/auth/user/{author.pk}/delete/', {'post': 'yes'})
+
+        assert response.status_code == 302
+        assert UserDeletion.objects.filter(user=author).exists()
+        assert Post.all_objects.filter(author=author).exists()
+
+    @pytest.fixture
+    def user_deleter_client(self, client, create_user):
+        staff = create_user(username='staff', email='staff@example.com', is_staff=True)
+        staff.user_permissions.set(
+            Permission.objects.filter(content_type__app_label='auth', codename__in=['view_user', 'delete_user'])
+        )
+        client.force_login(staff)
+        return client
+
+    @pytest.mark.parametrize('path', ['/admin/auth/user/', '/admin/auth/user/{pk}/delete/'])
+    def test_user_deletion_needs_delete_permission_on_dependants(self, user_deleter_client, commented_post, path):
+        author = commented_post.author
+        data = {'post': 'yes'}
+        if path == '/admin/auth/user/':
+            data.update(action='delete_selected', _selected_action=[author.pk])
+
+        response = user_deleter_client.post(path.format(pk=author.pk), data)
+
+        assert response.status_code == 403
+        assert User.objects.get(pk=author.pk).is_active
+        assert not UserDeletion.objects.exists()
+
+    def test_confirmation_lists_missing_permissions(self, user_deleter_client, commented_post):
+        response = user_deleter_client.get(f'/admin/auth/user/{commented_post.author.pk}/delete/')
+
+        assert response.status_code == 200
+        assert response.context['perms_lacking'] == {'post', 'comment', 'user deletion'}
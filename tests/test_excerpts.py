@@ -0,0 +1,140 @@
+"""
+Test cases for post excerpts
+- Excerpt and word count computed on save, import and backfill
+- Lists serve the excerpt without reading content; details keep the body
+"""
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from rest_framework import status
+from blog.models import EXCERPT_LENGTH, Post, make_excerpt
+from tests.test_import import run_import, write_jsonl
+
+LONG_CONTENT = ' '.join(f'word{n}' for n in range(200))
+
+
+class TestMakeExcerpt:
+
+    def test_short_content_is_kept_with_whitespace_collapsed(self):
+        assert make_excerpt('Hello\n\n  world ') == 'Hello world'
+
+    def test_long_content_is_cut_at_a_word_boundary(self):
+        excerpt = make_excerpt(LONG_CONTENT)
+
+        assert len(excerpt) <= EXCERPT_LENGTH
+        assert excerpt.endswith('…')
+        assert LONG_CONTENT.startswith(excerpt[:-1])
+        assert excerpt[:-1].split()[-1] in LONG_CONTENT.split()
+
+    def test_single_long_word_is_truncated(self):
+        excerpt = make_excerpt('x' * 1000)
+
+        assert excerpt == 'x' * (EXCERPT_LENGTH - 1) + '…'
+
+
+@pytest.mark.django_db
+class TestPostExcerpts:
+
+    def test_create_stores_excerpt_and_word_count(self, authenticated_client):
+        response = authenticated_client.post('/api/posts/', {'title': 'Long', 'content': LONG_CONTENT}, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        post = Post.objects.get(pk=response.data['id'])
+        assert post.excerpt == make_excerpt(LONG_CONTENT)
+        assert post.word_count == 200
+        assert response.data['content'] == LONG_CONTENT
+        assert response.data['word_count'] == 200
+
+    def test_update_refreshes_excerpt(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+
+        authenticated_client.patch(f'/api/posts/{post.id}/', {'content': 'New body here'}, format='json')
+        authenticated_client.patch(f'/api/posts/{post.id}/', {'title': 'Only the title'}, format='json')
+
+        post.refresh_from_db()
+        assert post.excerpt == 'New body here'
+        assert post.word_count == 3
+
+    def test_excerpt_is_read_only(self, authenticated_client):
+        response = authenticated_client.post(
+            '/api/posts/', {'title': 'T', 'content': 'Real body', 'excerpt': 'Fake', 'word_count': 99}, format='json'
+        )
+
+        assert response.data['excerpt'] == 'Real body'
+        assert response.data['word_count'] == 2
+
+    def test_bulk_create_stores_excerpts(self, authenticated_client):
+        response = authenticated_client.post(
+            '/api/posts/bulk/', [{'title': 'A', 'content': 'One two'}, {'title': 'B', 'content': LONG_CONTENT}], format='json'
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert sorted(Post.objects.values_list('word_count', flat=True)) == [2, 200]
+
+    def test_list_serves_excerpt_without_reading_content(self, authenticated_client, django_assert_max_num_queries):
+        authenticated_client.post('/api/posts/', {'title': 'Long', 'content': LONG_CONTENT}, format='json')
+
+        with django_assert_max_num_queries(5) as captured:
+            response = authenticated_client.get('/api/posts/')
+
+        [post] = response.data['results']
+        assert 'content' not in post
+        assert post['excerpt'] == make_excerpt(LONG_CONTENT)
+        assert post['word_count'] == 200
+        assert '"blog_post"."content"' not in captured.captured_queries[-1]['sql']
+
+    def test_search_and_async_list_serve_excerpts(self, authenticated_client):
+        authenticated_client.post('/api/posts/', {'title': 'Long', 'content': LONG_CONTENT}, format='json')
+
+        searched = authenticated_client.get('/api/posts/search/?q=word1').data['results']
+        async_listed = authenticated_client.get('/api/async/posts/').json()['results']
+
+        assert 'content' not in searched[0] and 'excerpt' in searched[0]
+        assert 'content' not in async_listed[0] and 'excerpt' in async_listed[0]
+
+    def test_retrieve_returns_full_content(self, authenticated_client):
+        created = authenticated_client.post('/api/posts/', {'title': 'Long', 'content': LONG_CONTENT}, format='json')
+
+        response = authenticated_client.get(f"/api/posts/{created.data['id']}/")
+
+        assert response.data['content'] == LONG_CONTENT
+        assert response.data['excerpt'] == make_excerpt(LONG_CONTENT)
+
+    def test_import_stores_excerpts(self, tmp_path, create_user):
+        create_user(email='author@example.com')
+        path = write_jsonl(tmp_path / 'posts.jsonl', [{'title': 'T', 'content': 'Imported body', 'author': 'author@example.com'}])
+
+        run_import('posts', path)
+
+        post = Post.objects.get()
+        assert (post.excerpt, post.word_count) == ('Imported body', 2)
+
+
+@pytest.mark.django_db
+class TestBackfillExcerpts:
+
+    def test_fills_missing_excerpts_only(self, create_user, create_post):
+        author = create_user()
+        old = create_post(author=author, content=LONG_CONTENT)
+        done = create_post(author=author, content='Already done')
+        Post.objects.filter(pk=done.pk).update(excerpt='Kept', word_count=1)
+        updated_at = Post.objects.get(pk=old.pk).updated_at
+        out = StringIO()
+
+        call_command('backfill_excerpts', batch_size=1, stdout=out)
+
+        old.refresh_from_db()
+        assert old.excerpt == make_excerpt(LONG_CONTENT)
+        assert old.word_count == 200
+        assert old.updated_at == updated_at
+        assert Post.objects.get(pk=done.pk).excerpt == 'Kept'
+        assert 'Backfilled excerpts of 1 post(s).' in out.getvalue()
+
+    def test_all_recomputes_every_post(self, create_post):
+        post = create_post(content='Fresh text')
+        Post.objects.filter(pk=post.pk).update(excerpt='Stale', word_count=7)
+
+        call_command('backfill_excerpts', all=True, stdout=StringIO())
+
+        post.refresh_from_db()
+        assert (post.excerpt, post.word_count) == ('Fresh text', 2)
@@ -0,0 +1,99 @@
+"""
+Test cases for the NDJSON exports
+- Visibility rules and since= filtering
+- Parity with the API representation
+- export_blog command
+"""
+import datetime
+import json
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from rest_framework import status
+from blog.models import Comment, Post
+
+
+def read_ndjson(response):
+    body = b''.join(response.streaming_content)
+    return [json.loads(line) for line in body.splitlines()]
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_post_export_streams_visible_posts(self, authenticated_client, create_post, create_user):
+        other = create_user(username='other', email='other@example.com')
+        create_post(author=authenticated_client.user, title='Mine', is_private=True)
+        create_post(author=other, title='Public')
+        create_post(author=other, title='Hidden', is_private=True)
+
+        response = authenticated_client.get('/api/posts/export/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert response.streaming
+        assert [p['title'] for p in read_ndjson(response)] == ['Mine', 'Public']
+
+    def test_export_lines_match_api_objects(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user, title='Line\nbreak')
+
+        exported = read_ndjson(authenticated_client.get('/api/posts/export/'))
+
+        assert exported == [json.loads(authenticated_client.get(f'/api/posts/{post.id}/').content)]
+
+    def test_since_filters_on_updated_at(self, authenticated_client, create_post):
+        old = create_post(author=authenticated_client.user, title='Old')
+        Post.objects.filter(pk=old.pk).update(updated_at=timezone.now() - datetime.timedelta(days=3))
+        create_post(author=authenticated_client.user, title='New')
+        since = (timezone.now() - datetime.timedelta(days=1)).date().isoformat()
+
+        response = authenticated_client.get(f'/api/posts/export/?since={since}')
+
+        assert [p['title'] for p in read_ndjson(response)] == ['New']
+
+    def test_invalid_since_is_rejected(self, authenticated_client):
+        response = authenticated_client.get('/api/posts/export/?since=yesterday')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_comment_export_skips_private_posts(self, authenticated_client, create_post):
+        user = authenticated_client.user
+        public = create_post(author=user)
+        private = create_post(author=user, is_private=True)
+        Comment.objects.create(post=public, commenter=user, comment_text='Visible')
+        Comment.objects.create(post=private, commenter=user, comment_text='Hidden')
+
+        response = authenticated_client.get('/api/comments/export/?fields=comment_text')
+
+        assert read_ndjson(response) == [{'comment_text': 'Visible'}]
+
+    def test_export_requires_authentication(self, api_client):
+        assert api_client.get('/api/posts/export/').status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_command_exports_in_chunks(self, create_post, create_user):
+        author = create_user()
+        for i in range(5):
+            create_post(author=author, title=f'Post {i}')
+        create_post(author=author, title='Draft', is_private=True)
+        out, err = StringIO(), StringIO()
+
+        call_command('export_blog', 'posts', chunk_size=2, stdout=out, stderr=err)
+
+        titles = [json.loads(line)['title'] for line in out.getvalue().splitlines()]
+        assert titles == [f'Post {i}' for i in range(5)]
+        assert 'Exported 5 posts' in err.getvalue()
+
+    def test_command_includes_private_posts_for_user(self, create_post, create_user, tmp_path):
+        author = create_user()
+        create_post(author=author, title='Draft', is_private=True)
+        output = tmp_path / 'posts.ndjson'
+
+        call_command('export_blog', 'posts', user=author.username, output=str(output), stderr=StringIO())
+
+        assert [json.loads(line)['title'] for line in output.read_text().splitlines()] == ['Draft']
+
+    def test_command_rejects_unknown_user(self):
+        with pytest.raises(CommandError):
+            call_command('export_blog', 'posts', user='nobody')
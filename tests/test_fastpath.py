@@ -0,0 +1,138 @@
+"""
+Test cases for the read fast path
+- Byte-for-byte parity with the DRF serializers
+- Fallback for serializers a plan cannot express
+- orjson renderer parity with JSONRenderer
+"""
+import datetime
+import decimal
+import uuid
+import pytest
+from unittest.mock import patch
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from blog.fastpath import get_plan
+from blog.models import Comment
+from blog.renderers import FastJSONRenderer
+from blog.serializers import CommentSerializer, PostSerializer, PostWithCommentsSerializer
+
+
+TRICKY_TEXT = 'Café  line para "quoted" \\ </script> \U0001f600 \t\n\x01'
+
+
+def fetch_both(client, settings, url):
+    responses = []
+    for fast in (False, True):
+        settings.FAST_READ_PATH = fast
+        cache.clear()
+        responses.append(client.get(url))
+    return responses
+
+
+@pytest.mark.django_db
+class TestFastReadPath:
+
+    @pytest.fixture
+    def corpus(self, authenticated_client, create_post, create_user):
+        user = authenticated_client.user
+        user.first_name = 'Zoë'
+        user.save()
+        other = create_user(username='other', email='other@example.com', last_name=TRICKY_TEXT)
+        posts = [
+            create_post(author=user, title=TRICKY_TEXT, content=''),
+            create_post(author=other, title='Plain', content=TRICKY_TEXT * 3),
+            create_post(author=user, title='Mine', is_private=True),
+        ]
+        for post in posts[:2]:
+            Comment.objects.create(post=post, commenter=other, comment_text=TRICKY_TEXT)
+            Comment.objects.create(post=post, commenter=user, comment_text='ok')
+        return posts
+
+    @pytest.mark.parametrize('url', [
+        '/api/posts/',
+        '/api/posts/?pagination=cursor',
+        '/api/posts/?fields=id,title,author',
+        '/api/posts/?omit=excerpt,word_count',
+        '/api/comments/',
+        '/api/comments/?fields=post,post_title,commenter',
+    ])
+    def test_list_matches_serializer_output(self, authenticated_client, settings, corpus, url):
+        slow, fast = fetch_both(authenticated_client, settings, url)
+
+        assert fast.status_code == slow.status_code == 200
+        assert fast.content == slow.content
+        assert fast.content == JSONRenderer().render(slow.data)
+        assert fast['ETag'] == slow['ETag']
+
+    def test_detail_matches_serializer_output(self, authenticated_client, settings, corpus):
+        for path in [f'/api/posts/{corpus[0].id}/', f'/api/posts/{corpus[2].id}/',
+                     f'/api/comments/{corpus[0].comments.first().id}/']:
+            slow, fast = fetch_both(authenticated_client, settings, path)
+
+            assert fast.status_code == 200
+            assert fast.content == slow.content
+            assert fast['ETag'] == slow['ETag']
+
+    def test_private_detail_still_forbidden(self, api_client, settings, corpus, create_user):
+        stranger = create_user(username='stranger', email='stranger@example.com')
+        api_client.force_authenticate(stranger)
+
+        slow, fast = fetch_both(api_client, settings, f'/api/posts/{corpus[2].id}/')
+
+        assert fast.status_code == slow.status_code == 404
+
+    def test_serializer_is_bypassed(self, authenticated_client, corpus):
+        with patch.object(PostSerializer, 'to_representation', side_effect=AssertionError):
+            response = authenticated_client.get('/api/posts/')
+
+        assert response.status_code == 200
+        assert len(response.data['results']) == 3
+
+    def test_list_skips_model_instances(self, authenticated_client, corpus, django_assert_max_num_queries):
+        with django_assert_max_num_queries(5) as captured:
+            authenticated_client.get('/api/posts/?fields=id,title')
+
+        page_sql = captured.captured_queries[-1]['sql']
+        assert '"blog_post"."content"' not in page_sql
+        assert 'auth_user' not in page_sql
+
+    def test_plans_compile_for_read_serializers(self):
+        assert get_plan(PostSerializer, frozenset(PostSerializer.Meta.fields)) is not None
+        assert get_plan(CommentSerializer, frozenset(CommentSerializer.Meta.fields)) is not None
+
+    def test_nested_lists_fall_back_to_serializer(self, authenticated_client, settings, corpus):
+        fields = frozenset(PostWithCommentsSerializer.Meta.fields)
+        assert get_plan(PostWithCommentsSerializer, fields) is None
+
+        slow, fast = fetch_both(authenticated_client, settings, '/api/posts/?include_comments=2')
+
+        assert fast.content == slow.content
+
+
+class TestFastJSONRenderer:
+
+    def test_matches_json_renderer(self):
+        data = {
+            'text': TRICKY_TEXT,
+            'when': datetime.datetime(2024, 5, 1, 12, 30, 1, 123456, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 5, 1),
+            'time': datetime.time(8, 15, 30, 500000),
+            'span': datetime.timedelta(seconds=90),
+            'price': decimal.Decimal('1.50'),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy('Invalid token.'),
+            'numbers': [1, 0.5, -3, True, None],
+            7: 'int key',
+        }
+
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indented_output_falls_back(self):
+        data = {'a': [1, 2]}
+        context = {'indent': 2}
+
+        assert FastJSONRenderer().render(data, renderer_context=context) == JSONRenderer().render(data, renderer_context=context)
+
+    def test_none_renders_empty(self):
+        assert FastJSONRenderer().render(None) == b''
@@ -0,0 +1,103 @@
+"""
+Test cases for sparse fieldsets
+- fields/omit on post and comment responses
+- Column and join pruning
+- Benchmark command
+"""
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from rest_framework import status
+from blog.models import Comment
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_fields_limits_post_list(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+
+        response = authenticated_client.get('/api/posts/?fields=id,title')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert set(response.data['results'][0]) == {'id', 'title'}
+
+    def test_omit_drops_post_fields(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+
+        response = authenticated_client.get(f'/api/posts/{post.id}/?omit=content,author')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'content' not in response.data
+        assert 'author' not in response.data
+        assert response.data['title'] == post.title
+
+    def test_unknown_field_is_rejected(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+
+        response = authenticated_client.get('/api/posts/?fields=id,nope')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_omitted_columns_and_joins_are_not_fetched(self, authenticated_client, create_post, django_assert_max_num_queries):
+        create_post(author=authenticated_client.user)
+
+        with django_assert_max_num_queries(5) as captured:
+            response = authenticated_client.get('/api/posts/?omit=excerpt,author')
+
+        assert response.status_code == status.HTTP_200_OK
+        page_sql = captured.captured_queries[-1]['sql']
+        assert '"blog_post"."content"' not in page_sql
+        assert '"blog_post"."excerpt"' not in page_sql
+        assert 'auth_user' not in page_sql
+
+    def test_full_response_still_joins_author(self, authenticated_client, create_post, django_assert_max_num_queries):
+        post = create_post(author=authenticated_client.user)
+
+        with django_assert_max_num_queries(5) as captured:
+            authenticated_client.get('/api/posts/')
+
+        page_sql = captured.captured_queries[-1]['sql']
+        assert '"blog_post"."excerpt"' in page_sql
+        assert 'auth_user' in page_sql
+        detail = authenticated_client.get(f'/api/posts/{post.id}/?omit=author')
+        assert detail.data['content'] == post.content
+
+    def test_comment_fields_skip_commenter_join(self, authenticated_client, create_post, django_assert_max_num_queries):
+        post = create_post(author=authenticated_client.user)
+        Comment.objects.create(post=post, commenter=authenticated_client.user, comment_text='Hi')
+
+        with django_assert_max_num_queries(5) as captured:
+            response = authenticated_client.get('/api/comments/?fields=id,post_title')
+
+        assert response.data['results'] == [{'id': post.comments.get().id, 'post_title': post.title}]
+        page_sql = captured.captured_queries[-1]['sql']
+        assert 'auth_user' not in page_sql
+        assert '"blog_post"."content"' not in page_sql
+
+    def test_writes_ignore_fieldsets(self, authenticated_client):
+        response = authenticated_client.post(
+            '/api/posts/?fields=id', {'title': 'New', 'content': 'Body'}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['content'] == 'Body'
+
+    def test_nested_comments_are_not_pruned_by_post_fields(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        Comment.objects.create(post=post, commenter=authenticated_client.user, comment_text='Hi')
+
+        response = authenticated_client.get('/api/posts/?include_comments=1&fields=id,latest_comments')
+
+        item = response.data['results'][0]
+        assert set(item) == {'id', 'latest_comments'}
+        assert item['latest_comments'][0]['comment_text'] == 'Hi'
+
+    def test_benchmark_command_reports_variants(self):
+        out = StringIO()
+
+        call_command('benchmark_fieldsets', posts=30, repeat=2, stdout=out)
+
+        output = out.getvalue()
+        assert 'fields=id,title' in output
+        assert 'omit=excerpt,author' in output
@@ -0,0 +1,163 @@
+"""
+Test cases for the import_blog command
+- Users, posts and comments from JSONL and CSV
+- Batched author lookups and invalid records
+- Deferred comment counters and timestamps
+- Search index kept in place unless the import is offline
+"""
+import json
+import pytest
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from blog.importing import SEARCH_INDEX, PostImporter, _copy_value
+from blog.models import Comment, Post
+
+
+def write_jsonl(path, records):
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+
+def run_import(*args, **options):
+    out, err = StringIO(), StringIO()
+    call_command('import_blog', *args, stdout=out, stderr=err, **options)
+    return out.getvalue(), err.getvalue()
+
+
+@pytest.mark.django_db
+class TestImportBlog:
+
+    def test_imports_users(self, tmp_path, create_user):
+        create_user(username='taken', email='taken@example.com')
+        hashed = User(username='x')
+        hashed.set_password('secret123')
+        path = write_jsonl(tmp_path / 'users.jsonl', [
+            {'username': 'alice', 'email': 'alice@example.com', 'password': hashed.password},
+            {'username': 'bob', 'email': 'bob@example.com', 'is_active': False},
+            {'username': 'taken', 'email': 'other@example.com'},
+            {'username': 'alice', 'email': 'again@example.com'},
+        ])
+
+        out, err = run_import('users', path)
+
+        alice = User.objects.get(username='alice')
+        assert alice.check_password('secret123')
+        assert not User.objects.get(username='bob').has_usable_password()
+        assert not User.objects.get(username='bob').is_active
+        assert 'Imported 2 users' in out
+        assert "line 3: username 'taken' already exists" in err
+        assert "line 4: username 'alice' already exists" in err
+
+    def test_imports_posts_from_csv(self, tmp_path, create_user):
+        create_user(username='author', email='author@example.com')
+        path = tmp_path / 'posts.csv'
+        path.write_text(
+            'title,content,author_email,is_private,created_at\n'
+            'First,"Body, with comma",author@example.com,false,2020-01-02T03:04:05Z\n'
+            'Second,Body,author@example.com,yes,\n'
+            'Orphan,Body,ghost@example.com,no,\n'
+            ',No title,author@example.com,no,\n'
+        )
+
+        out, err = run_import('posts', str(path), chunk_size=2)
+
+        first = Post.objects.get(title='First')
+        assert first.content == 'Body, with comma'
+        assert first.created_at.year == 2020
+        assert not first.is_private
+        assert Post.objects.get(title='Second').is_private
+        assert 'Imported 2 posts' in out
+        assert "line 4: no user with email 'ghost@example.com'" in err
+        assert 'line 5: title is required' in err
+
+    def test_author_emails_are_resolved_per_chunk(self, tmp_path, create_user, django_assert_max_num_queries):
+        create_user(username='author', email='author@example.com')
+        path = write_jsonl(tmp_path / 'posts.jsonl', [
+            {'title': f'Post {i}', 'content': 'x', 'author': {'email': 'author@example.com'}}
+            for i in range(50)
+        ])
+
+        with django_assert_max_num_queries(8):
+            run_import('posts', path)
+
+        assert Post.objects.count() == 50
+
+    def test_comments_update_counters_at_the_end(self, tmp_path, create_post, create_user):
+        commenter = create_user(username='reader', email='reader@example.com')
+        post = create_post(author=create_user(username='author', email='author@example.com'))
+        path = write_jsonl(tmp_path / 'comments.jsonl', [
+            {'post': post.id, 'comment_text': 'One', 'commenter': {'email': commenter.email}},
+            {'post': post.id, 'comment_text': 'Two', 'commenter_email': commenter.email},
+            {'post': 999999, 'comment_text': 'Lost', 'commenter_email': commenter.email},
+        ])
+
+        out, err = run_import('comments', path)
+
+        post.refresh_from_db()
+        assert post.comments_count == 2
+        assert Comment.objects.filter(post=post).count() == 2
+        assert 'line 3: no post with id 999999' in err
+
+    def test_export_output_round_trips_with_ids(self, tmp_path, create_post, create_user):
+        author = create_user(username='author', email='author@example.com')
+        create_post(author=author, title='Kept', content='Tab\there')
+        exported = tmp_path / 'posts.ndjson'
+        call_command('export_blog', 'posts', output=str(exported), stderr=StringIO())
+        records = [json.loads(line) for line in exported.read_text().splitlines()]
+        Post.objects.all().delete()
+
+        out, err = run_import('posts', str(exported), keep_ids=True)
+
+        post = Post.objects.get()
+        assert post.id == records[0]['id']
+        assert post.content == 'Tab\there'
+        assert post.created_at.isoformat().replace('+00:00', 'Z') == records[0]['created_at']
+
+    def test_invalid_json_lines_are_skipped(self, tmp_path, create_user):
+        create_user(username='author', email='author@example.com')
+        path = tmp_path / 'posts.jsonl'
+        path.write_text('{not json}\n\n{"title": "Ok", "author_email": "author@example.com"}\n')
+
+        out, err = run_import('posts', str(path))
+
+        assert 'line 1: not a JSON object' in err
+        assert Post.objects.filter(title='Ok').exists()
+
+
+@pytest.mark.django_db
+class TestSearchIndexDuringImport:
+
+    def test_online_import_leaves_index_and_trigger(self):
+        importer = PostImporter()
+        importer.use_copy = True
+
+        with CaptureQueriesContext(connection) as captured:
+            importer.begin()
+
+        assert captured.captured_queries == []
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql', reason='Search index is PostgreSQL-only')
+    @pytest.mark.parametrize('offline', [False, True])
+    def test_imported_posts_are_searchable(self, tmp_path, create_user, offline):
+        create_user(username='author', email='author@example.com')
+        path = write_jsonl(tmp_path / 'posts.jsonl', [
+            {'title': 'Zeppelins', 'content': 'Airships', 'author': {'email': 'author@example.com'}},
+        ])
+
+        run_import('posts', path, offline=offline)
+
+        assert list(Post.objects.search('zeppelin').values_list('title', flat=True)) == ['Zeppelins']
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM pg_indexes WHERE indexname = %s', [SEARCH_INDEX])
+            assert cursor.fetchone()
+
+
+class TestCopyFormat:
+
+    def test_copy_values_are_escaped(self):
+        assert _copy_value(None) == '\\N'
+        assert _copy_value(True) == 't'
+        assert _copy_value('a\\b\tc\nd\re') == 'a\\\\b\\tc\\nd\\re'
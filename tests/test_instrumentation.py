@@ -0,0 +1,172 @@
+"""
+Test cases for SQL instrumentation
+- Server-Timing header and request summary log on sampled requests
+- Likely N+1 query shapes are flagged with the view name
+- Sync and async views
+- The metrics timer keeps no SQL and carries the sampled recorder
+"""
+import logging
+import pytest
+from asgiref.sync import async_to_sync
+from unittest.mock import patch
+from django.db import connection
+from django.test import AsyncClient
+from blog import views
+from blog.instrumentation import QueryRecorder, QueryTimer, query_shape
+from blog.models import Post
+
+
+@pytest.fixture
+def sample_all(settings):
+    settings.SQL_INSTRUMENTATION_SAMPLE_RATE = 1.0
+
+
+def sql_records(caplog, level=logging.INFO):
+    return [r for r in caplog.records if r.name == 'blog.sql' and r.levelno == level]
+
+
+class TestQueryShape:
+
+    def test_parameters_and_in_lists_collapse(self):
+        first = query_shape('SELECT * FROM "blog_post" WHERE "id" IN (%s, %s) LIMIT 21')
+        second = query_shape('SELECT *  FROM "blog_post"\nWHERE "id" IN (%s) LIMIT 5')
+
+        assert first == second == 'SELECT * FROM "blog_post" WHERE "id" IN (...) LIMIT ?'
+
+    def test_string_literals_collapse(self):
+        assert query_shape("SELECT 1 WHERE name = 'it''s'") == 'SELECT ? WHERE name = ?'
+
+
+@pytest.mark.django_db
+class TestQueryRecorder:
+
+    def test_repeated_shapes_are_reported(self, create_user, create_post):
+        author = create_user()
+        posts = [create_post(author=author, title=f'Post {n}') for n in range(2)]
+        recorder = QueryRecorder()
+        recorder.install()
+        try:
+            for post in posts:
+                Post.objects.get(pk=post.pk)
+            Post.objects.count()
+        finally:
+            recorder.uninstall()
+
+        assert len(recorder.queries) == 3
+        repeated = recorder.repeated_shapes(threshold=2)
+        assert len(repeated) == 1
+        assert repeated[0]['count'] == 2
+        assert '"blog_post"' in repeated[0]['sql']
+        assert len(recorder.slowest(2)) == 2
+
+    def test_uninstall_stops_recording(self):
+        recorder = QueryRecorder()
+        recorder.install()
+        recorder.uninstall()
+
+        Post.objects.count()
+
+        assert recorder.queries == []
+
+    def test_timer_only_sums_durations(self):
+        timer = QueryTimer()
+        timer.install()
+        try:
+            Post.objects.count()
+        finally:
+            timer.uninstall()
+
+        assert timer.seconds > 0
+        assert not hasattr(timer, 'queries')
+
+    def test_recorder_attached_to_timer(self):
+        timer, recorder = QueryTimer(), QueryRecorder()
+        timer.install()
+        recorder.attach(timer)
+        try:
+            Post.objects.count()
+            recorder.uninstall()
+            Post.objects.count()
+        finally:
+            timer.uninstall()
+
+        assert len(recorder.queries) == 1
+        assert timer.recorder is None
+
+
+@pytest.mark.django_db
+class TestQueryInstrumentationMiddleware:
+
+    def test_sampled_request_adds_no_second_wrapper(self, authenticated_client, sample_all):
+        wrappers = []
+        list_posts = views.PostViewSet.list
+
+        def spy(view, request, *args, **kwargs):
+            wrappers.append(len(connection.execute_wrappers))
+            return list_posts(view, request, *args, **kwargs)
+
+        with patch.object(views.PostViewSet, 'list', spy):
+            response = authenticated_client.get('/api/posts/')
+
+        assert 'Server-Timing' in response
+        assert wrappers == [1]
+
+    def test_sampled_request_gets_server_timing(self, authenticated_client, create_post, sample_all):
+        create_post(author=authenticated_client.user)
+
+        response = authenticated_client.get('/api/posts/')
+
+        timing = response['Server-Timing']
+        assert timing.startswith('db;dur=')
+        assert 'queries"' in timing
+        assert 'db-slow-1;dur=' in timing
+
+    def test_summary_is_logged_with_view_name(self, authenticated_client, create_post, sample_all, caplog):
+        create_post(author=authenticated_client.user)
+        caplog.set_level(logging.INFO, logger='blog.sql')
+
+        authenticated_client.get('/api/posts/')
+
+        [record] = sql_records(caplog)
+        assert record.sql['view'] == 'post-list'
+        assert record.sql['status'] == 200
+        assert record.sql['queries'] >= 1
+        assert len(record.sql['slowest']) <= 3
+        assert record.sql['db_ms'] >= 0
+        assert 'view=post-list' in record.getMessage()
+
+    def test_repeated_shapes_log_a_warning(self, authenticated_client, create_post, sample_all, settings, caplog):
+        settings.SQL_N_PLUS_ONE_THRESHOLD = 1
+        create_post(author=authenticated_client.user)
+        caplog.set_level(logging.INFO, logger='blog.sql')
+
+        authenticated_client.get('/api/posts/')
+
+        warnings = sql_records(caplog, logging.WARNING)
+        assert warnings
+        assert all(r.sql['view'] == 'post-list' for r in warnings)
+        assert 'Likely N+1' in warnings[0].getMessage()
+
+    def test_unsampled_requests_are_untouched(self, authenticated_client, settings, caplog):
+        settings.SQL_INSTRUMENTATION_SAMPLE_RATE = 0
+        caplog.set_level(logging.INFO, logger='blog.sql')
+
+        response = authenticated_client.get('/api/posts/')
+
+        assert 'Server-Timing' not in response
+        assert sql_records(caplog) == []
+
+    def test_async_views_are_instrumented(self, authenticated_client, create_post, sample_all, caplog):
+        create_post(author=authenticated_client.user)
+        token = authenticated_client.user.auth_token.key
+        caplog.set_level(logging.INFO, logger='blog.sql')
+
+        response = async_to_sync(AsyncClient().get)(
+            '/api/async/posts/', headers={'Authorization': f'Token {token}'}
+        )
+
+        assert response.status_code == 200
+        assert 'Server-Timing' in response
+        [record] = sql_records(caplog)
+        assert record.sql['view'] == 'async-post-list'
+        assert record.sql['queries'] >= 2
@@ -0,0 +1,150 @@
+"""
+Test cases for pooled SMTP delivery
+- Consecutive sends reuse one pooled connection
+- Stale and failed connections are replaced
+- Comment notifications retry transient failures and drop permanent ones
+"""
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from django.core.mail import EmailMessage
+from blog import mail
+from blog.mail import PooledEmailBackend
+from blog.models import Comment
+from blog.tasks import send_comment_notification
+
+
+class RecordingHandler:
+    """
+    Counts logins (EHLO) and records messages. DATA is answered with the
+    queued ``replies`` first, then with 250.
+    """
+
+    def __init__(self):
+        self.logins = 0
+        self.messages = []
+        self.replies = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.logins += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(envelope)
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(settings):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    settings.EMAIL_BACKEND = 'blog.mail.PooledEmailBackend'
+    settings.EMAIL_HOST = '127.0.0.1'
+    settings.EMAIL_PORT = controller.port
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_HOST_USER = 'blog@example.com'
+    settings.EMAIL_HOST_PASSWORD = ''
+    settings.EMAIL_POOL_CHECK_AFTER = 10
+    yield handler
+    mail.pool.close_all()
+    controller.stop()
+
+
+def send(to='reader@example.com'):
+    message = EmailMessage(subject='Hi', body='Hello', from_email='blog@example.com', to=[to])
+    return PooledEmailBackend().send_messages([message])
+
+
+class TestPooledEmailBackend:
+
+    def test_sends_reuse_one_connection(self, smtp_server):
+        for n in range(3):
+            assert send(f'reader{n}@example.com') == 1
+
+        assert len(smtp_server.messages) == 3
+        assert smtp_server.logins == 1
+
+    def test_pool_is_bounded(self, smtp_server, settings):
+        settings.EMAIL_POOL_SIZE = 1
+        first, second = PooledEmailBackend(), PooledEmailBackend()
+        first.open()
+        second.open()
+        first.close()
+        second.close()
+
+        assert len(mail.pool._idle[first.pool_key]) == 1
+
+    def test_stale_connection_is_replaced(self, smtp_server, settings):
+        send()
+        settings.EMAIL_POOL_CHECK_AFTER = 0
+        [(connection, _)] = mail.pool._idle[PooledEmailBackend().pool_key]
+        connection.sock.shutdown(socket.SHUT_RDWR)
+
+        assert send() == 1
+        assert smtp_server.logins == 2
+
+    def test_failed_connection_is_not_pooled(self, smtp_server):
+        smtp_server.replies = ['451 Try again later']
+
+        with pytest.raises(OSError):
+            send()
+
+        assert not mail.pool._idle.get(PooledEmailBackend().pool_key)
+        assert send() == 1
+
+    def test_pool_is_forgotten_after_fork(self, smtp_server):
+        send()
+        mail.pool.forget()
+
+        assert send() == 1
+        assert smtp_server.logins == 2
+
+
+@pytest.mark.django_db
+class TestCommentNotificationRetries:
+
+    @pytest.fixture
+    def comment(self, create_user, create_post):
+        post = create_post(author=create_user(username='author', email='author@example.com'))
+        reader = create_user(username='reader', email='reader@example.com')
+        return Comment.objects.create(post=post, commenter=reader, comment_text='Nice')
+
+    def test_transient_failure_is_retried(self, smtp_server, comment):
+        smtp_server.replies = ['451 Try again later', '421 Too busy']
+
+        result = send_comment_notification.apply(args=(comment.id,))
+
+        assert result.get() == 'Email notification sent to author@example.com'
+        assert [message.rcpt_tos for message in smtp_server.messages] == [['author@example.com']]
+
+    def test_retries_are_bounded(self, smtp_server, comment, monkeypatch):
+        monkeypatch.setattr(send_comment_notification, 'max_retries', 1)
+        smtp_server.replies = ['451 Try again later'] * 3
+
+        result = send_comment_notification.apply(args=(comment.id,))
+
+        assert result.failed()
+        assert smtp_server.replies == ['451 Try again later']
+
+    def test_permanent_failure_is_not_retried(self, smtp_server, comment):
+        smtp_server.replies = ['550 Mailbox unavailable', '550 Mailbox unavailable']
+
+        result = send_comment_notification.apply(args=(comment.id,))
+
+        assert result.get().startswith('Error sending email:')
+        assert smtp_server.replies == ['550 Mailbox unavailable']
+
+    def test_task_options(self, settings):
+        assert send_comment_notification.retry_jitter is True
+        assert send_comment_notification.retry_backoff == settings.EMAIL_RETRY_BACKOFF
+        assert send_comment_notification.rate_limit == settings.EMAIL_TASK_RATE_LIMIT
@@ -0,0 +1,114 @@
+"""
+Test cases for Prometheus metrics
+- Request latency, status and DB time per DRF view and action
+- Celery task duration and outcome
+- /metrics exposition, access control and multiprocess aggregation
+"""
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from prometheus_client import REGISTRY
+from rest_framework import status
+from blog import metrics
+from blog.models import Comment
+from blog.tasks import send_comment_notification
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+
+    def test_view_and_action_are_labelled(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+        labels = {'view': 'PostViewSet.list', 'method': 'GET'}
+        before = sample('blog_http_requests_total', status='200', **labels)
+        latency_before = sample('blog_http_request_duration_seconds_count', **labels)
+        db_before = sample('blog_http_request_db_duration_seconds_count', view='PostViewSet.list')
+
+        authenticated_client.get('/api/posts/')
+
+        assert sample('blog_http_requests_total', status='200', **labels) == before + 1
+        assert sample('blog_http_request_duration_seconds_count', **labels) == latency_before + 1
+        assert sample('blog_http_request_db_duration_seconds_count', view='PostViewSet.list') == db_before + 1
+        assert sample('blog_http_request_db_duration_seconds_sum', view='PostViewSet.list') > 0
+
+    def test_comment_create_is_labelled(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        before = sample('blog_http_requests_total', view='CommentViewSet.create', method='POST', status='201')
+
+        with patch('blog.views.send_comment_notification.delay'):
+            response = authenticated_client.post(
+                '/api/comments/', {'post': post.id, 'comment_text': 'Hi'}, format='json'
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert sample('blog_http_requests_total', view='CommentViewSet.create', method='POST', status='201') == before + 1
+
+    def test_api_view_status_is_counted(self, api_client):
+        before = sample('blog_http_requests_total', view='LoginView', method='POST', status='400')
+
+        api_client.post('/api/auth/login/', {'email': 'nobody@example.com', 'password': 'x'}, format='json')
+
+        assert sample('blog_http_requests_total', view='LoginView', method='POST', status='400') == before + 1
+
+    def test_unrouted_requests_share_a_label(self, api_client):
+        before = sample('blog_http_requests_total', view='unmatched', method='GET', status='404')
+
+        api_client.get('/no/such/page/')
+
+        assert sample('blog_http_requests_total', view='unmatched', method='GET', status='404') == before + 1
+
+
+@pytest.mark.django_db
+class TestTaskMetrics:
+
+    def test_task_duration_and_outcome(self, create_user, create_post):
+        author = create_user()
+        post = create_post(author=author)
+        comment = Comment.objects.create(post=post, commenter=author, comment_text='Hi')
+        labels = {'task': 'blog.tasks.send_comment_notification'}
+        before = sample('blog_celery_tasks_total', outcome='SUCCESS', **labels)
+        duration_before = sample('blog_celery_task_duration_seconds_count', **labels)
+
+        send_comment_notification.apply(args=(comment.id,))
+
+        assert sample('blog_celery_tasks_total', outcome='SUCCESS', **labels) == before + 1
+        assert sample('blog_celery_task_duration_seconds_count', **labels) == duration_before + 1
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+
+    def test_exposes_metrics(self, authenticated_client):
+        authenticated_client.get('/api/posts/')
+
+        response = authenticated_client.get('/metrics')
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        assert b'blog_http_requests_total{' in response.content
+        assert b'blog_http_request_db_duration_seconds_bucket{' in response.content
+
+    def test_restricted_to_allowed_ips(self, api_client, settings):
+        settings.METRICS_ALLOWED_IPS = ['10.0.0.5']
+
+        assert api_client.get('/metrics').status_code == status.HTTP_403_FORBIDDEN
+        assert api_client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code == status.HTTP_200_OK
+
+    def test_denied_when_no_ips_allowed(self, api_client, settings):
+        settings.METRICS_ALLOWED_IPS = []
+
+        assert api_client.get('/metrics').status_code == status.HTTP_403_FORBIDDEN
+
+    def test_aggregates_worker_processes(self, tmp_path, monkeypatch):
+        env = {'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+        worker = "from prometheus_client import Counter; Counter('blog_test_hits', 'Hits.').inc(2)"
+        for _ in range(3):
+            subprocess.run([sys.executable, '-c', worker], env=env, check=True)
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+
+        assert b'blog_test_hits_total 6.0' in metrics.collect()
@@ -0,0 +1,120 @@
+"""
+Test cases for comment notifications
+- Digest buffering per post author, in the comment's transaction
+- Digest flush over a single connection, re-queueing only failed digests
+"""
+import pytest
+from unittest.mock import patch
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.db import transaction
+from blog import digest
+from blog.models import Comment, PendingNotification
+from blog.tasks import flush_comment_digests
+
+
+@pytest.mark.django_db
+class TestCommentDigests:
+
+    def test_digest_mode_buffers_instead_of_sending(self, authenticated_client, create_post, settings):
+        settings.COMMENT_NOTIFICATION_MODE = 'digest'
+        post = create_post(author=authenticated_client.user)
+
+        with patch('blog.views.send_comment_notification.delay') as mock_task:
+            authenticated_client.post('/api/comments/', {'post': post.id, 'comment_text': 'Hi'}, format='json')
+
+        mock_task.assert_not_called()
+        assert digest.pop_all() == {post.author_id: [Comment.objects.get()]}
+
+    def test_bulk_comments_are_buffered(self, authenticated_client, create_post, settings):
+        settings.COMMENT_NOTIFICATION_MODE = 'digest'
+        post = create_post(author=authenticated_client.user)
+
+        response = authenticated_client.post(
+            '/api/comments/bulk/', [{'post': post.id, 'comment_text': f'c{i}'} for i in range(3)], format='json'
+        )
+
+        assert response.status_code == 201
+        assert digest.pop_all() == {post.author_id: list(Comment.objects.order_by('pk'))}
+
+    def test_comment_rolled_back_with_its_notification(self, create_post):
+        post = create_post()
+
+        with pytest.raises(RuntimeError), transaction.atomic():
+            digest.add([Comment.objects.create(post=post, commenter=post.author, comment_text='Hi')])
+            raise RuntimeError
+
+        assert digest.pop_all() == {}
+
+    def test_deleted_comments_are_dropped(self, create_post):
+        post = create_post()
+        comment = Comment.objects.create(post=post, commenter=post.author, comment_text='Hi')
+        digest.add([comment])
+        Comment.objects.filter(pk=comment.pk).delete()
+
+        assert flush_comment_digests() == 'No comment digests to send'
+        assert not PendingNotification.objects.exists()
+
+    def test_flush_sends_one_message_per_author(self, create_user, create_post):
+        alice = create_user(username='alice', email='alice@example.com')
+        bob = create_user(username='bob', email='bob@example.com')
+        reader = create_user(username='reader', email='reader@example.com')
+        alice_post = create_post(author=alice, title='Alice post')
+        bob_post = create_post(author=bob, title='Bob post')
+        for text in ['one', 'two', 'three']:
+            digest.add([Comment.objects.create(post=alice_post, commenter=reader, comment_text=text)])
+        digest.add([Comment.objects.create(post=bob_post, commenter=reader, comment_text='hello bob')])
+
+        with patch('blog.tasks.get_connection', wraps=mail.get_connection) as get_connection:
+            result = flush_comment_digests()
+
+        assert result == 'Sent 2 comment digest(s)'
+        get_connection.assert_called_once()
+        assert sorted(m.to[0] for m in mail.outbox) == ['alice@example.com', 'bob@example.com']
+        alice_mail = next(m for m in mail.outbox if m.to == ['alice@example.com'])
+        assert '"one"' in alice_mail.body and '"three"' in alice_mail.body
+        assert digest.pop_all() == {}
+
+    def test_flush_caps_comments_per_author(self, create_user, create_post, settings):
+        settings.COMMENT_DIGEST_MAX_COMMENTS = 2
+        post = create_post()
+        digest.add([
+            Comment.objects.create(post=post, commenter=post.author, comment_text=f'c{i}')
+            for i in range(5)
+        ])
+
+        flush_comment_digests()
+
+        assert len(mail.outbox) == 1
+        assert '...and 3 more comment(s).' in mail.outbox[0].body
+
+    def test_failed_flush_keeps_notifications(self, create_post):
+        post = create_post()
+        comment = Comment.objects.create(post=post, commenter=post.author, comment_text='Hi')
+        digest.add([comment])
+
+        with patch('blog.tasks.EmailMessage.send', side_effect=OSError('SMTP down')):
+            result = flush_comment_digests()
+
+        assert result == 'Sent 0 comment digest(s), 1 failed: SMTP down'
+        assert digest.pop_all() == {post.author_id: [comment]}
+
+    def test_partial_failure_requeues_only_unsent_digests(self, create_user, create_post):
+        alice = create_user(username='alice', email='alice@example.com')
+        bob = create_user(username='bob', email='bob@example.com')
+        alice_comment = Comment.objects.create(post=create_post(author=alice), commenter=bob, comment_text='Hi')
+        bob_comment = Comment.objects.create(post=create_post(author=bob), commenter=alice, comment_text='Yo')
+        digest.add([alice_comment, bob_comment])
+        send = EmailMessage.send
+
+        def refuse_bob(message, *args, **kwargs):
+            if message.to == ['bob@example.com']:
+                raise OSError('Mailbox busy')
+            return send(message, *args, **kwargs)
+
+        with patch('blog.tasks.EmailMessage.send', autospec=True, side_effect=refuse_bob):
+            result = flush_comment_digests()
+
+        assert result == 'Sent 1 comment digest(s), 1 failed: Mailbox busy'
+        assert [m.to for m in mail.outbox] == [['alice@example.com']]
+        assert digest.pop_all() == {bob.id: [bob_comment]}
@@ -0,0 +1,76 @@
+"""
+Test cases for cursor pagination
+- Opt-in keyset mode on posts and comments
+- Stable next/previous cursors
+"""
+import pytest
+from rest_framework import status
+from blog.models import Comment
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_page_number_pagination_is_default(self, authenticated_client, create_post):
+        create_post(author=authenticated_client.user)
+
+        response = authenticated_client.get('/api/posts/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 1
+
+    def test_cursor_mode_walks_all_posts_forward_and_back(self, authenticated_client, create_post):
+        author = authenticated_client.user
+        posts = [create_post(author=author, title=f'Post {i}') for i in range(45)]
+
+        response = authenticated_client.get('/api/posts/?pagination=cursor')
+        assert response.status_code == status.HTTP_200_OK
+        assert 'count' not in response.data
+        assert response.data['previous'] is None
+
+        seen = [item['id'] for item in response.data['results']]
+        pages = [response]
+        while response.data['next']:
+            response = authenticated_client.get(response.data['next'])
+            seen.extend(item['id'] for item in response.data['results'])
+            pages.append(response)
+
+        assert seen == [post.id for post in reversed(posts)]
+        assert len(pages) == 3
+
+        previous = authenticated_client.get(pages[-1].data['previous'])
+        assert [item['id'] for item in previous.data['results']] == [
+            item['id'] for item in pages[-2].data['results']
+        ]
+
+    def test_cursor_breaks_ties_on_id(self, authenticated_client, create_post):
+        author = authenticated_client.user
+        posts = [create_post(author=author, title=f'Post {i}') for i in range(25)]
+        first = posts[0]
+        for post in posts:
+            post.created_at = first.created_at
+        type(first).objects.bulk_update(posts, ['created_at'])
+
+        response = authenticated_client.get('/api/posts/?pagination=cursor')
+        second = authenticated_client.get(response.data['next'])
+
+        ids = [item['id'] for item in response.data['results'] + second.data['results']]
+        assert ids == sorted((post.id for post in posts), reverse=True)
+
+    def test_invalid_cursor_returns_404(self, authenticated_client):
+        response = authenticated_client.get('/api/posts/?cursor=not-a-cursor')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_comments_support_cursor_mode(self, authenticated_client, create_post):
+        post = create_post(author=authenticated_client.user)
+        comments = [
+            Comment.objects.create(post=post, commenter=authenticated_client.user, comment_text=f'Comment {i}')
+            for i in range(3)
+        ]
+
+        response = authenticated_client.get('/api/comments/?pagination=cursor')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['id'] for item in response.data['results']] == [c.id for c in reversed(comments)]
+        assert response.data['next'] is None
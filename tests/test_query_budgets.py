@@ -0,0 +1,110 @@
+"""
+Test cases for endpoint query budgets
+- Every benchmarked endpoint stays within its SQL query budget
+- Query counts do not grow with the number of rows on a page
+- seed_blog and benchmark_endpoints commands
+"""
+import json
+import pytest
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.settings import api_settings
+from blog.benchmarking import ENDPOINTS, Endpoint, endpoint_targets
+from blog.models import Comment, Post
+
+
+def seed_page(author, rows):
+    """
+    Replace all posts with ``rows`` public posts by different authors, and
+    ``rows`` comments by different commenters on the first one, so any
+    per-row query shows up.
+    """
+    Post.objects.all().delete()
+    users = [author] + [User.objects.create(username=f'user{rows}-{n}') for n in range(1, rows)]
+    posts = [Post.objects.create(author=user, title=f'Database post {n}', content='Body') for n, user in enumerate(users)]
+    for user in users:
+        Comment.objects.create(post=posts[0], commenter=user, comment_text='Hi')
+    Post.objects.recount_comments()
+
+
+def count_queries(client, path):
+    # Warm the token cache so only the endpoint's own queries are counted.
+    client.get(path)
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code == 200, path
+    return len(captured)
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+
+    @pytest.fixture(autouse=True)
+    def no_response_cache(self, settings):
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        cache.clear()
+
+    @pytest.mark.parametrize('name', sorted(ENDPOINTS))
+    def test_endpoint_within_budget_at_any_page_size(self, authenticated_client, name):
+        endpoint = ENDPOINTS[name]
+        seed_page(authenticated_client.user, 1)
+        one_row = count_queries(authenticated_client, endpoint.path.format(**endpoint_targets()))
+
+        seed_page(authenticated_client.user, api_settings.PAGE_SIZE)
+        full_page = count_queries(authenticated_client, endpoint.path.format(**endpoint_targets()))
+
+        assert full_page == one_row, f'{name} issues more queries as the page fills up'
+        assert full_page <= endpoint.budget, f'{name} issued {full_page} queries, budget is {endpoint.budget}'
+
+
+@pytest.mark.django_db
+class TestBenchmarkCommands:
+
+    def test_seed_blog(self):
+        out = StringIO()
+
+        call_command('seed_blog', users=3, posts=20, comments=50, stdout=out)
+
+        assert Post.objects.count() == 20
+        assert Comment.objects.count() == 50
+        assert sum(Post.objects.values_list('comments_count', flat=True)) == 50
+        assert 'Seeded 3 users, 20 posts and 50 comments' in out.getvalue()
+
+    def test_benchmark_endpoints_writes_json(self, tmp_path):
+        call_command('seed_blog', users=3, posts=30, comments=60, stdout=StringIO())
+        output = tmp_path / 'results.json'
+
+        call_command('benchmark_endpoints', repeat=2, output=str(output), stdout=StringIO())
+
+        results = json.loads(output.read_text())
+        assert set(results['endpoints']) == set(ENDPOINTS)
+        post_list = results['endpoints']['post-list']
+        assert post_list['status'] == 200
+        assert post_list['queries'] <= post_list['budget']
+        assert post_list['p50_ms'] <= post_list['p95_ms']
+        assert results['rows'] == {'users': 3, 'posts': 30, 'comments': 60}
+
+    def test_benchmark_endpoints_compares_with_baseline(self, tmp_path):
+        call_command('seed_blog', users=2, posts=5, comments=5, stdout=StringIO())
+        baseline = tmp_path / 'baseline.json'
+        call_command('benchmark_endpoints', repeat=1, output=str(baseline), stdout=StringIO())
+        out = StringIO()
+
+        call_command('benchmark_endpoints', repeat=1, compare=str(baseline), stdout=out)
+
+        assert 'vs baseline' in out.getvalue()
+        assert 'post-list' in out.getvalue()
+
+    def test_benchmark_endpoints_fails_over_budget(self, monkeypatch):
+        call_command('seed_blog', users=2, posts=5, comments=5, stdout=StringIO())
+        monkeypatch.setitem(ENDPOINTS, 'post-list', Endpoint('/api/posts/', 0))
+
+        with pytest.raises(CommandError, match='post-list'):
+            call_command('benchmark_endpoints', repeat=1, stdout=StringIO())
@@ -0,0 +1,104 @@
+"""
+Test cases for read-replica routing
+- Safe requests read from the replica
+- Writers stick to the primary for REPLICA_STICKY_SECONDS
+- Replica lag cannot poison the post cache
+"""
+import pytest
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from blog import routers
+from blog.models import Post
+
+
+REPLICA = 'replica1'
+
+# A second connection to the test database stands in for the replica. It
+# mirrors the primary and, like a real replica, only sees committed rows.
+if REPLICA not in connections.settings:
+    replica_settings = {**connections.settings[DEFAULT_DB_ALIAS], 'TEST': {'MIRROR': DEFAULT_DB_ALIAS}}
+    connections.settings[REPLICA] = connections.configure_settings(
+        {DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS], REPLICA: replica_settings}
+    )[REPLICA]
+
+
+@pytest.fixture
+def replica(settings):
+    settings.REPLICA_DATABASES = [REPLICA]
+    return REPLICA
+
+
+def blog_queries(captured):
+    return [q['sql'] for q in captured.captured_queries if 'blog_' in q['sql']]
+
+
+@pytest.mark.django_db(transaction=True, databases=[DEFAULT_DB_ALIAS, REPLICA])
+class TestReplicaRouting:
+
+    def test_safe_requests_read_from_replica(self, client_for, replica, create_user, create_post):
+        user = create_user()
+        create_post(author=user)
+        client = client_for(user)
+
+        with CaptureQueriesContext(connections[replica]) as on_replica, \
+                CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as on_primary:
+            response = client.get('/api/posts/')
+
+        assert response.status_code == 200
+        assert len(response.data['results']) == 1
+        assert blog_queries(on_replica)
+        assert not blog_queries(on_primary)
+
+    def test_writer_sticks_to_primary(self, client_for, replica, create_user, create_post):
+        writer = client_for(create_user())
+        reader = client_for(create_user(username='reader', email='reader@example.com'))
+
+        writer.post('/api/posts/', {'title': 'Fresh', 'content': 'x'}, format='json')
+        with CaptureQueriesContext(connections[replica]) as on_replica:
+            response = writer.get('/api/posts/?page=1')
+        with CaptureQueriesContext(connections[replica]) as reader_on_replica:
+            reader.get('/api/posts/?page=1')
+
+        assert response.data['results'][0]['title'] == 'Fresh'
+        assert not blog_queries(on_replica)
+        assert blog_queries(reader_on_replica)
+
+    def test_stickiness_expires(self, client_for, replica, settings, create_user):
+        settings.REPLICA_STICKY_SECONDS = 0
+        writer = client_for(create_user())
+
+        writer.post('/api/posts/', {'title': 'Fresh', 'content': 'x'}, format='json')
+        with CaptureQueriesContext(connections[replica]) as on_replica:
+            writer.get('/api/posts/')
+
+        assert blog_queries(on_replica)
+
+    def test_writes_go_to_primary(self, client_for, replica, create_user):
+        client = client_for(create_user())
+
+        with CaptureQueriesContext(connections[replica]) as on_replica:
+            response = client.post('/api/posts/', {'title': 'New', 'content': 'x'}, format='json')
+
+        assert response.status_code == 201
+        assert not on_replica.captured_queries
+
+    def test_reads_outside_requests_use_primary(self, replica, create_user, create_post):
+        create_post(author=create_user())
+
+        assert Post.objects.all().db == DEFAULT_DB_ALIAS
+        token = routers.allow_replica_reads()
+        try:
+            assert Post.objects.all().db == replica
+            assert Token.objects.all().db == DEFAULT_DB_ALIAS
+        finally:
+            routers.reset(token)
+
+    def test_recent_writes_are_not_cached_from_replica(self, client_for, replica, create_user):
+        writer = client_for(create_user())
+        reader = client_for(create_user(username='reader', email='reader@example.com'))
+
+        writer.post('/api/posts/', {'title': 'Fresh', 'content': 'x'}, format='json')
+        reader.get('/api/posts/')
+
+        assert reader.get('/api/posts/')['X-Cache'] == 'MISS'
@@ -0,0 +1,50 @@
+"""
+Test cases for post search
+- Visibility rules
+- Query validation
+- Benchmark command
+"""
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from rest_framework import status
+from blog.models import Post
+
+
+@pytest.mark.django_db
+class TestPostSearch:
+
+    def test_search_matches_title_and_content(self, authenticated_client, create_post):
+        author = authenticated_client.user
+        create_post(author=author, title='Tuning Postgres', content='Indexes everywhere')
+        create_post(author=author, title='Gardening', content='Notes on postgres replicas')
+        create_post(author=author, title='Cooking', content='Nothing relevant')
+
+        response = authenticated_client.get('/api/posts/search/?q=postgres')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['count'] == 2
+        assert {p['title'] for p in response.data['results']} == {'Tuning Postgres', 'Gardening'}
+
+    def test_search_respects_private_posts(self, authenticated_client, create_post, create_user):
+        other = create_user(username='other', email='other@example.com')
+        create_post(author=other, title='Secret postgres tricks', is_private=True)
+        create_post(author=authenticated_client.user, title='My private postgres notes', is_private=True)
+
+        response = authenticated_client.get('/api/posts/search/?q=postgres')
+
+        assert [p['title'] for p in response.data['results']] == ['My private postgres notes']
+
+    def test_search_requires_query(self, authenticated_client):
+        response = authenticated_client.get('/api/posts/search/?q=')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_benchmark_command_rolls_back_corpus(self):
+        out = StringIO()
+
+        call_command('benchmark_search', posts=50, repeat=2, queries=['postgres'], stdout=out)
+
+        assert 'fulltext' in out.getvalue()
+        assert 'icontains' in out.getvalue()
+        assert not Post.objects.exists()
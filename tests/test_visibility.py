@@ -0,0 +1,122 @@
+"""
+Test cases for post and comment visibility
+- Post.objects.visible_to and Comment.objects.visible
+- Pages of an authenticated user's posts sliced through a UNION ALL window
+- Query plans served from the partial indexes (PostgreSQL only)
+"""
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from rest_framework.authtoken.models import Token
+from blog.models import Comment, Post
+
+
+@pytest.fixture
+def posts(create_user, create_post):
+    alice = create_user(username='alice', email='alice@example.com')
+    bob = create_user(username='bob', email='bob@example.com')
+    return {
+        'alice_public': create_post(author=alice, title='Alice public'),
+        'alice_private': create_post(author=alice, title='Alice private', is_private=True),
+        'bob_public': create_post(author=bob, title='Bob public'),
+        'bob_private': create_post(author=bob, title='Bob private', is_private=True),
+    }
+
+
+@pytest.mark.django_db
+class TestVisibleTo:
+
+    def test_user_sees_public_and_own_private_posts(self, posts):
+        alice = posts['alice_public'].author
+
+        visible = set(Post.objects.visible_to(alice).values_list('title', flat=True))
+
+        assert visible == {'Alice public', 'Alice private', 'Bob public'}
+
+    @pytest.mark.parametrize('user', [None, AnonymousUser()])
+    def test_anonymous_sees_public_posts(self, posts, user):
+        visible = set(Post.objects.visible_to(user).values_list('title', flat=True))
+
+        assert visible == {'Alice public', 'Bob public'}
+
+    def test_comments_on_private_posts_are_hidden(self, posts):
+        alice = posts['alice_public'].author
+        Comment.objects.create(post=posts['alice_public'], commenter=alice, comment_text='Shown')
+        Comment.objects.create(post=posts['alice_private'], commenter=alice, comment_text='Hidden')
+
+        assert list(Comment.objects.visible().values_list('comment_text', flat=True)) == ['Shown']
+
+    def test_pages_match_the_or_filter(self, posts, create_post):
+        alice = posts['alice_public'].author
+        for n in range(6):
+            create_post(author=alice, title=f'Extra {n}', is_private=n % 2 == 0)
+        visible = Post.objects.visible_to(alice).order_by('-created_at', '-id')
+        expected = list(visible.values_list('title', flat=True))
+
+        pages = [list(visible.values_list('title', flat=True)[start:start + 3]) for start in range(0, 9, 3)]
+
+        assert sum(pages, []) == expected
+
+    def test_slicing_window_follows_chained_querysets(self, posts):
+        alice = posts['alice_public'].author
+
+        queryset = Post.objects.visible_to(alice).filter(author=alice).select_related('author').values_list('pk')
+
+        assert queryset._visible_user == alice
+        assert Post.objects.visible_to(None)._visible_user is None
+
+    def test_list_detail_and_export_share_the_rule(self, authenticated_client, posts):
+        bob_private = posts['bob_private']
+
+        detail = authenticated_client.get(f'/api/posts/{bob_private.id}/')
+        listed = authenticated_client.get('/api/posts/')
+        exported = b''.join(authenticated_client.get('/api/posts/export/').streaming_content)
+
+        assert detail.status_code == 404
+        assert bob_private.title not in {post['title'] for post in listed.data['results']}
+        assert bob_private.title.encode() not in exported
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != 'postgresql', reason='Query plans are checked on PostgreSQL only')
+class TestVisibilityPlans:
+
+    @pytest.fixture
+    def author(self, create_user):
+        author = create_user()
+        other = create_user(username='other', email='other@example.com')
+        Post.objects.bulk_create(
+            Post(author=other, title=f'Post {n}', content='Body', is_private=n % 10 == 0) for n in range(5000)
+        )
+        Post.objects.bulk_create(
+            Post(author=author, title=f'Mine {n}', content='Body', is_private=True) for n in range(20)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE blog_post')
+        return author
+
+    def test_page_of_visible_posts_uses_both_partial_indexes(self, author):
+        plan = Post.objects.visible_to(author).order_by('-created_at', '-id')[20:40].explain()
+
+        assert 'blog_post_public_created_idx' in plan
+        assert 'blog_post_private_author_idx' in plan
+        assert 'Seq Scan' not in plan
+
+    def test_api_list_page_matches_the_or_filter(self, author, api_client):
+        token = Token.objects.create(user=author)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        expected = list(Post.objects.visible_to(author).order_by('-created_at', '-id').values_list('pk', flat=True))
+
+        response = api_client.get('/api/posts/?page=2')
+
+        assert [post['id'] for post in response.data['results']] == expected[20:40]
+
+    def test_public_page_uses_public_partial_index(self, author):
+        plan = Post.objects.visible_to(None).order_by('-created_at', '-id')[:20].explain()
+
+        assert 'blog_post_public_created_idx' in plan
+
+    def test_own_private_posts_use_author_partial_index(self, author):
+        plan = Post.objects.filter(is_private=True, author=author).order_by('-created_at', '-id')[:20].explain()
+
+        assert 'blog_post_private_author_idx' in plan